@@ -0,0 +1,289 @@
+# ./chroma_sync.py
+"""
+SQLite(fda_recalls.db) ↔ ChromaDB 동기화
+- drain    : chroma_outbox 에 쌓인 신규/변경 URL을 SQLite 원본으로 다시 읽어 Chroma 에 upsert (멱등, 여러 번 실행해도 같은 결과)
+- reconcile: SQLite URL/content_hash 와 Chroma 청크 ID/메타데이터를 일괄 비교해 어긋난 부분 보고
+             --repair 면 고아 청크 삭제 + 누락/변경 URL을 outbox 에 등록 (--drain 이면 바로 처리)
+- stats    : outbox 상태별 개수
+
+크롤러는 SQLite 저장과 같은 트랜잭션에서 outbox 에 기록하고 저장 직후 drain 을 호출함
+→ Chroma 단계가 실패해도 다음 실행(또는 이 스크립트)에서 이어서 반영
+
+사용 예:
+    python chroma_sync.py drain
+    python chroma_sync.py reconcile              # 보고만
+    python chroma_sync.py reconcile --repair --drain
+"""
+import os
+import re
+import sqlite3
+import argparse
+from collections import defaultdict
+from typing import Any, Dict, List
+
+import chromadb
+
+from db_utils import (CHROMA_LOOKUP_BATCH_SIZE, MIN_CONTENT_CHARS, RECALLS_COLUMNS, collection_name_for_model,
+                      create_recalls_table, save_to_chromadb)
+from utils.chroma_outbox import ChromaOutbox
+from utils.embedding_cache import EmbeddingCache
+from utils.embedding_pipeline import EmbeddingPipeline, backend_model
+from utils.near_duplicates import NEAR_DUP_DB_PATH, NEAR_DUP_ENABLED, NearDuplicateIndex
+
+MAIN_DB_PATH = "./data/fda_recalls.db"
+CHROMA_PATH = "./data/chroma_db_recall"
+COLLECTION_NAME = "FDA_recalls"
+
+# drain 1회 리스 단위 (save_to_chromadb 1회 호출 단위)
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "200"))
+# reconcile 때 Chroma 메타데이터를 읽는 페이지 크기
+RECONCILE_PAGE_SIZE = 5000
+
+_CHUNK_SUFFIX_RE = re.compile(r"_chunk_\d+$")
+
+
+def get_collection(chroma_path: str = CHROMA_PATH, collection_name: str = COLLECTION_NAME):
+    """조회/삭제용 컬렉션 (없으면 None)"""
+    try:
+        return chromadb.PersistentClient(path=chroma_path).get_collection(collection_name)
+    except Exception:
+        return None
+
+
+def delete_chunks_by_url(collection, urls: List[str]) -> int:
+    """URL들의 청크 전부 삭제 → 삭제 수"""
+    deleted = 0
+    for start in range(0, len(urls), CHROMA_LOOKUP_BATCH_SIZE):
+        where = {"url": {"$in": urls[start:start + CHROMA_LOOKUP_BATCH_SIZE]}}
+        ids = collection.get(where=where, include=[])["ids"]
+        if ids:
+            collection.delete(ids=ids)
+            deleted += len(ids)
+    return deleted
+
+
+def load_recalls(conn: sqlite3.Connection, urls: List[str]) -> List[Dict[str, Any]]:
+    """URL 목록 → recalls 행 (SQLite 원본 기준으로 Chroma 에 반영)"""
+    columns = ", ".join(RECALLS_COLUMNS + ["content_hash"])
+    records = []
+    for start in range(0, len(urls), CHROMA_LOOKUP_BATCH_SIZE):
+        batch = urls[start:start + CHROMA_LOOKUP_BATCH_SIZE]
+        rows = conn.execute(f"SELECT {columns} FROM recalls WHERE url IN ({', '.join('?' * len(batch))})",
+                            batch).fetchall()
+        records.extend(dict(row) for row in rows)
+    return records
+
+
+def drain_outbox(db_path: str = MAIN_DB_PATH, chroma_path: str = CHROMA_PATH,
+                 collection_name: str = COLLECTION_NAME, batch_size: int = OUTBOX_BATCH_SIZE,
+                 embedding_cache: EmbeddingCache = None, pipeline: EmbeddingPipeline = None,
+                 near_dup_index: NearDuplicateIndex = None) -> Dict[str, int]:
+    """
+    outbox 작업을 리스 → SQLite 원본 조회 → Chroma upsert → 완료 처리 (남은 작업이 없을 때까지)
+    SQLite 에서 사라진 URL은 Chroma 청크 삭제, 실패한 묶음은 백오프 후 재시도 대상으로 반납
+    근접 중복 인덱스는 drain 1회에 한 번만 읽음 (near_dup_index 를 넘기면 호출한 쪽이 관리)
+    반환: {"synced", "removed", "failed", "requeued"}
+    """
+    stats = {"synced": 0, "removed": 0, "failed": 0, "requeued": 0}
+    outbox = ChromaOutbox(db_path)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    cache = None
+    index = near_dup_index
+    try:
+        create_recalls_table(conn.cursor())
+        conn.commit()
+        while True:
+            leased = outbox.lease(batch_size)
+            if not leased:
+                break
+            # 임베딩 캐시/예산은 묶음 사이에 공유 (필요할 때 한 번만 생성)
+            cache = cache or embedding_cache or EmbeddingCache()
+            pipeline = pipeline or EmbeddingPipeline()
+            if index is None and NEAR_DUP_ENABLED:
+                index = NearDuplicateIndex(NEAR_DUP_DB_PATH)
+
+            records = load_recalls(conn, [item["url"] for item in leased])
+            found = {record["url"] for record in records}
+            removed_urls = [item["url"] for item in leased if item["url"] not in found]
+            chunk_counts = {}
+            try:
+                if records:
+                    save_to_chromadb(records, collection_name=collection_name, db_path=chroma_path,
+                                     embedding_cache=cache, pipeline=pipeline, strict=True,
+                                     near_dup=index is not None, near_dup_index=index,
+                                     chunk_counts=chunk_counts)
+                if removed_urls:
+                    collection = get_collection(chroma_path, collection_name_for_model(collection_name, pipeline.model))
+                    if collection is not None:
+                        delete_chunks_by_url(collection, removed_urls)
+            except Exception as e:
+                outbox.fail(leased, f"{type(e).__name__}: {e}")
+                stats["failed"] += len(leased)
+                print(f"⚠️ outbox 묶음 {len(leased)}개 Chroma 반영 실패 → 재시도 예약: {e}")
+                continue
+
+            # 청크가 0개인 URL은 chroma_no_chunks 에 기록 → reconcile 이 "누락"으로 다시 등록하지 않음
+            completed = outbox.complete(leased, chunk_counts)
+            stats["synced"] += len(records)
+            stats["removed"] += len(removed_urls)
+            # 처리 중 다시 바뀐 URL은 outbox 에 남아 다음 리스에서 최신 내용으로 처리
+            stats["requeued"] += len(leased) - completed
+    finally:
+        conn.close()
+        if cache is not None and embedding_cache is None:
+            cache.close()
+        if index is not None and near_dup_index is None:
+            index.close()
+        remaining = outbox.stats()
+        outbox.close()
+
+    if any(stats.values()):
+        print(f"📤 outbox 반영: Chroma {stats['synced']}개, 삭제 {stats['removed']}개, "
+              f"실패 {stats['failed']}개, 재처리 대기 {stats['requeued']}개 / 남은 작업 {remaining}")
+    return stats
+
+
+def _load_sqlite_side(db_path: str):
+    """url → content_hash (청크가 있어야 하는 URL), 전체 URL, 근접 중복 URL"""
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        expected, all_urls = {}, set()
+        cursor = conn.execute("SELECT url, content_hash, length(trim(content)) >= ? FROM recalls", (MIN_CONTENT_CHARS,))
+        for url, content_hash, has_content in cursor:
+            all_urls.add(url)
+            if has_content:
+                expected[url] = content_hash
+        has_clusters = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'recall_clusters'"
+        ).fetchone()
+        duplicates = set()
+        if has_clusters:
+            duplicates = {row[0] for row in conn.execute(
+                "SELECT url FROM recall_clusters WHERE url != canonical_url")}
+    finally:
+        conn.close()
+    for url in duplicates:
+        expected.pop(url, None)
+    return expected, all_urls, duplicates
+
+
+def reconcile(db_path: str = MAIN_DB_PATH, chroma_path: str = CHROMA_PATH,
+              collection_name: str = COLLECTION_NAME, repair: bool = False, drain: bool = False) -> Dict[str, Any]:
+    """
+    SQLite ↔ Chroma 일괄 비교
+    - missing : 청크가 있어야 하는데 Chroma 에 없는 URL
+                (같은 내용으로 처리했는데 청크가 0개였던 URL - chroma_no_chunks - 은 제외)
+    - stale   : 청크 content_hash 가 SQLite 와 다르거나, ID 규칙/청크 수가 맞지 않는 URL (재청킹 필요)
+    - orphan  : SQLite 에 없는 URL, 근접 중복 URL, url 메타데이터가 없는 청크 ID
+    content_hash 메타데이터가 없는 예전 청크는 내용 비교에서 제외 (전체 재임베딩 방지)
+    """
+    expected, all_urls, _ = _load_sqlite_side(db_path)
+    outbox = ChromaOutbox(db_path)
+    try:
+        no_chunks = outbox.no_chunk_hashes()
+    finally:
+        outbox.close()
+
+    # drain 과 같은 기준: EMBEDDING_BACKEND 모델의 컬렉션을 비교
+    collection = get_collection(chroma_path, collection_name_for_model(collection_name, backend_model()))
+    chunks_by_url = defaultdict(list)
+    orphan_ids, stale_urls = [], set()
+    chroma_chunks = 0
+    if collection is not None:
+        offset = 0
+        while True:
+            page = collection.get(include=["metadatas"], limit=RECONCILE_PAGE_SIZE, offset=offset)
+            if not page["ids"]:
+                break
+            offset += len(page["ids"])
+            chroma_chunks += len(page["ids"])
+            for chunk_id, metadata in zip(page["ids"], page["metadatas"]):
+                metadata = metadata or {}
+                url = metadata.get("url")
+                # SQLite 에 없는 URL / 근접 중복 / 본문이 비어 청크가 없어야 하는 URL
+                if not url or url not in expected:
+                    orphan_ids.append(chunk_id)
+                    continue
+                chunks_by_url[url].append(chunk_id)
+                chunk_hash = metadata.get("content_hash")
+                if chunk_hash and expected[url] and chunk_hash != expected[url]:
+                    stale_urls.add(url)
+                if chunk_id != url and _CHUNK_SUFFIX_RE.sub("", chunk_id) != url:
+                    stale_urls.add(url)
+                if len(chunks_by_url[url]) > metadata.get("total_chunks", 1):
+                    stale_urls.add(url)
+
+    missing_urls = [url for url in expected
+                    if url not in chunks_by_url and not (url in no_chunks and no_chunks[url] == expected[url])]
+    report = {
+        "sqlite_urls": len(all_urls),
+        "expected_urls": len(expected),
+        "chroma_chunks": chroma_chunks,
+        "chroma_urls": len(chunks_by_url),
+        "missing": len(missing_urls),
+        "stale": len(stale_urls),
+        "orphan_chunks": len(orphan_ids),
+    }
+    print(f"🩺 동기화 점검: SQLite {report['sqlite_urls']}개 URL (색인 대상 {report['expected_urls']}개) / "
+          f"Chroma {report['chroma_urls']}개 URL, {report['chroma_chunks']}개 청크")
+    print(f"   - 누락 {report['missing']}개, 내용 불일치 {report['stale']}개, 고아 청크 {report['orphan_chunks']}개")
+
+    if not repair:
+        return report
+
+    if orphan_ids and collection is not None:
+        for start in range(0, len(orphan_ids), CHROMA_LOOKUP_BATCH_SIZE):
+            collection.delete(ids=orphan_ids[start:start + CHROMA_LOOKUP_BATCH_SIZE])
+        print(f"🧹 고아 청크 {len(orphan_ids)}개 삭제")
+
+    outbox = ChromaOutbox(db_path)
+    try:
+        report["enqueued"] = outbox.enqueue([(url, expected[url]) for url in missing_urls + sorted(stale_urls)])
+    finally:
+        outbox.close()
+    print(f"📥 outbox 등록: {report['enqueued']}개 URL")
+
+    if drain:
+        report["drain"] = drain_outbox(db_path, chroma_path, collection_name)
+    return report
+
+
+def print_outbox_stats(db_path: str = MAIN_DB_PATH) -> Dict[str, int]:
+    outbox = ChromaOutbox(db_path)
+    try:
+        stats = outbox.stats()
+        print(f"📋 chroma_outbox 상태: {stats}")
+        dead = outbox.conn.execute("""
+            SELECT url, attempts, last_error FROM chroma_outbox WHERE attempts >= ? ORDER BY enqueued_at LIMIT 20
+        """, (outbox.max_attempts,)).fetchall()
+        for row in dead:
+            print(f"  ❌ {row['url']} (시도 {row['attempts']}회): {row['last_error']}")
+    finally:
+        outbox.close()
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SQLite ↔ ChromaDB 동기화 (outbox / reconcile)")
+    parser.add_argument("--db-path", default=MAIN_DB_PATH)
+    parser.add_argument("--chroma-path", default=CHROMA_PATH)
+    parser.add_argument("--collection", default=COLLECTION_NAME)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_drain = sub.add_parser("drain", help="chroma_outbox 작업을 Chroma 에 반영")
+    p_drain.add_argument("--batch-size", type=int, default=OUTBOX_BATCH_SIZE)
+
+    p_reconcile = sub.add_parser("reconcile", help="SQLite 와 Chroma 비교 (기본은 보고만)")
+    p_reconcile.add_argument("--repair", action="store_true", help="고아 청크 삭제 + 누락/변경 URL outbox 등록")
+    p_reconcile.add_argument("--drain", action="store_true", help="--repair 후 바로 outbox 처리")
+
+    sub.add_parser("stats", help="outbox 상태별 개수와 포기한 작업")
+
+    args = parser.parse_args()
+    if args.command == "drain":
+        drain_outbox(args.db_path, args.chroma_path, args.collection, batch_size=args.batch_size)
+    elif args.command == "reconcile":
+        reconcile(args.db_path, args.chroma_path, args.collection, repair=args.repair, drain=args.drain)
+    else:
+        print_outbox_stats(args.db_path)
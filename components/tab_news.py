@@ -1,15 +1,19 @@
 # components/tab_news.py
 
 import streamlit as st
-import requests
 from bs4 import BeautifulSoup
 import re
 import os
 from dotenv import load_dotenv
+from utils.rate_limiter import get_rate_limiter
 
 # .env 파일에서 환경변수 로드
 load_dotenv()
 
+# 뉴스 사이트 요청도 호스트별 속도 제한기를 거침
+rate_limiter = get_rate_limiter()
+NEWS_TIMEOUT = 10
+
 def fetch_articles_with_keyword(keyword=None, max_pages=5, max_articles=3):
     """특정 키워드가 포함된 최신 기사들을 크롤링하여 제목, 요약, 날짜, 링크, 이미지 정보를 담아 리스트로 반환하는 함수"""
     base_url = "https://www.thinkfood.co.kr/news/articleList.html?sc_section_code=S1N2&view_type=sm"
@@ -17,7 +21,7 @@ def fetch_articles_with_keyword(keyword=None, max_pages=5, max_articles=3):
 
     for page in range(1, max_pages + 1):
         url = f"{base_url}&page={page}"
-        res = requests.get(url)
+        res = rate_limiter.get(url, timeout=NEWS_TIMEOUT)
         if res.status_code != 200:
             continue
 
@@ -48,7 +52,7 @@ def fetch_articles_with_keyword(keyword=None, max_pages=5, max_articles=3):
             # 기사 본문에서 이미지 가져오기
             img_url = None
             try:
-                res_detail = requests.get(link)
+                res_detail = rate_limiter.get(link, timeout=NEWS_TIMEOUT)
                 soup_detail = BeautifulSoup(res_detail.text, "html.parser")
                 img_tag = soup_detail.select_one("figure img")
                 if img_tag and "src" in img_tag.attrs:
@@ -70,7 +74,7 @@ def fetch_articles_with_keyword(keyword=None, max_pages=5, max_articles=3):
 def fetch_full_article_content(url):
     """기사 URL에서 전체 본문 내용을 가져오는 함수"""
     try:
-        res = requests.get(url)
+        res = rate_limiter.get(url, timeout=NEWS_TIMEOUT)
         res.raise_for_status()
         soup = BeautifulSoup(res.text, "html.parser")
         
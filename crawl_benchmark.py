@@ -0,0 +1,157 @@
+# ./crawl_benchmark.py
+"""
+크롤러 HAR 녹화/재생 + 오프라인 벤치마크
+- record: 실제 fda.gov 목록/상세 트래픽을 HAR로 저장 (DB에는 저장하지 않음)
+- replay: 저장된 HAR로만 응답하는 브라우저로 같은 크롤링을 반복 → 페이지/초, 행/초 측정
+  (HAR에 없는 요청은 차단되므로 네트워크 없이도 항상 같은 입력으로 측정 가능)
+
+HTTP 우선 수집과 JSON 목록 엔드포인트는 브라우저를 거치지 않으므로 여기서는 끄고,
+crawl_links_via_dom(_parallel) / crawl_brand_details(Playwright 전용)만 측정
+
+사용 예:
+    python crawl_benchmark.py record --har-dir ./data/har --details 30
+    python crawl_benchmark.py replay --har-dir ./data/har --pool-size 4 --listing-concurrency 3
+"""
+import os
+import json
+import time
+import shutil
+import asyncio
+import argparse
+from datetime import datetime
+
+import fda_realtime_crawler as crawler
+from utils.crawl_engine import BROWSER_STATE_PATH, DEFAULT_POOL_SIZE, HAR_DIR, set_har_mode
+from utils.crawl_state import CrawlState, LISTING_SOURCE
+from utils.crawl_telemetry import CrawlTelemetry
+from utils.rate_limiter import HostPolicy, get_rate_limiter
+
+MANIFEST_NAME = "manifest.json"
+STATE_NAME = "browser_state.json"
+BENCHMARK_PREFIX = "CRAWL_BENCHMARK"
+DEFAULT_DETAIL_LIMIT = 30
+
+
+def _manifest_path(har_dir: str) -> str:
+    return os.path.join(har_dir, MANIFEST_NAME)
+
+
+def use_har_session_state(har_dir: str, seed_from: str = None):
+    """
+    녹화/재생 모두 HAR 폴더 안의 세션 파일을 쓰도록 전환
+    → 재생 때도 녹화 때와 같은 경로(세션 재사용 → 목록 바로 접근)를 타서 HAR에 없는 요청이 안 생김
+    """
+    state_path = os.path.join(har_dir, STATE_NAME)
+    if seed_from and os.path.exists(seed_from) and not os.path.exists(state_path):
+        shutil.copyfile(seed_from, state_path)
+    crawler.BROWSER_STATE_PATH = state_path
+
+
+def load_manifest(har_dir: str):
+    """녹화 당시 워터마크와 상세 URL 목록"""
+    with open(_manifest_path(har_dir), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+async def crawl_listing_and_details(latest_db_date, telemetry, pool_size, listing_concurrency,
+                                    brand_urls=None, detail_limit=DEFAULT_DETAIL_LIMIT):
+    """브라우저 경로로 목록 → 상세 크롤링 (저장 없음) → (목록 결과, 상세 결과)"""
+    if listing_concurrency > 1:
+        links = await crawler.crawl_links_via_dom_parallel(latest_db_date, telemetry=telemetry,
+                                                           concurrency=listing_concurrency)
+    else:
+        links = await crawler.crawl_links_via_dom(latest_db_date, telemetry=telemetry)
+
+    targets = (brand_urls if brand_urls is not None else links)[:detail_limit]
+    results, _ = await crawler.crawl_brand_details(targets, pool_size=pool_size, http_first=False,
+                                                   telemetry=telemetry)
+    return links, results
+
+
+async def record(har_dir: str, detail_limit: int, pool_size: int, listing_concurrency: int):
+    """실제 사이트를 크롤링하면서 HAR 녹화"""
+    set_har_mode("record", har_dir)
+    os.makedirs(har_dir, exist_ok=True)
+    use_har_session_state(har_dir, seed_from=BROWSER_STATE_PATH)
+    telemetry = CrawlTelemetry(run_type="har_record")
+    latest_db_date = CrawlState().get_watermark(LISTING_SOURCE)
+
+    links, results = await crawl_listing_and_details(latest_db_date, telemetry, pool_size,
+                                                     listing_concurrency, detail_limit=detail_limit)
+
+    manifest = {
+        "recorded_at": datetime.now().isoformat(timespec="seconds"),
+        "latest_db_date": latest_db_date,
+        "brand_urls": links[:detail_limit],
+        "listing_rows": telemetry.counters["listing_rows"],
+        "details_ok": sum(1 for r in results if r),
+    }
+    with open(_manifest_path(har_dir), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    telemetry.finish()
+    print(f"📼 HAR 녹화 완료: {har_dir} (목록 {len(links)}개, 상세 {manifest['details_ok']}/{len(manifest['brand_urls'])}개)")
+    telemetry.print_summary()
+
+
+async def replay(har_dir: str, pool_size: int, listing_concurrency: int):
+    """HAR 재생 사이트로 크롤링 후 처리량 보고"""
+    set_har_mode("replay", har_dir)
+    use_har_session_state(har_dir)
+    manifest = load_manifest(har_dir)
+
+    # 로컬 재생이므로 fda.gov 속도 제한은 풀어둠
+    get_rate_limiter().set_policy("www.fda.gov", HostPolicy(rate=1000, max_rate=1000, burst=1000,
+                                                            concurrency=1000))
+
+    telemetry = CrawlTelemetry(run_type="har_replay")
+    started = time.perf_counter()
+    links, results = await crawl_listing_and_details(manifest["latest_db_date"], telemetry, pool_size,
+                                                     listing_concurrency, brand_urls=manifest["brand_urls"],
+                                                     detail_limit=len(manifest["brand_urls"]))
+    wall = time.perf_counter() - started
+    telemetry.finish()
+
+    listing_seconds = telemetry.stages["listing"] + telemetry.stages["warmup"]
+    detail_seconds = telemetry.stages["detail"]
+    listing_pages = telemetry.counters["listing_pages"]
+    detail_pages = sum(1 for r in results if r)
+
+    report = {
+        "pool_size": pool_size,
+        "listing_concurrency": listing_concurrency,
+        "wall_seconds": round(wall, 3),
+        "listing_pages": listing_pages,
+        "listing_rows": telemetry.counters["listing_rows"],
+        "links": len(links),
+        "detail_pages": detail_pages,
+        "detail_failed": len(results) - detail_pages,
+        "pages_per_sec": round((listing_pages + detail_pages) / wall, 3) if wall else 0.0,
+        "listing_pages_per_sec": round(listing_pages / listing_seconds, 3) if listing_seconds else 0.0,
+        "rows_per_sec": round(telemetry.counters["listing_rows"] / listing_seconds, 3) if listing_seconds else 0.0,
+        "detail_pages_per_sec": round(detail_pages / detail_seconds, 3) if detail_seconds else 0.0,
+    }
+    if len(links) < len(manifest["brand_urls"]):
+        print(f"⚠️ 재생 목록 링크 {len(links)}개 < 녹화 {len(manifest['brand_urls'])}개 (HAR 누락 가능)")
+
+    print(f"\n🏁 HAR 재생 벤치마크: 전체 {report['wall_seconds']}초")
+    print(f"   목록: {listing_pages}페이지, {report['listing_rows']}행 → "
+          f"{report['listing_pages_per_sec']} 페이지/초, {report['rows_per_sec']} 행/초")
+    print(f"   상세: {detail_pages}개 성공 / 실패 {report['detail_failed']}개 → {report['detail_pages_per_sec']} 페이지/초")
+    print(f"{BENCHMARK_PREFIX} {json.dumps(report, ensure_ascii=False, sort_keys=True)}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="크롤러 HAR 녹화/재생 벤치마크")
+    parser.add_argument("mode", choices=["record", "replay"])
+    parser.add_argument("--har-dir", default=HAR_DIR)
+    parser.add_argument("--details", type=int, default=DEFAULT_DETAIL_LIMIT, help="녹화할 상세 페이지 수")
+    parser.add_argument("--pool-size", type=int, default=DEFAULT_POOL_SIZE)
+    parser.add_argument("--listing-concurrency", type=int, default=1, help="1보다 크면 목록 병렬 수집")
+    args = parser.parse_args()
+
+    if args.mode == "record":
+        asyncio.run(record(args.har_dir, args.details, args.pool_size, args.listing_concurrency))
+    else:
+        asyncio.run(replay(args.har_dir, args.pool_size, args.listing_concurrency))
@@ -4,100 +4,185 @@ import sqlite3
 import chromadb
 from chromadb.utils import embedding_functions
 import uuid
-import time
-import re
 import glob
+import hashlib
 from datetime import datetime, timedelta
 from typing import Dict, Any, List
 
-def save_to_sqlite(data_list: List[Dict], db_path: str = "./data/fda_recalls.db"):
-    """
-    데이터 리스트를 SQLite DB에 직접 저장
-    paste-3.txt 로직 기반, JSON 파일 없이 data_list 직접 처리
-    """
-    
-    print(f"🔄 SQLite 저장 시작: {len(data_list)}개 레코드")
-    
-    # 데이터 폴더 생성
-    os.makedirs(os.path.dirname(db_path), exist_ok=True)
-    
-    # SQLite 연결 및 테이블 생성
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    
-    # 테이블 생성 (존재하지 않는 경우)
-    create_table_sql = """
-    CREATE TABLE IF NOT EXISTS recalls (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        document_type TEXT,
-        url TEXT UNIQUE,
-        company_announcement_date DATE,
-        fda_publish_date DATE,
-        company_name TEXT,
-        brand_name TEXT,
-        recall_reason TEXT,
-        recall_reason_detail TEXT,
-        product_type TEXT,
-        content TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    """
-    cursor.execute(create_table_sql)
-    
-    # 인덱스 생성 (검색 성능 향상)
-    indexes = [
-        "CREATE INDEX IF NOT EXISTS idx_company_name ON recalls(company_name)",
-        "CREATE INDEX IF NOT EXISTS idx_brand_name ON recalls(brand_name)",
-        "CREATE INDEX IF NOT EXISTS idx_recall_reason ON recalls(recall_reason)",
-        "CREATE INDEX IF NOT EXISTS idx_fda_publish_date ON recalls(fda_publish_date)",
-        "CREATE INDEX IF NOT EXISTS idx_product_type ON recalls(product_type)",
-        "CREATE INDEX IF NOT EXISTS idx_url ON recalls(url)"
-    ]
-    
-    for index_sql in indexes:
+from utils.boilerplate import BOILERPLATE_DB_PATH, BOILERPLATE_ENABLED, BoilerplateFilter
+from utils.chroma_outbox import create_outbox_table, enqueue_select
+from utils.embedding_cache import EmbeddingCache
+from utils.embedding_pipeline import EmbeddingPipeline, OPENAI_EMBEDDING_MODEL
+from utils.near_duplicates import NEAR_DUP_DB_PATH, NEAR_DUP_ENABLED, NearDuplicateIndex
+from utils.text_chunker import chunk_text
+
+RECALLS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS recalls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    document_type TEXT,
+    url TEXT UNIQUE,
+    company_announcement_date DATE,
+    fda_publish_date DATE,
+    company_name TEXT,
+    brand_name TEXT,
+    recall_reason TEXT,
+    recall_reason_detail TEXT,
+    product_type TEXT,
+    content TEXT,
+    content_hash TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+# 인덱스 생성 (검색 성능 향상)
+RECALLS_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_company_name ON recalls(company_name)",
+    "CREATE INDEX IF NOT EXISTS idx_brand_name ON recalls(brand_name)",
+    "CREATE INDEX IF NOT EXISTS idx_recall_reason ON recalls(recall_reason)",
+    "CREATE INDEX IF NOT EXISTS idx_fda_publish_date ON recalls(fda_publish_date)",
+    "CREATE INDEX IF NOT EXISTS idx_product_type ON recalls(product_type)",
+    "CREATE INDEX IF NOT EXISTS idx_url ON recalls(url)"
+]
+
+# recalls 데이터 컬럼 (id, created_at 제외)
+RECALLS_COLUMNS = [
+    "document_type", "url", "company_announcement_date", "fda_publish_date",
+    "company_name", "brand_name", "recall_reason", "recall_reason_detail",
+    "product_type", "content",
+]
+
+
+# ChromaDB upsert 1회당 청크 수 (벡터는 미리 계산되어 있으므로 로컬 쓰기 단위)
+CHROMA_BATCH_SIZE = int(os.getenv("CHROMA_BATCH_SIZE", "256"))
+# 기존 청크 ID 조회 1회당 URL 수
+CHROMA_LOOKUP_BATCH_SIZE = 500
+EMBEDDING_MODEL = OPENAI_EMBEDDING_MODEL
+# 이보다 짧은 본문은 색인하지 않고, 이보다 짧은 청크는 저장하지 않음 (chroma_sync.reconcile 도 같은 기준 사용)
+MIN_CONTENT_CHARS = 20
+MIN_CHUNK_CHARS = 30
+
+# 벌크 적재용 pragma (WAL: 적재 중에도 앱 읽기 가능, NORMAL: 트랜잭션마다 fsync 생략)
+BULK_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
+]
+
+# 프로세스 안에서 테이블/인덱스 확인을 끝낸 DB 경로
+_prepared_db_paths = set()
+
+
+def create_recalls_table(cursor):
+    """recalls 테이블과 인덱스 + chroma_outbox 생성 (이미 있으면 그대로, 예전 테이블에는 content_hash 컬럼 추가)"""
+    cursor.execute(RECALLS_TABLE_SQL)
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(recalls)").fetchall()}
+    if "content_hash" not in columns:
+        cursor.execute("ALTER TABLE recalls ADD COLUMN content_hash TEXT")
+    for index_sql in RECALLS_INDEXES:
         cursor.execute(index_sql)
-    
-    # 데이터 삽입 SQL
-    insert_sql = """
-    INSERT OR REPLACE INTO recalls (
-        document_type, url, company_announcement_date, fda_publish_date,
-        company_name, brand_name, recall_reason, recall_reason_detail,
-        product_type, content
-    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    create_outbox_table(cursor)
+
+
+def record_content_hash(cleaned: Dict[str, Any]) -> str:
+    """정제된 레코드의 데이터 컬럼 sha256 (바뀐 레코드만 UPDATE 하는 기준)"""
+    joined = "\x1f".join("" if cleaned[column] is None else str(cleaned[column]) for column in RECALLS_COLUMNS)
+    return hashlib.sha256(joined.encode("utf-8")).hexdigest()
+
+
+def bulk_upsert_recalls(data_list: List[Dict], db_path: str = "./data/fda_recalls.db",
+                        enqueue_chroma: bool = True) -> Dict[str, int]:
     """
-    
-    converted_count = 0
+    레코드를 트랜잭션 1회로 recalls 에 upsert
+    - 임시 테이블에 executemany → INSERT ... SELECT ... ON CONFLICT(url) DO UPDATE 한 번
+    - content_hash 가 같은 행은 건드리지 않음 (id / created_at / 인덱스 유지)
+    - enqueue_chroma=True 면 신규/변경 URL을 같은 트랜잭션에서 chroma_outbox 에 기록 (chroma_sync.drain_outbox 가 처리)
+    반환: {"inserted", "updated", "unchanged", "failed", "enqueued"}
+    """
+    stats = {"inserted": 0, "updated": 0, "unchanged": 0, "failed": 0, "enqueued": 0}
+
+    rows = []
     for i, record in enumerate(data_list):
         try:
-            # 필드 매핑 및 정제
-            cleaned_data = clean_record_for_sqlite(record)
-            
-            data = (
-                cleaned_data['document_type'],
-                cleaned_data['url'],
-                cleaned_data['company_announcement_date'],
-                cleaned_data['fda_publish_date'],
-                cleaned_data['company_name'],
-                cleaned_data['brand_name'],
-                cleaned_data['recall_reason'],
-                cleaned_data['recall_reason_detail'],
-                cleaned_data['product_type'],
-                cleaned_data['content']
-            )
-            
-            cursor.execute(insert_sql, data)
-            converted_count += 1
-            
+            cleaned = clean_record_for_sqlite(record)
+            if not cleaned["url"]:
+                raise ValueError("url 없음")
+            rows.append(tuple(cleaned[column] for column in RECALLS_COLUMNS) + (record_content_hash(cleaned),))
         except Exception as e:
+            stats["failed"] += 1
             print(f"  ⚠️ 레코드 {i} SQLite 저장 오류: {e}")
             print(f"     URL: {record.get('url', 'N/A')}")
-            continue
+    if not rows:
+        return stats
+
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        for pragma in BULK_PRAGMAS:
+            conn.execute(pragma)
+
+        db_key = os.path.abspath(db_path)
+        if db_key not in _prepared_db_paths:
+            create_recalls_table(conn.cursor())
+            conn.commit()
+            _prepared_db_paths.add(db_key)
+
+        columns = RECALLS_COLUMNS + ["content_hash"]
+        column_sql = ", ".join(columns)
+        update_sql = ", ".join(f"{column} = excluded.{column}" for column in columns)
+
+        with conn:
+            conn.execute(f"CREATE TEMP TABLE IF NOT EXISTS staging_recalls AS SELECT {column_sql} FROM recalls WHERE 0")
+            conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS temp.idx_staging_url ON staging_recalls(url)")
+            conn.execute("DELETE FROM staging_recalls")
+            # 같은 배치에 같은 URL이 여러 번 있으면 마지막 값 사용
+            conn.executemany(f"INSERT OR REPLACE INTO staging_recalls ({column_sql}) "
+                             f"VALUES ({', '.join('?' * len(columns))})", rows)
+
+            staged, inserted, updated = conn.execute("""
+                SELECT COUNT(*),
+                       SUM(r.url IS NULL),
+                       SUM(r.url IS NOT NULL AND r.content_hash IS NOT s.content_hash)
+                FROM staging_recalls s LEFT JOIN recalls r ON r.url = s.url
+            """).fetchone()
+
+            # Chroma 반영 작업은 recalls 변경과 함께 커밋 (Chroma 단계가 실패해도 다음 drain 에서 처리)
+            if enqueue_chroma:
+                stats["enqueued"] = enqueue_select(conn, """
+                    SELECT s.url AS url, s.content_hash AS content_hash
+                    FROM staging_recalls s LEFT JOIN recalls r ON r.url = s.url
+                    WHERE r.content_hash IS NOT s.content_hash
+                """)
+
+            # WHERE true: INSERT ... SELECT 뒤의 ON CONFLICT 구문 모호성 회피 (SQLite 문법)
+            conn.execute(f"""
+                INSERT INTO recalls ({column_sql})
+                SELECT {column_sql} FROM staging_recalls WHERE true
+                ON CONFLICT(url) DO UPDATE SET {update_sql}
+                WHERE recalls.content_hash IS NOT excluded.content_hash
+            """)
+            conn.execute("DELETE FROM staging_recalls")
+
+        stats["inserted"] = inserted or 0
+        stats["updated"] = updated or 0
+        stats["unchanged"] = staged - stats["inserted"] - stats["updated"]
+    finally:
+        conn.close()
+    return stats
+
+
+def save_to_sqlite(data_list: List[Dict], db_path: str = "./data/fda_recalls.db", enqueue_chroma: bool = True):
+    """
+    데이터 리스트를 SQLite DB에 직접 저장 (bulk_upsert_recalls 사용)
+    반환: 저장 처리된 레코드 수 (신규 + 변경 + 변경 없음)
+    """
     
-    conn.commit()
-    conn.close()
+    print(f"🔄 SQLite 저장 시작: {len(data_list)}개 레코드")
+    stats = bulk_upsert_recalls(data_list, db_path=db_path, enqueue_chroma=enqueue_chroma)
+    converted_count = stats["inserted"] + stats["updated"] + stats["unchanged"]
     
-    print(f"✅ SQLite 저장 완료: {converted_count}/{len(data_list)}개 레코드")
+    print(f"✅ SQLite 저장 완료: {converted_count}/{len(data_list)}개 레코드 "
+          f"(신규 {stats['inserted']}, 변경 {stats['updated']}, 변경 없음 {stats['unchanged']})")
     return converted_count
 
 def clean_record_for_sqlite(record: Dict[str, Any]) -> Dict[str, Any]:
@@ -128,28 +213,68 @@ def clean_record_for_sqlite(record: Dict[str, Any]) -> Dict[str, Any]:
     
     return cleaned
 
+def collection_name_for_model(collection_name: str, model: str) -> str:
+    """임베딩 모델별 컬렉션 이름 (운영 모델 EMBEDDING_MODEL 은 원래 이름 그대로)"""
+    if model == EMBEDDING_MODEL:
+        return collection_name
+    return f"{collection_name}__{model}"
+
 def save_to_chromadb(data_list: List[Dict], 
                     collection_name: str = "FDA_recalls",
-                    db_path: str = "./data/chroma_db_recall"):
+                    db_path: str = "./data/chroma_db_recall",
+                    embedding_cache: EmbeddingCache = None,
+                    pipeline: EmbeddingPipeline = None,
+                    near_dup: bool = NEAR_DUP_ENABLED,
+                    near_dup_db_path: str = NEAR_DUP_DB_PATH,
+                    near_dup_index: NearDuplicateIndex = None,
+                    boilerplate: bool = BOILERPLATE_ENABLED,
+                    boilerplate_db_path: str = BOILERPLATE_DB_PATH,
+                    strict: bool = False,
+                    chunk_counts: Dict[str, int] = None):
     """
     데이터 리스트를 ChromaDB에 직접 저장
     paste-2.txt 로직 기반, JSON 파일 없이 data_list 직접 처리
+    임베딩은 embedding_cache 에 없는 청크만 pipeline(동시 요청 + TPM/RPM 예산)으로 계산
+    near_dup=True 면 근접 중복 공지는 대표 1건만 색인 (클러스터는 SQLite recall_clusters)
+    near_dup_index 를 넘기면 그 인덱스 사용 (여러 번 호출하는 drain/적재에서 서명 전체를 매번 다시 읽지 않도록)
+    boilerplate=True 면 코퍼스에 자주 나오는 상투 문단은 청크에서 제외 (원문은 SQLite에 그대로)
+    pipeline 모델이 운영 모델과 다르면 collection_name 뒤에 모델명을 붙인 별도 컬렉션에 저장
+    strict=True 면 문서/임베딩/upsert 오류를 건너뛰지 않고 예외로 올림 (outbox 워커가 재시도 판단)
+    chunk_counts 를 넘기면 저장이 끝난 뒤 URL별 저장한 청크 수를 기록 (청크가 없는 URL은 0)
     """
     
     print(f"🔍 ChromaDB 저장 시작: {len(data_list)}개 문서")
+    total_items = len(data_list)
+    
+    # 0. 근접 중복 공지 클러스터링 → 대표만 색인, 중복으로 바뀐 URL의 기존 청크는 아래에서 삭제
+    duplicate_urls = []
+    if near_dup:
+        index = near_dup_index or NearDuplicateIndex(near_dup_db_path)
+        try:
+            data_list, duplicates = index.assign(data_list)
+        finally:
+            if near_dup_index is None:
+                index.close()
+        duplicate_urls = [duplicate["url"] for duplicate in duplicates]
     
     # ChromaDB 클라이언트 초기화
     chroma_client = chromadb.PersistentClient(path=db_path)
     
-    # OpenAI 임베딩 함수 설정
-    openai_api_key = os.getenv('OPENAI_API_KEY')
-    if not openai_api_key:
-        raise ValueError("OPENAI_API_KEY 환경변수가 설정되지 않았습니다")
-    
-    basic_ef = embedding_functions.OpenAIEmbeddingFunction(
-        api_key=openai_api_key,
-        model_name="text-embedding-3-small"
-    )
+    # 저장용 벡터는 pipeline 이 계산, 컬렉션 임베딩 함수는 검색 쿼리용
+    pipeline = pipeline or EmbeddingPipeline()
+    basic_ef = None
+    if pipeline.model == EMBEDDING_MODEL:
+        # OpenAI 임베딩 함수 설정
+        openai_api_key = os.getenv('OPENAI_API_KEY')
+        if not openai_api_key:
+            raise ValueError("OPENAI_API_KEY 환경변수가 설정되지 않았습니다")
+        
+        basic_ef = embedding_functions.OpenAIEmbeddingFunction(
+            api_key=openai_api_key,
+            model_name=EMBEDDING_MODEL
+        )
+    # 운영 모델이 아니면(EMBEDDING_BACKEND=local 등) 모델별 컬렉션에 저장 → 차원이 다른 벡터가 운영 색인에 섞이지 않음
+    collection_name = collection_name_for_model(collection_name, pipeline.model)
     
     # 컬렉션 가져오기 또는 생성
     try:
@@ -166,162 +291,163 @@ def save_to_chromadb(data_list: List[Dict],
         )
         print(f"🆕 새 컬렉션 '{collection_name}' 생성됨")
     
-    # 배치 처리 설정
-    BATCH_SIZE = 30
-    total_chunks = 0
+    # 상투 문단 빈도 학습 (이번 배치 포함) → 청킹 때 제외
+    boilerplate_filter = None
+    if boilerplate:
+        boilerplate_filter = BoilerplateFilter(boilerplate_db_path)
+        boilerplate_filter.learn(data_list)
+    
+    # 1. 문서 → 청크 (같은 URL이 여러 번 있으면 마지막 값 사용)
+    chunk_records = {}
+    chunk_ids_by_url = {}
     processed_items = 0
     
-    for batch_start in range(0, len(data_list), BATCH_SIZE):
-        batch_end = min(batch_start + BATCH_SIZE, len(data_list))
-        batch_data = data_list[batch_start:batch_end]
-        
-        ids = []
-        documents = []
-        metadatas = []
-        
-        for i, item in enumerate(batch_data, batch_start):
-            try:
-                # URL을 고유 ID로 사용
-                base_url = item.get("url", f"recall_{i}")
-                
-                # content 필드에서 텍스트 추출
-                content_text = item.get("content", "")
-                
-                # 유효성 체크
-                if not content_text or len(content_text.strip()) < 20:
-                    print(f"❗ {i}번 문서 스킵됨 (내용 없음): {base_url}")
+    for i, item in enumerate(data_list):
+        try:
+            # URL을 고유 ID로 사용
+            base_url = item.get("url", f"recall_{i}")
+            
+            # content 필드에서 텍스트 추출
+            content_text = item.get("content", "")
+            
+            # 유효성 체크
+            if not content_text or len(content_text.strip()) < MIN_CONTENT_CHARS:
+                print(f"❗ {i}번 문서 스킵됨 (내용 없음): {base_url}")
+                if chunk_counts is not None:
+                    chunk_counts[base_url] = 0
+                continue
+            
+            # SQLite recalls.content_hash 와 같은 값 (reconcile 에서 내용 변경 감지)
+            content_hash = item.get("content_hash") or record_content_hash(clean_record_for_sqlite(item))
+            
+            # 토큰 기준 청킹 (문단 → 문장 → 단어 순으로 분할, 원문 위치 포함, 상투 문단 제외)
+            exclude = boilerplate_filter.boilerplate_spans(content_text) if boilerplate_filter else []
+            chunks = chunk_text(content_text, exclude=exclude)
+            
+            for old_id in chunk_ids_by_url.pop(base_url, []):
+                chunk_records.pop(old_id, None)
+            chunk_ids_by_url[base_url] = []
+            
+            # 각 청크마다 별도 문서로 저장
+            for chunk_idx, chunk in enumerate(chunks):
+                if len(chunk.text.strip()) < MIN_CHUNK_CHARS:  # 너무 짧은 청크 제외
                     continue
                 
-                # 문단 기준 청킹 적용
-                chunks = chunk_content_by_paragraphs(content_text, max_chunk_size=1500, overlap=150)
+                # 청크별 고유 ID 생성
+                chunk_id = f"{base_url}_chunk_{chunk_idx}" if len(chunks) > 1 else base_url
                 
-                # 각 청크마다 별도 문서로 저장
-                for chunk_idx, chunk_content in enumerate(chunks):
-                    if len(chunk_content.strip()) < 30:  # 너무 짧은 청크 제외
-                        continue
-                    
-                    # 청크별 고유 ID 생성
-                    chunk_id = f"{base_url}_chunk_{chunk_idx}" if len(chunks) > 1 else base_url
+                # 메타데이터 구성
+                raw_metadata = {
+                    "document_type": item.get("document_type", "recall"),
+                    "url": item.get("url", ""),
+                    "company_announcement_date": item.get("company_announcement_date", ""),
+                    "fda_publish_date": item.get("fda_publish_date", ""),
+                    "company_name": item.get("company_name", ""),
+                    "brand_name": item.get("brand_name", ""),
+                    "recall_reason": item.get("recall_reason", ""),
+                    "recall_reason_detail": item.get("recall_reason_detail", ""),
+                    "product_type": item.get("product_type", ""),
                     
-                    # 기존 문서 확인 (중복 방지)
-                    try:
-                        existing = collection.get(ids=[chunk_id])
-                        if existing['ids']:
-                            print(f"🔄 기존 문서 업데이트: {chunk_id}")
-                            # 기존 문서 삭제 후 새로 추가
-                            collection.delete(ids=[chunk_id])
-                    except:
-                        pass  # 새 문서
-                    
-                    # 메타데이터 구성
-                    raw_metadata = {
-                        "document_type": item.get("document_type", "recall"),
-                        "url": item.get("url", ""),
-                        "company_announcement_date": item.get("company_announcement_date", ""),
-                        "fda_publish_date": item.get("fda_publish_date", ""),
-                        "company_name": item.get("company_name", ""),
-                        "brand_name": item.get("brand_name", ""),
-                        "recall_reason": item.get("recall_reason", ""),
-                        "recall_reason_detail": item.get("recall_reason_detail", ""),
-                        "product_type": item.get("product_type", ""),
-                        
-                        # 청킹 관련 메타데이터
-                        "chunk_index": chunk_idx,
-                        "total_chunks": len(chunks),
-                        "is_chunked": len(chunks) > 1
-                    }
-                    
-                    # None 값 필터링
-                    metadata = filter_none_values(raw_metadata)
-                    
-                    ids.append(chunk_id)
-                    documents.append(chunk_content)
-                    metadatas.append(metadata)
-                
-                processed_items += 1
+                    # 청킹 관련 메타데이터
+                    "chunk_index": chunk_idx,
+                    "total_chunks": len(chunks),
+                    "is_chunked": len(chunks) > 1,
+                    # content 안에서의 위치 (검색 결과 하이라이트용)
+                    "chunk_start": chunk.start,
+                    "chunk_end": chunk.end,
+                    "chunk_tokens": chunk.tokens,
+                    "content_hash": content_hash
+                }
                 
-            except Exception as e:
-                print(f"항목 {i} ChromaDB 처리 중 오류: {e}")
-                continue
-        
-        # 컬렉션에 추가
-        if ids:
-            try:
-                collection.add(ids=ids, documents=documents, metadatas=metadatas)
-                total_chunks += len(ids)
-                print(f"배치 {batch_start // BATCH_SIZE + 1}: {len(ids)}개 청크 추가")
-                time.sleep(1)  # API 부하 방지
-            except Exception as e:
-                print(f"배치 {batch_start // BATCH_SIZE + 1} ChromaDB 저장 오류: {e}")
-                continue
-    
-    print(f"✅ ChromaDB 저장 완료:")
-    print(f"   - 처리된 문서: {processed_items}/{len(data_list)}개")
-    print(f"   - 생성된 청크: {total_chunks}개")
-    
-    return total_chunks
-
-def chunk_content_by_paragraphs(content_text, max_chunk_size=1500, overlap=200):
-    """
-    문단(\n\n) 기준으로 콘텐츠를 청킹하는 함수 
-    paste-2.txt에서 가져옴
-    """
-    if not content_text or len(content_text.strip()) < 50:
-        return [content_text]
+                # None 값 필터링
+                chunk_records[chunk_id] = (chunk.text, filter_none_values(raw_metadata))
+                chunk_ids_by_url[base_url].append(chunk_id)
+            
+            processed_items += 1
+            
+        except Exception as e:
+            if strict:
+                raise
+            print(f"항목 {i} ChromaDB 처리 중 오류: {e}")
+            continue
     
-    # 문단 분리 (\n\n 기준)
-    paragraphs = re.split(r'\n\s*\n', content_text.strip())
+    if boilerplate_filter:
+        boilerplate_filter.print_stats()
+        boilerplate_filter.close()
     
-    # 빈 문단 제거
-    paragraphs = [p.strip() for p in paragraphs if p.strip()]
+    # 2. 재청킹으로 사라진 청크 ID + 중복 공지로 바뀐 URL의 청크 삭제 (URL 묶음별 조회 1회)
+    for url in duplicate_urls:
+        chunk_ids_by_url.setdefault(url, [])
+    stale_ids = delete_stale_chunks(collection, chunk_ids_by_url)
     
-    if len(paragraphs) <= 1:
-        # 문단이 하나뿐이면 문장 기준으로 분리
-        sentences = re.split(r'(?<=[.!?])\s+', content_text)
-        paragraphs = sentences
+    # 3. 임베딩 단계: 캐시에 없는 청크 전체를 한 번에 pipeline 으로 (동시 요청, 분당 예산 안에서)
+    cache = embedding_cache or EmbeddingCache()
+    ids = list(chunk_records)
+    documents = [chunk_records[chunk_id][0] for chunk_id in ids]
+    try:
+        embeddings = cache.embed(pipeline.model, documents, pipeline.embed_sync)
+    except Exception as e:
+        print(f"❌ 임베딩 단계 오류: {e}")
+        pipeline.print_stats()
+        if strict:
+            raise
+        return 0
     
-    chunks = []
-    current_chunk = ""
+    # 4. 미리 계산한 벡터를 큰 배치 단위로 upsert (API 호출 없음)
+    total_chunks = 0
+    for batch_start in range(0, len(ids), CHROMA_BATCH_SIZE):
+        batch_end = batch_start + CHROMA_BATCH_SIZE
+        batch_ids = ids[batch_start:batch_end]
+        batch_no = batch_start // CHROMA_BATCH_SIZE + 1
+        try:
+            collection.upsert(
+                ids=batch_ids,
+                embeddings=embeddings[batch_start:batch_end],
+                documents=documents[batch_start:batch_end],
+                metadatas=[chunk_records[chunk_id][1] for chunk_id in batch_ids],
+            )
+            total_chunks += len(batch_ids)
+            print(f"배치 {batch_no}: {len(batch_ids)}개 청크 upsert")
+        except Exception as e:
+            print(f"배치 {batch_no} ChromaDB 저장 오류: {e}")
+            if strict:
+                raise
+            continue
     
-    for paragraph in paragraphs:
-        # 현재 청크에 문단을 추가했을 때 크기 확인
-        potential_chunk = current_chunk + "\n\n" + paragraph if current_chunk else paragraph
-        
-        if len(potential_chunk) <= max_chunk_size:
-            current_chunk = potential_chunk
-        else:
-            # 현재 청크가 있으면 저장
-            if current_chunk:
-                chunks.append(current_chunk.strip())
-            
-            # 새 청크 시작 (오버랩 고려)
-            if overlap > 0 and current_chunk:
-                overlap_text = current_chunk[-overlap:].strip()
-                current_chunk = overlap_text + "\n\n" + paragraph
-            else:
-                current_chunk = paragraph
-            
-            # 단일 문단이 너무 큰 경우 강제 분할
-            if len(current_chunk) > max_chunk_size:
-                # 문장 단위로 재분할
-                long_sentences = re.split(r'(?<=[.!?])\s+', current_chunk)
-                temp_chunk = ""
-                
-                for sentence in long_sentences:
-                    if len(temp_chunk + sentence) <= max_chunk_size:
-                        temp_chunk += " " + sentence if temp_chunk else sentence
-                    else:
-                        if temp_chunk:
-                            chunks.append(temp_chunk.strip())
-                        temp_chunk = sentence
-                
-                current_chunk = temp_chunk
+    print(f"✅ ChromaDB 저장 완료:")
+    print(f"   - 처리된 문서: {processed_items}/{total_items}개 (근접 중복 제외 {len(duplicate_urls)}개)")
+    print(f"   - 저장된 청크: {total_chunks}개 (삭제된 이전 청크 {stale_ids}개)")
+    cache.print_stats()
+    pipeline.print_stats()
     
-    # 마지막 청크 추가
-    if current_chunk.strip():
-        chunks.append(current_chunk.strip())
+    if chunk_counts is not None:
+        chunk_counts.update({url: len(chunk_ids) for url, chunk_ids in chunk_ids_by_url.items()})
+    return total_chunks
+
+def delete_stale_chunks(collection, chunk_ids_by_url: Dict[str, List[str]]) -> int:
+    """URL별 기존 청크 중 이번 청킹 결과에 없는 ID 삭제 → 삭제 수"""
+    urls = list(chunk_ids_by_url)
+    stale = []
+    for start in range(0, len(urls), CHROMA_LOOKUP_BATCH_SIZE):
+        batch_urls = urls[start:start + CHROMA_LOOKUP_BATCH_SIZE]
+        try:
+            existing = collection.get(where={"url": {"$in": batch_urls}}, include=["metadatas"])
+        except Exception as e:
+            print(f"⚠️ 기존 청크 조회 오류: {e}")
+            continue
+        for chunk_id, metadata in zip(existing["ids"], existing["metadatas"]):
+            url = (metadata or {}).get("url")
+            if url in chunk_ids_by_url and chunk_id not in chunk_ids_by_url[url]:
+                stale.append(chunk_id)
     
-    return chunks if chunks else [content_text]
+    if stale:
+        try:
+            collection.delete(ids=stale)
+            print(f"🧹 재청킹으로 사라진 청크 {len(stale)}개 삭제")
+        except Exception as e:
+            print(f"⚠️ 이전 청크 삭제 오류: {e}")
+            return 0
+    return len(stale)
 
 def filter_none_values(metadata_dict):
     """None 값과 빈 문자열을 필터링하는 함수"""
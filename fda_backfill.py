@@ -0,0 +1,188 @@
+# ./fda_backfill.py
+"""
+FDA 리콜 전체 아카이브 백필 (샤드 단위 분산 크롤링)
+- plan : 목록 전체 행 수를 JSON 엔드포인트로 확인하고 offset 구간별 샤드로 나눔
+- work : 샤드 1개를 독립 프로세스로 처리 (다른 서버에서 실행 가능)
+         목록 구간 → Food & Beverages 필터 → 샤드 전용 SQLite(frontier + recalls)에 저장
+         중간에 죽어도 같은 명령으로 다시 실행하면 남은 작업부터 이어서 진행
+- merge: 샤드 SQLite 파일들을 URL 기준 중복 제거하며 fda_recalls.db 로 합침
+
+샤드끼리 공유하는 것은 plan 파일뿐이라 워커 수만큼 처리량이 늘어남
+
+사용 예:
+    python fda_backfill.py plan --shards 8
+    python fda_backfill.py work --shard 0          # 서버/프로세스마다 다른 샤드 번호
+    python fda_backfill.py merge                    # ./data/backfill/shard-*.db 전부 병합
+"""
+import os
+import glob
+import json
+import asyncio
+import sqlite3
+import argparse
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from chroma_sync import drain_outbox
+from db_utils import RECALLS_COLUMNS, create_recalls_table, save_to_sqlite
+from fda_realtime_crawler import drain_frontier
+from utils.chroma_outbox import enqueue_select
+from utils.crawl_engine import DEFAULT_POOL_SIZE
+from utils.crawl_frontier import CrawlFrontier
+from utils.crawl_state import CrawlState
+from utils.listing_client import LISTING_PAGE_LENGTH, ListingClient
+from utils.recall_parser import is_food_beverage
+
+BACKFILL_DIR = "./data/backfill"
+MAIN_DB_PATH = "./data/fda_recalls.db"
+
+
+def plan_path(out_dir: str = BACKFILL_DIR) -> str:
+    return os.path.join(out_dir, "plan.json")
+
+
+def shard_db_path(shard: int, out_dir: str = BACKFILL_DIR) -> str:
+    return os.path.join(out_dir, f"shard-{shard:03d}.db")
+
+
+def make_plan(shards: int, total_rows: Optional[int] = None, out_dir: str = BACKFILL_DIR) -> Dict[str, Any]:
+    """목록 offset [0, total) 을 shards 개의 연속 구간으로 분할해 plan.json 저장"""
+    if total_rows is None:
+        client = ListingClient()
+        try:
+            total_rows = client.fetch(0, 1)["total"]
+        finally:
+            client.close()
+        if total_rows is None:
+            raise RuntimeError("목록 전체 행 수를 알 수 없습니다 (--total 로 지정)")
+
+    size = -(-total_rows // shards)  # 올림 나눗셈
+    plan = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "total_rows": total_rows,
+        "shards": [{"shard": i, "start": i * size, "end": min(total_rows, (i + 1) * size)}
+                   for i in range(shards) if i * size < total_rows],
+    }
+    os.makedirs(out_dir, exist_ok=True)
+    with open(plan_path(out_dir), "w", encoding="utf-8") as f:
+        json.dump(plan, f, ensure_ascii=False, indent=2)
+
+    print(f"🗺️ 백필 계획: 전체 {total_rows}행 → 샤드 {len(plan['shards'])}개 (샤드당 약 {size}행)")
+    return plan
+
+
+def list_shard_rows(start: int, end: int, page_length: int = LISTING_PAGE_LENGTH) -> List[Dict[str, Any]]:
+    """목록 offset 구간 [start, end) 의 Food & Beverages 행"""
+    client = ListingClient()
+    rows = []
+    try:
+        for page_rows in client.iter_pages(start=start, length=min(page_length, end - start),
+                                           max_rows=end - start):
+            rows.extend(row for row in page_rows if row["date"] and is_food_beverage(row["product_type"]))
+    finally:
+        client.close()
+    return rows
+
+
+async def run_shard(shard: int, out_dir: str = BACKFILL_DIR, pool_size: int = DEFAULT_POOL_SIZE) -> int:
+    """샤드 1개 처리: 목록 구간 등록(최초 1회) → 상세 크롤링 → 샤드 DB 저장"""
+    with open(plan_path(out_dir), "r", encoding="utf-8") as f:
+        plan = json.load(f)
+    spec = next((s for s in plan["shards"] if s["shard"] == shard), None)
+    if spec is None:
+        raise ValueError(f"plan 에 없는 샤드 번호: {shard}")
+
+    db_path = shard_db_path(shard, out_dir)
+    source = f"backfill:{shard}"
+    state = CrawlState(db_path)
+    frontier = CrawlFrontier(db_path=db_path, queue=source)
+
+    # 목록 구간은 한 번만 등록 (재실행 시에는 frontier 에 남은 작업만 이어서 처리)
+    if not state.get_extra(source).get("listed"):
+        rows = list_shard_rows(spec["start"], spec["end"])
+        added = frontier.enqueue(rows)
+        state.set_extra(source, {"listed": True, "rows": len(rows), "start": spec["start"], "end": spec["end"]})
+        print(f"📥 샤드 {shard}: offset {spec['start']}~{spec['end']} → Food & Beverages {len(rows)}개 등록 ({added}개 신규)")
+    print(f"🛠️ 샤드 {shard} 워커 시작: {frontier.stats()}")
+
+    drained = await drain_frontier(frontier, lambda results: save_to_sqlite(results, db_path=db_path, enqueue_chroma=False),
+                                 pool_size=pool_size)
+    dead = frontier.dead_items()
+    print(f"🎉 샤드 {shard} 완료: {drained['saved']}개 저장, 포기 {len(dead)}개 → {db_path}")
+    frontier.close()
+    state.close()
+    return drained["saved"]
+
+
+def merge_shards(shard_paths: List[str], db_path: str = MAIN_DB_PATH, with_chroma: bool = False) -> Dict[str, int]:
+    """샤드 DB의 recalls 를 URL 기준으로 중복 제거하며 본 DB에 병합 (이미 있는 URL은 유지)"""
+    stats = {"shards": 0, "rows": 0, "inserted": 0}
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    create_recalls_table(conn.cursor())
+    conn.commit()
+
+    columns = ", ".join(RECALLS_COLUMNS + ["content_hash"])
+    try:
+        for path in shard_paths:
+            conn.execute("ATTACH DATABASE ? AS shard", (path,))
+            try:
+                has_table = conn.execute(
+                    "SELECT 1 FROM shard.sqlite_master WHERE type = 'table' AND name = 'recalls'"
+                ).fetchone()
+                if not has_table:
+                    continue
+
+                stats["rows"] += conn.execute("SELECT COUNT(*) FROM shard.recalls").fetchone()[0]
+                with conn:
+                    # 새 URL의 Chroma 반영 작업은 병합과 같은 트랜잭션에서 outbox 에 기록
+                    if with_chroma:
+                        enqueue_select(conn, """
+                            SELECT s.url AS url, s.content_hash AS content_hash FROM shard.recalls s
+                            WHERE NOT EXISTS (SELECT 1 FROM main.recalls m WHERE m.url = s.url)
+                        """)
+                    before = conn.total_changes
+                    conn.execute(f"INSERT OR IGNORE INTO main.recalls ({columns}) SELECT {columns} FROM shard.recalls")
+                    inserted = conn.total_changes - before
+                stats["inserted"] += inserted
+                stats["shards"] += 1
+                print(f"🔗 병합: {os.path.basename(path)} → 새 레코드 {inserted}개")
+            finally:
+                conn.execute("DETACH DATABASE shard")
+    finally:
+        conn.close()
+
+    if with_chroma:
+        drain_outbox(db_path)
+
+    print(f"🎉 병합 완료: 샤드 {stats['shards']}개, 샤드 레코드 {stats['rows']}개 → 새로 추가 {stats['inserted']}개")
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FDA 리콜 아카이브 샤드 백필")
+    parser.add_argument("--dir", default=BACKFILL_DIR, help="plan / 샤드 DB 폴더")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_plan = sub.add_parser("plan", help="목록 offset 을 샤드로 분할")
+    p_plan.add_argument("--shards", type=int, required=True)
+    p_plan.add_argument("--total", type=int, default=None, help="전체 행 수 (생략하면 엔드포인트에서 조회)")
+
+    p_work = sub.add_parser("work", help="샤드 1개 크롤링")
+    p_work.add_argument("--shard", type=int, required=True)
+    p_work.add_argument("--pool-size", type=int, default=DEFAULT_POOL_SIZE)
+
+    p_merge = sub.add_parser("merge", help="샤드 DB를 fda_recalls.db 로 병합")
+    p_merge.add_argument("shard_dbs", nargs="*", help="생략하면 --dir 안의 shard-*.db 전부")
+    p_merge.add_argument("--db-path", default=MAIN_DB_PATH)
+    p_merge.add_argument("--with-chroma", action="store_true", help="새로 추가된 레코드를 ChromaDB에도 저장")
+
+    args = parser.parse_args()
+    if args.command == "plan":
+        make_plan(args.shards, args.total, args.dir)
+    elif args.command == "work":
+        asyncio.run(run_shard(args.shard, args.dir, args.pool_size))
+    else:
+        paths = args.shard_dbs or sorted(glob.glob(os.path.join(args.dir, "shard-*.db")))
+        merge_shards(paths, args.db_path, args.with_chroma)
@@ -1,255 +1,243 @@
 # ./fda_realtime_crawler.py
 import re
 import asyncio
+import hashlib
+import argparse
 import json
-import sqlite3
 import os
-from datetime import datetime,timedelta
-from playwright.async_api import async_playwright
-from urllib.parse import urljoin
-from db_utils import save_to_sqlite, save_to_chromadb
-
-def get_latest_date_from_db():
-    """SQLite DB에서 가장 최신 날짜 조회"""
-    db_paths_to_try = [
-        "./data/fda_recalls.db",
-        "/data/fda_recalls.db", 
-        "data/fda_recalls.db",
-        os.path.join(os.getcwd(), "data", "fda_recalls.db")
-    ]
-    
-    for db_path in db_paths_to_try:
-        print(f"🔍 시도 중: {db_path}")
-        
-        if not os.path.exists(db_path):
-            print(f"❌ 파일 없음: {db_path}")
-            continue
-            
-        file_size = os.path.getsize(db_path)
-        print(f"📏 파일 크기: {file_size} bytes")
-        
+import time
+from datetime import datetime
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from chroma_sync import drain_outbox
+from db_utils import bulk_upsert_recalls
+from utils.batch_parser import cache_tasks, parse_batch
+from utils.crawl_engine import CrawlEngine, DEFAULT_POOL_SIZE, BROWSER_STATE_PATH
+from utils.crawl_frontier import CrawlFrontier
+from utils.crawl_state import CrawlState, LISTING_SOURCE, WATERMARK_OVERLAP_DAYS, incremental_cutoff
+from utils.crawl_telemetry import CrawlTelemetry
+from utils.html_cache import HtmlCache
+from utils.http_fetcher import HttpFetcher, HTTP_FIRST, is_blocked_response
+from utils.listing_client import ListingClient, ListingEndpointError, LISTING_JSON_FIRST
+from utils.rate_limiter import get_rate_limiter
+from utils.recall_parser import LISTING_BASE_URL, extract_listing_rows, extract_recall_detail, is_food_beverage, parse_recall_detail
+
+# frontier 배치 크기 / 이 시간(초) 안에 재시도 가능한 작업이 있으면 기다렸다가 처리
+FRONTIER_BATCH_SIZE = int(os.getenv("FRONTIER_BATCH_SIZE", "40"))
+RETRY_WAIT_LIMIT = int(os.getenv("FRONTIER_RETRY_WAIT", "120"))
+
+# 목록 표가 나타나면 바로 진행 (고정 대기 대신)
+LISTING_TABLE_SELECTOR = "table tbody tr td a"
+LISTING_READY_TIMEOUT_MS = int(os.getenv("LISTING_READY_TIMEOUT_MS", "30000"))
+
+# 목록 수집 안전장치 (DOM 페이지 수 / JSON 행 수)
+LISTING_MAX_PAGES = 10
+LISTING_JSON_MAX_ROWS = int(os.getenv("LISTING_JSON_MAX_ROWS", "1000"))
+
+# 1보다 크면 목록 페이지 URL을 미리 계산해 K개씩 동시에 수집 ("Next" 버튼 대신)
+LISTING_CONCURRENCY = int(os.getenv("LISTING_CONCURRENCY", "1"))
+LISTING_PAGE_URL_TEMPLATE = os.getenv("LISTING_PAGE_URL_TEMPLATE", "{base}?page={page}")
+
+# 폴링 모드: 목록 첫 페이지 상위 행 지문이 그대로면 크롤링 없이 다음 폴링까지 대기
+POLL_INTERVAL_SECONDS = int(os.getenv("POLL_INTERVAL_SECONDS", "300"))
+POLL_FINGERPRINT_ROWS = int(os.getenv("POLL_FINGERPRINT_ROWS", "20"))
+
+async def wait_for_listing_table(page, url=LISTING_BASE_URL, timeout=LISTING_READY_TIMEOUT_MS):
+    """목록 페이지로 이동 후 표가 나타나는 즉시 반환 → 준비 여부"""
+    limiter = get_rate_limiter()
+    async with limiter.aslot(url):
+        response = await page.goto(url, wait_until="domcontentloaded")
+    limiter.record(url, response.status if response else None)
+    try:
+        await page.wait_for_selector(LISTING_TABLE_SELECTOR, timeout=timeout)
+        return True
+    except PlaywrightTimeoutError:
+        status = response.status if response else 0
+        if is_blocked_response(status, await page.content()):
+            print(f"🛡️ 차단/챌린지 응답 감지 (status={status})")
+        else:
+            print(f"⚠️ {timeout / 1000:.0f}초 안에 목록 표가 나타나지 않음 (status={status})")
+        return False
+
+
+async def open_listing_page(page, telemetry):
+    """
+    저장된 세션(쿠키/로컬스토리지)이 있으면 목록 페이지로 바로 이동
+    세션이 없거나 차단되면 메인 → Safety → 목록 순서의 전체 warm-up
+    """
+    with telemetry.stage("warmup"):
+        if os.path.exists(BROWSER_STATE_PATH):
+            print("♻️ 저장된 브라우저 세션으로 목록 페이지 바로 접근...")
+            if await wait_for_listing_table(page):
+                telemetry.note("session_reused", True)
+                return True
+            print("🔁 저장된 세션 차단/만료 → 전체 warm-up으로 재시도")
+            await page.context.clear_cookies()
+
+        telemetry.note("session_reused", False)
+        print("🏠 FDA 메인 페이지부터 접근...")
+        await page.goto("https://www.fda.gov/", wait_until="domcontentloaded")
+
+        print("📂 Safety 섹션으로 이동...")
+        await page.goto("https://www.fda.gov/safety/", wait_until="domcontentloaded")
+
+        print("🎯 최종 목적지...")
+        return await wait_for_listing_table(page)
+
+
+def select_new_listing_rows(rows, latest_db_date):
+    """
+    목록 행 중 수집 대상 선별 (Food & Beverages, 기준점 - 겹침 기간 이후)
+    반환: (선택된 행, 중단 날짜 도달 여부)
+    """
+    cutoff_date = incremental_cutoff(latest_db_date)
+    selected = []
+    for i, row in enumerate(rows):
         try:
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            
-            # 테이블 확인
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-            tables = cursor.fetchall()
-            print(f"📊 테이블: {tables}")
-            
-            if ('recalls',) in tables:
-                cursor.execute("SELECT fda_publish_date FROM recalls ORDER BY fda_publish_date DESC LIMIT 1")
-                result = cursor.fetchone()
-                conn.close()
-                
-                if result and result[0]:
-                    print(f"✅ 최신 날짜 조회 성공: {result[0]}")
-                    return result[0]
-            
-            conn.close()
-            
+            date_only = row["date"]
+            if not date_only:
+                continue  # 날짜 형식을 파싱할 수 없으면 스킵
+
+            print(f"  📅 #{i}: 날짜 '{date_only}'")
+
+            if cutoff_date:
+                try:
+                    datetime.strptime(date_only, "%Y-%m-%d")
+                    # 기준점에서 WATERMARK_OVERLAP_DAYS 만큼 겹쳐서 확인 (0이면 기준점 날짜에서 중단)
+                    if date_only <= cutoff_date:
+                        print(f"📊 종료 조건 도달: {date_only} (기준점 {latest_db_date} - "
+                              f"{WATERMARK_OVERLAP_DAYS}일 = {cutoff_date}) - 중단")
+                        return selected, True
+                except ValueError as e:
+                    print(f"  ⚠️ 날짜 비교 오류: {e}")
+
+            # 🎯 Food & Beverages 정확한 조건 확인
+            # 콤마로 분리해서 첫 번째가 "Food & Beverages"인지 확인
+            if is_food_beverage(row["product_type"]):
+                selected.append(row)
+                print(f"  ✅ 수집: {date_only} - {row['name']}")
+            else:
+                print(f"  ⏭️ 스킵: Food & Beverages 아님 ('{row['product_type'][:50]}')")
+
         except Exception as e:
-            print(f"💥 DB 연결 오류 ({db_path}): {e}")
+            print(f"  ⚠️ 항목 {i} 처리 오류: {e}")
             continue
-    
-    print("❌ 모든 경로에서 DB 접근 실패")
-    return None
-
-
-async def crawl_incremental_links():
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(
-        headless=True,
-        args=[
-            '--no-sandbox', 
-            '--disable-dev-shm-usage',
-            '--disable-blink-features=AutomationControlled',  # 핵심!
-            '--disable-web-security',
-            '--disable-features=VizDisplayCompositor',
-            '--disable-automation',
-            '--disable-browser-side-navigation',
-            '--disable-dev-shm-usage',
-            '--no-first-run'
-        ]
-    )
-        page = await browser.new_page()  
-
-        # 추가: 자동화 감지 속성 제거
-        await page.add_init_script("""
-            Object.defineProperty(navigator, 'webdriver', {
-                get: () => undefined,
-            });
-        """)
-
-        # 🆕 User-Agent 추가 (브라우저 위장)
-        await page.set_extra_http_headers({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Referer': 'https://www.google.com/',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'cross-site'
-        })
+    return selected, False
+
 
+def dedupe_brand_urls(all_brand_urls, page_count):
+    """URL 기준 중복 제거 + 결과 요약 출력"""
+    unique_urls = []
+    seen_urls = set()
+
+    for item in all_brand_urls:
+        if item["url"] not in seen_urls:
+            seen_urls.add(item["url"])
+            unique_urls.append(item)
+
+    print(f"\n📊 최종 결과:")
+    print(f"총 처리 페이지: {page_count}개")
+    print(f"Food & Beverages 데이터: {len(all_brand_urls)}개")
+    print(f"중복 제거 후: {len(unique_urls)}개")
+    return unique_urls
+
+
+def crawl_links_via_json(latest_db_date, telemetry, max_rows=LISTING_JSON_MAX_ROWS):
+    """DataTables JSON 엔드포인트로 목록 수집 (브라우저 없음). 사용 불가면 ListingEndpointError"""
+    client = ListingClient()
+    all_brand_urls = []
+    page_count = 0
+    try:
+        for rows in client.iter_pages(max_rows=max_rows):
+            page_count += 1
+            telemetry.add("listing_pages")
+            telemetry.add("listing_rows", len(rows))
+            print(f"📡 JSON 목록 {page_count}번째 요청: {len(rows)}행")
+
+            selected, should_break = select_new_listing_rows(rows, latest_db_date)
+            all_brand_urls.extend(selected)
+            if should_break:
+                print(f"🔚 기존 DB 날짜 도달로 크롤링 종료 (요청 {page_count}회)")
+                break
+            if not selected:
+                print(f"💡 {page_count}번째 요청에서 새로운 Food & Beverages 데이터 없음 - 종료")
+                break
+    finally:
+        telemetry.add("bytes_transferred", client.bytes_received)
+        client.close()
+
+    return dedupe_brand_urls(all_brand_urls, page_count)
+
+
+async def crawl_incremental_links(cache=None, telemetry=None, state=None):
+    """목록에서 새 Food & Beverages 리콜 링크 수집 (JSON 엔드포인트 우선, 실패 시 브라우저)"""
+    telemetry = telemetry or CrawlTelemetry()
+    state = state or CrawlState()
+    latest_db_date = state.get_watermark(LISTING_SOURCE)
+    print(f"📊 기준점: {latest_db_date} (겹침 {WATERMARK_OVERLAP_DAYS}일)")
+
+    if LISTING_JSON_FIRST:
         try:
-            print("🏠 FDA 메인 페이지부터 접근...")
-            await page.goto("https://www.fda.gov/")
-            await page.wait_for_timeout(10000)  # 10초 대기
-            
-            print("📂 Safety 섹션으로 이동...")
-            await page.goto("https://www.fda.gov/safety/")
-            await page.wait_for_timeout(5000)
-            
-            print("🎯 최종 목적지...")
-            response = await page.goto("https://www.fda.gov/safety/recalls-market-withdrawals-safety-alerts/")
-                    
+            with telemetry.stage("listing"):
+                brand_urls = await asyncio.to_thread(crawl_links_via_json, latest_db_date, telemetry)
+            telemetry.note("listing_source", "json")
+            return brand_urls
+        except ListingEndpointError as e:
+            print(f"⚠️ JSON 목록 엔드포인트 사용 불가 ({e}) → 브라우저 페이지 이동으로 전환")
+
+    if LISTING_CONCURRENCY > 1:
+        telemetry.note("listing_source", "dom_parallel")
+        return await crawl_links_via_dom_parallel(latest_db_date, cache, telemetry)
+    telemetry.note("listing_source", "dom")
+    return await crawl_links_via_dom(latest_db_date, cache, telemetry)
+
+
+async def crawl_links_via_dom(latest_db_date, cache=None, telemetry=None):
+    """브라우저로 목록 페이지를 열고 "Next" 버튼으로 페이지 이동하며 수집"""
+    telemetry = telemetry or CrawlTelemetry()
+    async with CrawlEngine(pool_size=1, storage_state=BROWSER_STATE_PATH) as engine, engine.page() as page:
+        try:
+            if not await open_listing_page(page, telemetry):
+                print("💥 목록 페이지 접근 실패")
+                return []
+            # 통과한 세션을 저장해 다음 실행에서 warm-up 생략
+            await engine.save_storage_state(page)
         except Exception as e:
             print(f"💥 페이지 로딩 실패: {e}")
             return []
 
-        base_url = "https://www.fda.gov/safety/recalls-market-withdrawals-safety-alerts/"
+        base_url = LISTING_BASE_URL
         all_brand_urls = []
         current_page_count = 1
 
-        latest_db_date = get_latest_date_from_db()
-        print(f"📊 DB 최신 날짜: {latest_db_date}")
-        
-        max_pages = 10  # 안전장치
+        max_pages = LISTING_MAX_PAGES  # 안전장치
+        listing_started = time.perf_counter()
         while current_page_count <= max_pages:
             print(f"현재 {current_page_count}페이지 처리 중...")
+            telemetry.add("listing_pages")
 
-            print("🔍 페이지 구조 디버깅...")
-
-            # 페이지 소스 일부 출력
-            content = await page.content()
-            print(f"📄 페이지 크기: {len(content)} 문자")
-            print(f"📝 페이지 전체 내용:")
-            print(content)
-            print("=" * 50)
-
-            # td 요소 확인
-            td_count = await page.locator("td").count()
-            table_count = await page.locator("table").count()
-            print(f"📊 table: {table_count}개, td: {td_count}개")
-
-            # 첫 번째 페이지 스크린샷 저장 (옵션)
-            await page.screenshot(path="debug_page.png")
-            print("📸 페이지 스크린샷 저장됨")
+            # 원본 HTML은 캐시에만 저장 (재파싱용)
+            if cache is not None:
+                cache.put(f"{base_url}#page-{current_page_count}", await page.content())
             
-            # 🆕 조건부 데이터 수집
+            # 🆕 조건부 데이터 수집 (page.evaluate 1회로 전체 행 추출)
             try:
-                # 날짜, 링크, Product Type 동시 수집
-                date_elements = await page.locator("td:nth-child(1)").all()  # 날짜
-                link_elements = await page.locator("td:nth-child(2) a").all()  # 링크  
-                product_type_elements = await page.locator("td:nth-child(4)").all()  # Product Type
-                
-                print(f"📊 발견된 요소: 날짜 {len(date_elements)}개, 링크 {len(link_elements)}개, 제품타입 {len(product_type_elements)}개")
-                
+                rows = await extract_listing_rows(page, base_url)
+                telemetry.add("listing_rows", len(rows))
+                print(f"📊 발견된 행: {len(rows)}개")
             except Exception as e:
                 print(f"⚠️ 요소 수집 실패: {e}")
                 break
             
-            page_has_new_data = False
-            should_break = False
-            
             # 🎯 조건부 수집 로직
-            for i in range(min(len(date_elements), len(link_elements), len(product_type_elements))):
-                try:
-                    # 날짜 추출
-                    date_text = await date_elements[i].text_content()
-                    date_text = date_text.strip()
-                    
-                    # 날짜 변환
-                    date_only = None
-                    if 'T' in date_text:
-                        date_only = date_text.split('T')[0]
-                    elif '/' in date_text:
-                        try:
-                            parsed_date = datetime.strptime(date_text, "%m/%d/%Y")
-                            date_only = parsed_date.strftime("%Y-%m-%d")
-                        except:
-                            date_only = date_text
-                    elif '-' in date_text and len(date_text) == 10:
-                        date_only = date_text
-                    else:
-                        continue  # 날짜 형식을 파싱할 수 없으면 스킵
-                    
-                    print(f"  📅 #{i}: 날짜 '{date_only}'")
-                    
-                    # 🚨 DB 최신 날짜와 비교 (더 오래된 데이터면 중단)
-                    # if latest_db_date and date_only:
-                    #     try:
-                    #         current_date_obj = datetime.strptime(date_only, "%Y-%m-%d")
-                    #         latest_date_obj = datetime.strptime(latest_db_date, "%Y-%m-%d")
-                            
-                    #         if current_date_obj <= latest_date_obj:
-                    #             print(f"📊 기존 DB 날짜 도달: {date_only} (DB 최신: {latest_db_date}) - 중단")
-                    #             should_break = True
-                    #             break
-                    #     except Exception as e:
-                    #         print(f"  ⚠️ 날짜 비교 오류: {e}")
-
-                    if latest_db_date and date_only:
-                        try:
-                            current_date_obj = datetime.strptime(date_only, "%Y-%m-%d")
-                            latest_date_obj = datetime.strptime(latest_db_date, "%Y-%m-%d")
-                            
-                            # ❌ 기존: DB 날짜 이전이면 중단
-                            # if current_date_obj <= latest_date_obj:
-
-                            # ✅ 테스트용: DB 날짜 -3일 이전이면 중단
-                            test_cutoff_date = latest_date_obj - timedelta(days=3)
-                            if current_date_obj <= test_cutoff_date:
-                                print(f"📊 테스트 종료 조건 도달: {date_only} (DB-3일: {test_cutoff_date.strftime('%Y-%m-%d')}) - 중단")
-                                should_break = True
-                                break
-                        except Exception as e:
-                            print(f"  ⚠️ 날짜 비교 오류: {e}")
-                    
-                    # Product Type 확인
-                    product_type_text = await product_type_elements[i].text_content()
-                    product_type_text = product_type_text.strip().lower()
-                    
-                    print(f"  🏷️ #{i}: 제품타입 '{product_type_text[:50]}...'")
-                    
-                    # 🎯 Food & Beverages 정확한 조건 확인
-                    # 콤마로 분리해서 첫 번째가 "Food & Beverages"인지 확인
-                    product_parts = product_type_text.split(',')
-                    first_part = product_parts[0].strip()
-                    
-                    is_food_beverage = first_part.lower() == "food & beverages"
-                    
-                    print(f"  🔍 #{i}: 첫번째 부분 '{first_part}' → {'✅' if is_food_beverage else '❌'}")
-                    
-                    if is_food_beverage:
-                        # URL 수집
-                        url = await link_elements[i].get_attribute("href")
-                        brand_name = await link_elements[i].text_content()
-                        full_url = urljoin(base_url, url)
-                        
-                        all_brand_urls.append({
-                            "name": brand_name.strip(), 
-                            "url": full_url,
-                            "date": date_only,
-                            "product_type": product_type_text
-                        })
-                        page_has_new_data = True
-                        print(f"  ✅ 수집: {date_only} - {brand_name.strip()}")
-                    else:
-                        print(f"  ⏭️ 스킵: Food & Beverages 아님")
-                        
-                except Exception as e:
-                    print(f"  ⚠️ 항목 {i} 처리 오류: {e}")
-                    continue
+            selected, should_break = select_new_listing_rows(rows, latest_db_date)
+            all_brand_urls.extend(selected)
             
             # 🆕 페이지별 조건 확인 후 다음 페이지 결정
             if should_break:
                 print(f"🔚 기존 DB 날짜 도달로 크롤링 종료 (페이지 {current_page_count})")
                 break
             
-            if not page_has_new_data:
+            if not selected:
                 print(f"💡 페이지 {current_page_count}에서 새로운 Food & Beverages 데이터 없음")
                 print(f"🔚 더 이상 진행할 필요 없음 - 크롤링 종료")
                 break  # 🆕 새로운 데이터가 없으면 바로 종료
@@ -286,39 +274,119 @@ async def crawl_incremental_links():
                 print(f"🔚 페이지 이동 실패 - 종료: {e}")
                 break
         
-        # 결과 정리
-        unique_urls = []
-        seen_urls = set()
-        
-        for item in all_brand_urls:
-            if item["url"] not in seen_urls:
-                seen_urls.add(item["url"])
-                unique_urls.append(item)
-        
-        print(f"\n📊 최종 결과:")
-        print(f"총 처리 페이지: {current_page_count}개")
-        print(f"Food & Beverages 데이터: {len(all_brand_urls)}개")
-        print(f"중복 제거 후: {len(unique_urls)}개")
-        
-        await browser.close()
+        telemetry.stages["listing"] += time.perf_counter() - listing_started
+
+        unique_urls = dedupe_brand_urls(all_brand_urls, current_page_count)
+
+        telemetry.add("bytes_transferred", engine.bytes_received)
+        telemetry.note_counts("resources", engine.resource_stats())
         return unique_urls
 
-def check_existing_urls(new_urls):
-    """기존 DB에서 URL 중복 체크"""
-    db_path = "./data/fda_recalls.db"
-    if not os.path.exists(db_path):
-        return new_urls  # DB 없으면 모든 URL 처리
-        
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    existing_urls = set()
-    for url_info in new_urls:
-        cursor.execute("SELECT url FROM recalls WHERE url = ?", (url_info["url"],))
-        if cursor.fetchone():
-            existing_urls.add(url_info["url"])
-    
-    conn.close()
+def listing_page_url(page_index):
+    """0부터 시작하는 목록 페이지 번호 → 직접 접근 URL"""
+    if page_index == 0:
+        return LISTING_BASE_URL
+    return LISTING_PAGE_URL_TEMPLATE.format(base=LISTING_BASE_URL, page=page_index)
+
+
+async def fetch_listing_page(engine, page_index, cache=None):
+    """풀에서 페이지를 빌려 목록 페이지 1개의 행 추출 (표가 안 나오면 None)"""
+    url = listing_page_url(page_index)
+    async with engine.page() as page:
+        if not await wait_for_listing_table(page, url):
+            return None
+        if cache is not None:
+            cache.put(f"{LISTING_BASE_URL}#page-{page_index + 1}", await page.content())
+        return await extract_listing_rows(page, LISTING_BASE_URL)
+
+
+async def crawl_links_via_dom_parallel(latest_db_date, cache=None, telemetry=None,
+                                       concurrency=None, max_pages=LISTING_MAX_PAGES):
+    """
+    목록 페이지 URL을 미리 계산해 한 브라우저의 여러 페이지로 동시에 수집
+    - 어떤 페이지에서 DB 날짜에 도달하거나 새 데이터가 없으면, 그 뒤 페이지 작업은 취소
+    - 결과는 페이지 순서대로 이어 붙인 뒤 날짜 내림차순으로 정렬
+    """
+    telemetry = telemetry or CrawlTelemetry()
+    concurrency = concurrency or LISTING_CONCURRENCY
+    async with CrawlEngine(pool_size=concurrency, storage_state=BROWSER_STATE_PATH) as engine:
+        # 첫 페이지는 세션 확인(warm-up)을 겸해서 먼저 처리
+        async with engine.page() as page:
+            try:
+                if not await open_listing_page(page, telemetry):
+                    print("💥 목록 페이지 접근 실패")
+                    return []
+                await engine.save_storage_state(page)
+                if cache is not None:
+                    cache.put(f"{LISTING_BASE_URL}#page-1", await page.content())
+                first_rows = await extract_listing_rows(page, LISTING_BASE_URL)
+            except Exception as e:
+                print(f"💥 페이지 로딩 실패: {e}")
+                return []
+        await engine.reload_storage_state()
+
+        listing_started = time.perf_counter()
+        results = {}   # 페이지 번호 → (선택된 행, 중단 여부)
+        cutoff = None  # 이 페이지까지만 필요
+
+        def _accept(page_index, rows):
+            nonlocal cutoff
+            telemetry.add("listing_pages")
+            telemetry.add("listing_rows", len(rows or []))
+            print(f"📄 {page_index + 1}페이지: {len(rows or [])}행")
+            selected, should_break = select_new_listing_rows(rows or [], latest_db_date)
+            results[page_index] = (selected, should_break)
+            if (should_break or not selected) and (cutoff is None or page_index < cutoff):
+                cutoff = page_index
+                for later_index, task in tasks.items():
+                    if later_index > cutoff and not task.done():
+                        task.cancel()
+
+        tasks = {}
+        _accept(0, first_rows)
+        if cutoff is None:
+            tasks = {i: asyncio.create_task(fetch_listing_page(engine, i, cache)) for i in range(1, max_pages)}
+            for page_index, task in sorted(tasks.items()):
+                if cutoff is not None and page_index > cutoff:
+                    break
+                try:
+                    rows = await task
+                except asyncio.CancelledError:
+                    continue
+                except Exception as e:
+                    print(f"⚠️ {page_index + 1}페이지 수집 실패: {e}")
+                    rows = None
+                _accept(page_index, rows)
+
+            leftover = [task for task in tasks.values() if not task.done()]
+            for task in leftover:
+                task.cancel()
+            await asyncio.gather(*leftover, return_exceptions=True)
+
+        cancelled = sum(1 for task in tasks.values() if task.cancelled())
+        telemetry.stages["listing"] += time.perf_counter() - listing_started
+        telemetry.add("bytes_transferred", engine.bytes_received)
+        telemetry.note_counts("resources", engine.resource_stats())
+
+    # 페이지 순서대로 병합 (중단 페이지까지)
+    all_brand_urls = []
+    page_count = 0
+    for page_index in sorted(results):
+        if cutoff is not None and page_index > cutoff:
+            break
+        selected, _ = results[page_index]
+        all_brand_urls.extend(selected)
+        page_count += 1
+    all_brand_urls.sort(key=lambda item: item["date"] or "", reverse=True)
+
+    print(f"⚡ 목록 병렬 수집: 동시 {concurrency}개, 처리 {page_count}페이지, 취소 {cancelled}페이지")
+    return dedupe_brand_urls(all_brand_urls, page_count)
+
+
+def check_existing_urls(new_urls, state=None):
+    """기존 DB에서 URL 중복 체크 (임시 테이블 JOIN 1회)"""
+    state = state or CrawlState()
+    existing_urls = state.existing_urls(url_info["url"] for url_info in new_urls)
     
     # 새로운 URL만 필터링
     filtered_urls = [url_info for url_info in new_urls if url_info["url"] not in existing_urls]
@@ -327,141 +395,141 @@ def check_existing_urls(new_urls):
     return filtered_urls
 
 #url별 세부내용 추출 함수
-async def crawl_brand_detail(url):
-    async with async_playwright() as p:
-        try:
-            browser = await p.chromium.launch(
-                headless=True,
-                args=['--no-sandbox', '--disable-dev-shm-usage']  # 이 옵션들이 필요
-            )
-            page= await browser.new_page()
-
-            await page.goto(url) #url로 이동
-            await page.wait_for_load_state("networkidle") #페이지 로딩 대기
-
-        #회사 리콜 발표일 추출
-            company_announcement_element= page.locator("dt:has-text('Company Announcement Date')+dd")
-            company_announcement_date_raw = await company_announcement_element.text_content()
-
-            try:
-                date_obj=datetime.strptime(company_announcement_date_raw.strip(), "%B %d, %Y")
-                company_announcement_date= date_obj.strftime("%Y-%m-%d")
-            except ValueError:
-                company_announcement_date=company_announcement_date_raw.strip()
-
-            # print(f"회사 리콜 발표일: {company_announcement_date}")
+async def crawl_brand_detail(url, page=None, cache=None):
+    """상세 페이지 크롤링 (page가 없으면 단독 엔진으로 1회 실행)"""
+    if page is None:
+        async with CrawlEngine(pool_size=1) as engine:
+            return await engine.run(url, lambda page, url: crawl_brand_detail(url, page, cache))
 
-        #FDA 리콜 발표일 추출
-            FDA_publish_element= page.locator("dt:has-text('FDA Publish Date') +dd")
-            FDA_publish_date_raw= await FDA_publish_element.text_content()
-
-            try: 
-                date_obj2= datetime.strptime(FDA_publish_date_raw.strip(), "%B %d, %Y")
-                FDA_publish_date= date_obj2.strftime("%Y-%m-%d")
-            except ValueError:
-                FDA_publish_date= FDA_publish_date_raw.strip()
-
-            # print(f"FDA 리콜 발표일: {FDA_publish_date}")
-
-        #회사명 추출
-            company_element=page.locator("dt:has-text('Company Name') + dd")
-            company_name= await company_element.text_content()
-
-            # print(f"회사명:{company_name}")
-
-        #브랜드명 추출
-            try:
-                brand_element=page.locator("dt:has-text('Brand Name') + dd .field--item")
-                brand_count= await brand_element.text_content()
-
-                if brand_count>0:
-                    brand_names=[]
-                    for i in range(brand_count):
-                        brand_text= await brand_element.nth(i).text_content()
-                        if brand_text and brand_text.strip():
-                            brand_names.append(brand_text.strip())
-                    brand_name= "/".join(brand_names)
-                else:
-                    brand_name=""
-            except:
-                brand_name=""
-
-            # print(f"브랜드명:{brand_name}")
-
-        #리콜원인 추출
-            try:
-                recall_reason_element = page.locator("dt:has-text('Product Type') + dd")
-                total_recall_reason = await recall_reason_element.text_content()
-                
-                if total_recall_reason and total_recall_reason.strip():
-                    # 두 번째 줄이나 마지막 단어 추출
-                    lines = total_recall_reason.strip().split('\n')
-                    if len(lines) >= 2:
-                        recall_reason = lines[1].strip()  # 두 번째 줄
-                    else:
-                        recall_reason = total_recall_reason.split()[-1]  # 마지막 단어
-                else:
-                    recall_reason = ""
-            except Exception as e:
-                print(f"⚠️ 리콜원인 추출 실패: {e}")
-                recall_reason = ""
-
-            # print(f"리콜원인:{recall_reason}")
-
-        #자세한리콜 사유 추출
-            try:
-                recall_reason_detail_element = page.locator("dt:has-text('Reason for Announcement')+ dd .field--item")
-                recall_reason_detail = await recall_reason_detail_element.text_content(timeout=5000)
-                recall_reason_detail = recall_reason_detail.strip() if recall_reason_detail else ""
-            except:
-                recall_reason_detail = ""
+    try:
+        limiter = get_rate_limiter()
+        async with limiter.aslot(url):
+            response = await page.goto(url) #url로 이동
+        limiter.record(url, response.status if response else None)
+        await page.wait_for_load_state("networkidle") #페이지 로딩 대기
+
+        # 렌더링된 HTML도 캐시에 저장 (나중에 로컬 재파싱 가능)
+        if cache is not None:
+            headers = response.headers if response else {}
+            cache.put(url, await page.content(), status=response.status if response else 200,
+                      etag=headers.get("etag"), last_modified=headers.get("last-modified"))
+
+    #모든 필드를 page.evaluate 1회로 추출 후 dict 형태로 구성
+        recall_data = await extract_recall_detail(page, url)
+
+        print(f"✅ 크롤링 완료: {recall_data['brand_name']}")
+        print(f"회사: {recall_data['company_name']}")
+        print(f"리콜 발표일: {recall_data['company_announcement_date']}")
+        print("-" * 50)
+
+        return recall_data
+    except Exception as e:
+        print(f" {url} 크롤링 실패: {e}")
+        return None
+
+
+async def fetch_detail_via_http(http, url):
+    """
+    HTTP + lxml로 상세 페이지 수집
+    반환: (recall_data 또는 None, 사유) - 사유가 'blocked'/'unparsed'면 Playwright로 전환
+    """
+    response = await http.afetch(url)
+    if response["blocked"]:
+        return None, "blocked"
+    if response["status"] in (404, 410):
+        return None, "not_found"
+    if response["status"] not in (200, 304):
+        return None, "blocked"
+    if not response["needs_parse"]:
+        # 본문 해시가 이미 파싱·저장된 것과 동일 → 파싱 생략
+        return None, "unchanged"
 
-            # print(f"자세한리콜사유:{recall_reason_detail}")
+    try:
+        return parse_recall_detail(response["text"], url), "ok"
+    except ValueError:
+        # dt/dd 필드가 없으면 JS 렌더링이 필요한 페이지로 간주
+        return None, "unparsed"
+
+
+async def crawl_brand_details(brand_urls, pool_size=DEFAULT_POOL_SIZE, http_first=HTTP_FIRST, cache=None,
+                              telemetry=None):
+    """
+    상세 페이지 동시 크롤링
+    - HTTP(keep-alive) + lxml 우선, 차단/챌린지 응답일 때만 Playwright 페이지 풀 사용
+    - 브라우저는 처음 전환이 필요할 때 한 번만 실행
+    - cache(HtmlCache)가 있으면 조건부 요청 + 원본 HTML 저장, 이미 처리한 본문은 파싱 생략
+    반환: (brand_urls와 같은 순서의 결과 리스트, URL별 수집 경로 dict)
+          결과는 실패/변경없음 항목이 None, 경로는 http/cached/playwright/failed
+    """
+    urls = [brand_info["url"] for brand_info in brand_urls]
+    print(f"🚚 상세 크롤링: {len(urls)}개 URL, 동시 {pool_size}개 (HTTP 우선: {'ON' if http_first else 'OFF'})")
+
+    http = HttpFetcher(pool_size=pool_size, cache=cache) if http_first else None
+    engine = CrawlEngine(pool_size=pool_size, storage_state=BROWSER_STATE_PATH)
+    fetch_paths = {}
+
+    async def _one(url):
+        if http is not None:
+            result, reason = await fetch_detail_via_http(http, url)
+            if result:
+                fetch_paths[url] = "http"
+                return result
+            if reason == "unchanged":
+                fetch_paths[url] = "cached"
+                return None
+            if reason == "not_found":
+                print(f"  ❌ 페이지 없음: {url}")
+                fetch_paths[url] = "failed"
+                return None
+            print(f"  🛡️ HTTP {reason} → Playwright 전환: {url}")
 
-        #식품종류 추출
-            product_element= page.locator("dt:has-text('Product Description')+dd .field--item")
-            product= await product_element.text_content()
-            
-            # print(f"식품종류:{product}")
-
-        #내용 추출
-            content_elements = await page.locator("h2:has-text('Company Announcement') ~ p:not(.inset_column p)").all()
-            content_parts = []
-
-            for element in content_elements:
-                text = await element.text_content()
-                if text and text.strip():
-                    content_parts.append(text.strip())
-
-            content = "\n\n".join(content_parts)
-            # print(f"내용: {content}")
-
-
-            await browser.close()
-
-        #dict 형태로 구성
-            recall_data= {
-                "document_type": "recall",
-                "url": url,
-                "company_announcement_date": company_announcement_date,
-                "fda_publish_date": FDA_publish_date,
-                "company_name": company_name.strip() if company_name else "",
-                "brand_name": brand_name.strip() if brand_name else "",
-                "recall_reason": recall_reason.strip() if recall_reason else "",
-                "recall_reason_detail": recall_reason_detail.strip() if recall_reason_detail else "",
-                "product_type": product.strip() if product else "",
-                "content": content,
-            }
-
-            print(f"✅ 크롤링 완료: {brand_name}")
-            print(f"회사: {company_name}")
-            print(f"리콜 발표일: {company_announcement_date}")
-            print("-" * 50)
-
-            return recall_data
+        try:
+            await engine.ensure_started()
+            result = await engine.run(url, lambda page, url: crawl_brand_detail(url, page, cache))
         except Exception as e:
-            print(f" {url} 크롤링 실패: {e}")
-            return None
+            print(f"  ⚠️ {url} 처리 실패: {e}")
+            result = None
+        fetch_paths[url] = "playwright" if result else "failed"
+        return result
+
+    telemetry = telemetry or CrawlTelemetry()
+    try:
+        with telemetry.stage("detail"):
+            results = await asyncio.gather(*(_one(url) for url in urls))
+    finally:
+        await engine.close()
+        if http is not None:
+            http.close()
+            telemetry.add("bytes_transferred", http.bytes_received)
+        telemetry.add("bytes_transferred", engine.bytes_received)
+        telemetry.note_counts("resources", engine.resource_stats())
+
+    if engine.url_timings:
+        engine.print_report()
+    limiter = get_rate_limiter()
+    limiter.print_stats()
+    telemetry.note("rate_limits", limiter.stats())
+
+    path_counts = {path: list(fetch_paths.values()).count(path) for path in ("http", "cached", "playwright", "failed")}
+    telemetry.add("detail_pages", path_counts["http"] + path_counts["cached"] + path_counts["playwright"])
+    for path, count in path_counts.items():
+        key = f"detail_path_{path}"
+        telemetry.note(key, telemetry.extra.get(key, 0) + count)
+    print(f"🛣️ 수집 경로: HTTP {path_counts['http']}개 / 캐시(변경없음) {path_counts['cached']}개 / "
+          f"Playwright {path_counts['playwright']}개 / 실패 {path_counts['failed']}개")
+    for url in urls:
+        if fetch_paths.get(url) not in ("http", "cached"):
+            print(f"   [{fetch_paths.get(url)}] {url}")
+
+    return results, fetch_paths
+
+
+def reparse_cached_details(cache, workers=None):
+    """캐시된 상세 페이지 HTML을 네트워크 없이 프로세스 풀로 다시 파싱"""
+    batch = parse_batch(cache_tasks(cache, "detail"), workers=workers)
+    results = [outcome["result"] for outcome in batch["parsed"]]
+    print(f"♻️ 캐시 재파싱: {len(results)}개 성공, {len(batch['failed'])}개 실패")
+    return results
 
 
 #JSON 파일 저장 함수 
@@ -472,35 +540,126 @@ def save_to_json(data_list, filename="fda_recalls.json"):
     print(f"📁 {len(data_list)}개 데이터가 {filename}에 저장되었습니다.")
 
 
+async def drain_frontier(frontier, on_batch, cache=None, pool_size=DEFAULT_POOL_SIZE,
+                         batch_size=FRONTIER_BATCH_SIZE, retry_wait_limit=RETRY_WAIT_LIMIT, telemetry=None):
+    """
+    crawl_frontier에서 작업을 리스해 배치 단위로 상세 크롤링
+    - on_batch(results)로 저장이 끝난 URL만 done 처리 → 중간에 죽어도 남은 작업부터 이어서 실행
+    - 실패한 URL은 백오프 후 재시도, 곧 재시도 가능한 작업이 있으면 잠시 기다렸다가 계속
+    반환: {"saved": 저장된 레코드 수, "unchanged": 본문이 그대로라 레코드 없이 완료된 URL 수}
+    """
+    telemetry = telemetry or CrawlTelemetry()
+    counts = {"saved": 0, "unchanged": 0}
+    while True:
+        items = frontier.lease(batch_size)
+        if not items:
+            wait = frontier.seconds_until_next_due()
+            if wait is None or wait > retry_wait_limit:
+                break
+            print(f"⏳ 재시도 대기: {wait:.0f}초 후 계속")
+            await asyncio.sleep(wait + 1)
+            continue
+
+        print(f"\n📦 frontier 배치: {len(items)}개 리스 (워커 {frontier.worker_id})")
+        telemetry.add("retries", sum(1 for item in items if item["attempts"] > 1))
+        results, fetch_paths = await crawl_brand_details(items, pool_size=pool_size, cache=cache,
+                                                         telemetry=telemetry)
+        succeeded = [result for result in results if result]
+
+        if succeeded:
+            try:
+                on_batch(succeeded)
+            except Exception as e:
+                # 저장 실패 → 이 배치 전체를 재시도 대상으로
+                for result in succeeded:
+                    frontier.fail(result["url"], f"저장 실패: {e}")
+                telemetry.add("failures", len(succeeded))
+                raise
+
+        unchanged_urls = [item["url"] for item, result in zip(items, results)
+                          if not result and fetch_paths.get(item["url"]) == "cached"]
+        frontier.complete([result["url"] for result in succeeded] + unchanged_urls)
+        for item, result in zip(items, results):
+            if not result and fetch_paths.get(item["url"]) == "failed":
+                frontier.fail(item["url"], "상세 크롤링 실패")
+                telemetry.add("failures")
+
+        counts["saved"] += len(succeeded)
+        counts["unchanged"] += len(unchanged_urls)
+
+    # 변경 없음으로 완료된 URL은 레코드가 없으므로 저장 건수와 따로 집계
+    telemetry.note_counts("frontier", counts)
+    print(f"📋 frontier 상태: {frontier.stats()} / 저장 {counts['saved']}개, 변경 없음 {counts['unchanged']}개")
+    return counts
+
+
+def persist_results(results, cache=None, telemetry=None):
+    """상세 크롤링 결과를 SQLite + ChromaDB에 저장"""
+    telemetry = telemetry or CrawlTelemetry()
+    print(f"💾 {len(results)}개 데이터를 DB에 저장 중...")
+    with telemetry.stage("sqlite"):
+        upserted = bulk_upsert_recalls(results)
+    telemetry.add("records_saved", upserted["inserted"] + upserted["updated"] + upserted["unchanged"])
+    telemetry.note_counts("sqlite_upsert", upserted)
+    print(f"✅ SQLite 저장: 신규 {upserted['inserted']}, 변경 {upserted['updated']}, 변경 없음 {upserted['unchanged']}")
+    # Chroma 반영은 SQLite 트랜잭션에서 기록한 outbox 로 (이전 실행에서 실패한 작업도 함께 처리)
+    with telemetry.stage("chroma"):
+        synced = drain_outbox()
+    telemetry.note_counts("chroma_outbox", synced)
+
+    # 저장까지 끝난 본문은 다음 실행에서 파싱 생략
+    if cache is not None:
+        for result in results:
+            cache.mark_parsed(result["url"])
+
+
 #메인함수
 async def main():
+    telemetry = CrawlTelemetry("incremental")
+    try:
+        await run_incremental(telemetry)
+        telemetry.finish("success")
+    except BaseException:
+        telemetry.finish("failed")
+        raise
+    finally:
+        telemetry.save()
+        telemetry.print_summary()
+
+
+async def run_incremental(telemetry):
+    """증분 크롤링 본체 (단계별 계측은 telemetry에 누적)"""
     print("🚀 증분 크롤링 시작...")
     
+    cache = HtmlCache()
+    frontier = CrawlFrontier()
+    state = CrawlState()
+
     # 1. 증분 링크 수집
-    brand_urls = await crawl_incremental_links()
-    
-    # 2. 중복 체크
-    filtered_urls = check_existing_urls(brand_urls)
-    
-    if not filtered_urls:
-        print("📋 새로운 데이터가 없습니다.")
-        return
+    brand_urls = await crawl_incremental_links(cache=cache, telemetry=telemetry, state=state)
     
-    print(f"📊 처리할 새로운 데이터: {len(filtered_urls)}개")
+    # 2. 중복 체크 후 frontier 등록 (이전 실행에서 남은 작업도 함께 처리됨)
+    filtered_urls = check_existing_urls(brand_urls, state)
+    added = frontier.enqueue(filtered_urls)
+    print(f"📥 frontier 등록: 새 작업 {added}개 / 현재 상태 {frontier.stats()}")
+
+    # 작업이 frontier에 남았으므로 기준점은 바로 올려도 안전 (실패분은 frontier가 재시도)
+    listing_dates = [b["date"] for b in brand_urls if b.get("date")]
+    if listing_dates:
+        state.advance(LISTING_SOURCE, max(listing_dates))
+        telemetry.note("watermark", state.get_watermark(LISTING_SOURCE))
     
-    # 3. 세부 정보 크롤링
+    # 3. 세부 정보 크롤링 (HTTP 우선, 필요 시 브라우저 페이지 풀) + 배치별 DB 저장
     all_results = []
-    for i, brand_info in enumerate(filtered_urls, 1):
-        print(f"\n{i}/{len(filtered_urls)} 처리중...")
-        try:
-            result = await crawl_brand_detail(brand_info["url"])
-            if result:
-                all_results.append(result)
-        except Exception as e:
-            print(f"오류 발생: {brand_info['name']} - {e}")
+
+    def _on_batch(results):
+        persist_results(results, cache, telemetry)
+        all_results.extend(results)
+
+    drained = await drain_frontier(frontier, _on_batch, cache=cache, telemetry=telemetry)
     
     if not all_results:
-        print("❌ 크롤링된 데이터가 없습니다.")
+        print(f"📋 새로운 데이터가 없습니다. (변경 없음 {drained['unchanged']}개)")
         return
     
     # 4. 파일명 생성 (타임스탬프 포함)
@@ -510,20 +669,16 @@ async def main():
     json_filename = f"./data/realtime_recalls_{timestamp}.json"
     save_to_json(all_results, json_filename)
     
-    # 6. DB 저장
-    print(f"💾 {len(all_results)}개 데이터를 DB에 저장 중...")
-    save_to_sqlite(all_results)
-    save_to_chromadb(all_results)
-    
     print(f"🎉 증분 크롤링 완료!")
     print(f"   📄 JSON: {json_filename}")
     print(f"   🗄️ SQLite: ./data/fda_recalls.db") 
     print(f"   🔍 ChromaDB: ./data/chroma_db_recall")
     print(f"   📊 새로운 데이터: {len(all_results)}개")
+    print(f"   💤 변경 없음(레코드 없음): {drained['unchanged']}개")
 
 # 저장된 brand_urls.json을 불러와서 상세 크롤링만 하는 함수
 async def main_from_saved_urls(json_file):
-    """저장된 brand_urls.json을 사용해서 상세 크롤링만 실행"""
+    """저장된 brand_urls.json을 사용해서 상세 크롤링만 실행 (중단 후 재실행 시 이어서 진행)"""
     try:
         with open(json_file, 'r', encoding='utf-8') as f:
             brand_urls = json.load(f)
@@ -533,26 +688,154 @@ async def main_from_saved_urls(json_file):
         return
     
     today=datetime.now().strftime("%m%d")
+    results_file = f"fda_recalls_{today}.json"
+
+    # 파일별 전용 큐: 증분 크롤링 작업과 섞이지 않음
+    frontier = CrawlFrontier(queue=f"json:{os.path.basename(json_file)}")
+    frontier.enqueue(brand_urls)
 
+    # 이전 실행에서 저장한 결과가 있으면 이어서 추가
     all_results = []
-    failed_urls = [] 
-    for i, brand_info in enumerate(brand_urls, 1):
-        print(f"\n {i}/{len(brand_urls)} 처리중...")
-        try:
-            result = await crawl_brand_detail(brand_info["url"])
-            if result:  # 성공한 경우만
-                all_results.append(result)
-            else:  # None 반환 시 실패로 간주
-                failed_urls.append(brand_info)
-        except Exception as e:
-            print(f"오류 발생 : {brand_info['name']} - {e}")
-            failed_urls.append(brand_info)
+    if os.path.exists(results_file):
+        with open(results_file, 'r', encoding='utf-8') as f:
+            all_results = json.load(f)
+
+    def _on_batch(results):
+        all_results.extend(results)
+        save_to_json(all_results, results_file)
+
+    drained = await drain_frontier(frontier, _on_batch, cache=HtmlCache())
 
-    save_to_json(all_results, f"fda_recalls_{today}.json")
+    states = frontier.states([brand_info["url"] for brand_info in brand_urls])
+    failed_urls = [brand_info for brand_info in brand_urls
+                   if states.get(brand_info["url"]) in ("dead", "retry")]
+
+    save_to_json(all_results, results_file)
     save_to_json(failed_urls, f"failed_urls2_{today}.json")
 
-    print(f"🎉 총 {len(all_results)}개 데이터 크롤링 완료!")
+    # 변경 없음으로 완료된 URL은 결과 파일에 레코드가 없음 → 따로 표시
+    print(f"🎉 총 {len(all_results)}개 데이터 크롤링 완료! (이번 실행 저장 {drained['saved']}개)")
+    print(f"💤 변경 없음(레코드 없음): {drained['unchanged']}개")
     print(f"❌ 실패: {len(failed_urls)}개")
 
+def listing_fingerprint(rows):
+    """목록 상위 행(URL, 날짜, 제품 유형)의 sha256 → 새 리콜이 올라오거나 순서가 바뀌면 달라짐"""
+    digest = hashlib.sha256()
+    for row in rows:
+        digest.update(f"{row['url']}|{row['date']}|{row['product_type']}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def fetch_listing_fingerprint(rows=POLL_FINGERPRINT_ROWS):
+    """
+    JSON 엔드포인트 요청 1회로 목록 첫 페이지 지문 계산
+    엔드포인트를 쓸 수 없거나 행이 요청보다 적으면(부분/빈 응답) None → 크롤링으로 확인
+    """
+    client = ListingClient()
+    try:
+        listing_rows = client.fetch(0, rows)["rows"]
+        if len(listing_rows) < rows:
+            # 빈 목록의 지문(sha256(""))이 저장되면 이후 폴링이 계속 "변화 없음"이 됨
+            print(f"⚠️ 목록 행 {len(listing_rows)}/{rows}개만 수신 → 지문 없이 증분 크롤링으로 확인")
+            return None
+        return listing_fingerprint(listing_rows)
+    except ListingEndpointError as e:
+        print(f"⚠️ 목록 지문 확인 실패 ({e}) → 증분 크롤링으로 확인")
+        return None
+    finally:
+        client.close()
+
+
+async def poll_once():
+    """
+    폴링 1회: 지문이 같으면 바로 종료, 바뀌었으면 증분 크롤링(기준점 이후 새 항목만) 후 지문 저장
+    반환: 크롤링 실행 여부
+    """
+    state = CrawlState()
+    try:
+        fingerprint = await asyncio.to_thread(fetch_listing_fingerprint)
+        if fingerprint and fingerprint == state.get_extra(LISTING_SOURCE).get("listing_fingerprint"):
+            print(f"💤 {datetime.now():%H:%M:%S} 목록 변화 없음 - 건너뜀")
+            return False
+
+        print(f"🔔 {datetime.now():%H:%M:%S} 목록 변화 감지 → 증분 크롤링")
+        telemetry = CrawlTelemetry("poll")
+        try:
+            await run_incremental(telemetry)
+            telemetry.finish("success")
+        except BaseException:
+            telemetry.finish("failed")
+            raise
+        finally:
+            telemetry.save()
+            telemetry.print_summary()
+
+        # 크롤링이 끝난 뒤, 실제 행으로 계산한 지문만 저장 → 중간에 실패하면 다음 폴링에서 다시 시도
+        if fingerprint:
+            state.set_extra(LISTING_SOURCE, {**state.get_extra(LISTING_SOURCE), "listing_fingerprint": fingerprint})
+        return True
+    finally:
+        state.close()
+
+
+async def main_poll(interval=POLL_INTERVAL_SECONDS, once=False):
+    """장시간 실행 폴링 루프 (once=True 면 1회만 확인하고 종료 - cron 용)"""
+    print(f"📡 폴링 모드 시작: {interval}초 간격, 상위 {POLL_FINGERPRINT_ROWS}행 지문 비교")
+    while True:
+        try:
+            await poll_once()
+        except Exception as e:
+            if once:
+                raise
+            print(f"❌ 폴링 오류: {e} - 다음 폴링에서 재시도")
+        if once:
+            return
+        await asyncio.sleep(interval)
+
+async def main_drain_only():
+    """링크 수집 없이 frontier에 남은 작업만 처리 (여러 워커 동시 실행 가능)"""
+    telemetry = CrawlTelemetry("drain")
+    cache = HtmlCache()
+    frontier = CrawlFrontier()
+    print(f"🛠️ frontier 워커 시작: {frontier.worker_id} / 현재 상태 {frontier.stats()}")
+    try:
+        drained = await drain_frontier(frontier, lambda results: persist_results(results, cache, telemetry),
+                                     cache=cache, telemetry=telemetry)
+        telemetry.finish("success")
+    except BaseException:
+        telemetry.finish("failed")
+        raise
+    finally:
+        telemetry.save()
+        telemetry.print_summary()
+    print(f"🎉 워커 종료: {drained['saved']}개 저장, 변경 없음 {drained['unchanged']}개")
+
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="FDA 리콜 증분 크롤러")
+    parser.add_argument("--from-json", metavar="FILE", help="저장된 brand_urls JSON으로 상세 크롤링만 실행")
+    parser.add_argument("--reparse-cache", action="store_true",
+                        help="HTML 캐시를 네트워크 없이 다시 파싱해 SQLite에 반영")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="--reparse-cache 파싱 프로세스 수 (기본: CPU 코어 수)")
+    parser.add_argument("--drain", action="store_true",
+                        help="링크 수집 없이 crawl_frontier에 남은 작업만 처리")
+    parser.add_argument("--poll", action="store_true",
+                        help="목록 첫 페이지 지문을 주기적으로 확인하고 바뀌었을 때만 증분 크롤링")
+    parser.add_argument("--poll-interval", type=int, default=POLL_INTERVAL_SECONDS, help="폴링 간격(초)")
+    parser.add_argument("--once", action="store_true", help="--poll 을 1회만 실행하고 종료")
+    args = parser.parse_args()
+
+    if args.reparse_cache:
+        cache = HtmlCache()
+        reparsed = reparse_cached_details(cache, workers=args.workers)
+        if reparsed:
+            # SQLite 저장 + outbox drain (바뀐 레코드는 Chroma 에도 반영) + 파싱 완료 표시
+            persist_results(reparsed, cache)
+    elif args.from_json:
+        asyncio.run(main_from_saved_urls(args.from_json))
+    elif args.drain:
+        asyncio.run(main_drain_only())
+    elif args.poll:
+        asyncio.run(main_poll(args.poll_interval, once=args.once))
+    else:
+        asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,261 @@
+# ./openfda_importer.py
+"""
+openFDA 식품 리콜(enforcement) 대량 덤프 → recalls 테이블 적재
+- zip 안의 JSON을 통째로 읽지 않고 results 배열을 한 건씩 스트리밍 파싱
+- 레코드를 save_to_sqlite 스키마로 변환해 큰 배치 단위로 저장
+
+사용 예:
+    python openfda_importer.py food-enforcement-0001-of-0001.json.zip
+    python openfda_importer.py --download --since 2020-01-01
+"""
+import os
+import io
+import json
+import argparse
+import tempfile
+import zipfile
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import requests
+
+from chroma_sync import drain_outbox
+from db_utils import bulk_upsert_recalls
+from utils.near_duplicates import NEAR_DUP_DB_PATH, NEAR_DUP_ENABLED, NearDuplicateIndex
+
+OPENFDA_FOOD_ENFORCEMENT_URL = "https://download.open.fda.gov/food/enforcement/food-enforcement-0001-of-0001.json.zip"
+OPENFDA_RECORD_URL = 'https://api.fda.gov/food/enforcement.json?search=recall_number:"{recall_number}"'
+
+DEFAULT_BATCH_SIZE = 5000
+READ_CHUNK_SIZE = 1 << 20  # 1MB
+
+# reason_for_recall 키워드 → recall_reason 카테고리 (앞에 있을수록 우선)
+REASON_KEYWORDS = [
+    ("Allergens", ["undeclared", "allergen", "peanut", "tree nut", "milk", "soy", "wheat", "egg", "sesame", "shellfish"]),
+    ("Microbiological", ["listeria", "salmonella", "e. coli", "e.coli", "coli o157", "botulinum", "clostridium",
+                         "cronobacter", "mold", "yeast", "bacteria", "microbial", "cyclospora", "hepatitis", "norovirus"]),
+    ("Foreign Material", ["foreign", "metal", "glass", "plastic", "rubber", "wood", "stone", "bone fragment"]),
+    ("Contaminants", ["lead", "arsenic", "cadmium", "mercury", "pesticide", "aflatoxin", "patulin", "histamine", "chemical"]),
+    ("Labeling", ["label", "misbrand", "mislabel"]),
+    ("Packaging", ["packag", "seal", "container", "leak"]),
+    ("Quality", ["quality", "spoil", "decompos", "off-odor", "off odor", "temperature"]),
+]
+
+
+def _read_more(stream, buffer: str) -> Tuple[str, bool]:
+    """스트림에서 다음 청크를 읽어 버퍼에 추가 → (버퍼, EOF 여부)"""
+    chunk = stream.read(READ_CHUNK_SIZE)
+    return buffer + chunk, not chunk
+
+
+def _skip_ws(stream, buffer: str, pos: int, eof: bool):
+    """공백을 건너뛰고 다음 의미 있는 문자 위치 반환 (필요하면 더 읽음)"""
+    while True:
+        while pos < len(buffer) and buffer[pos] in " \t\r\n":
+            pos += 1
+        if pos < len(buffer) or eof:
+            return buffer, pos, eof
+        buffer, eof = _read_more(stream, buffer)
+
+
+# 값 하나가 끝난 뒤 올 수 있는 문자 (이 외의 문자가 오면 숫자 등이 읽기 경계에서 잘린 것)
+_VALUE_TERMINATORS = frozenset(" \t\r\n,]}:")
+
+
+def _decode_value(decoder, stream, buffer: str, pos: int, eof: bool):
+    """pos 위치의 JSON 값 하나를 디코딩 (값이 잘려 있으면 더 읽고 재시도)"""
+    while True:
+        try:
+            value, end = decoder.raw_decode(buffer, pos)
+            # 숫자/리터럴은 읽기 경계에서 잘려도 짧은 값으로 디코딩됨 ('3.'|'5', '12'|'34')
+            # → EOF 전에는 바로 뒤 문자가 구분자일 때만 값이 끝난 것으로 인정
+            if not eof and (end == len(buffer) or buffer[end] not in _VALUE_TERMINATORS):
+                raise json.JSONDecodeError("truncated", buffer, end)
+            return value, buffer, end, eof
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            buffer, eof = _read_more(stream, buffer)
+
+
+def iter_json_array_items(stream, key: str = "results") -> Iterator[Any]:
+    """
+    최상위 객체의 key 배열 원소를 하나씩 돌려주는 증분 JSON 파서
+    ({"meta": {...}, "results": [ {...}, {...}, ... ]} 구조의 openFDA 덤프용)
+    """
+    decoder = json.JSONDecoder()
+    buffer, eof = _read_more(stream, "")
+    buffer, pos, eof = _skip_ws(stream, buffer, 0, eof)
+    if pos >= len(buffer) or buffer[pos] != "{":
+        raise ValueError("최상위 JSON 객체가 아닙니다")
+    pos += 1
+
+    while True:
+        buffer, pos, eof = _skip_ws(stream, buffer, pos, eof)
+        if pos >= len(buffer) or buffer[pos] == "}":
+            return
+        if buffer[pos] == ",":
+            pos += 1
+            continue
+
+        name, buffer, pos, eof = _decode_value(decoder, stream, buffer, pos, eof)
+        buffer, pos, eof = _skip_ws(stream, buffer, pos, eof)
+        if buffer[pos] != ":":
+            raise ValueError(f"잘못된 JSON: '{name}' 뒤에 ':' 없음")
+        buffer, pos, eof = _skip_ws(stream, buffer, pos + 1, eof)
+
+        if name != key or buffer[pos] != "[":
+            # meta 등 다른 값은 통째로 읽고 건너뜀
+            _, buffer, pos, eof = _decode_value(decoder, stream, buffer, pos, eof)
+            continue
+
+        pos += 1
+        while True:
+            buffer, pos, eof = _skip_ws(stream, buffer, pos, eof)
+            if pos >= len(buffer):
+                raise ValueError("잘못된 JSON: 배열이 닫히지 않았습니다")
+            if buffer[pos] == "]":
+                pos += 1
+                break
+            if buffer[pos] == ",":
+                pos += 1
+                continue
+
+            item, buffer, pos, eof = _decode_value(decoder, stream, buffer, pos, eof)
+            yield item
+
+            # 이미 처리한 앞부분은 버려서 메모리 사용량 고정
+            if pos > READ_CHUNK_SIZE:
+                buffer, pos = buffer[pos:], 0
+
+
+def _format_yyyymmdd(value: Optional[str]) -> Optional[str]:
+    """'20240131' → '2024-01-31'"""
+    value = (value or "").strip()
+    if len(value) == 8 and value.isdigit():
+        return f"{value[:4]}-{value[4:6]}-{value[6:]}"
+    return value or None
+
+
+def classify_recall_reason(reason_for_recall: str) -> str:
+    """리콜 사유 문장을 recall_reason 카테고리로 분류"""
+    text = (reason_for_recall or "").lower()
+    for category, keywords in REASON_KEYWORDS:
+        if any(keyword in text for keyword in keywords):
+            return category
+    return "Other"
+
+
+def map_enforcement_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """openFDA enforcement 레코드 1건 → recalls 스키마 dict"""
+    recall_number = record.get("recall_number", "")
+    reason = (record.get("reason_for_recall") or "").strip()
+    product = (record.get("product_description") or "").strip()
+
+    content_parts = [
+        f"Recall Number: {recall_number}",
+        f"Product: {product}",
+        f"Reason for Recall: {reason}",
+        f"Classification: {record.get('classification', '')} / Status: {record.get('status', '')}",
+        f"Distribution: {record.get('distribution_pattern', '')}",
+        f"Code Info: {record.get('code_info', '')}",
+        f"Product Quantity: {record.get('product_quantity', '')}",
+    ]
+
+    return {
+        "document_type": "recall",
+        "url": OPENFDA_RECORD_URL.format(recall_number=recall_number),
+        "company_announcement_date": _format_yyyymmdd(record.get("recall_initiation_date")),
+        "fda_publish_date": _format_yyyymmdd(record.get("report_date")),
+        "company_name": (record.get("recalling_firm") or "").strip(),
+        "brand_name": "",
+        "recall_reason": classify_recall_reason(reason),
+        "recall_reason_detail": reason,
+        "product_type": product,
+        "content": "\n\n".join(part for part in content_parts if not part.endswith(": ")),
+    }
+
+
+def iter_enforcement_records(zip_path: str) -> Iterator[Dict[str, Any]]:
+    """zip 안의 모든 JSON 파일에서 enforcement 레코드를 스트리밍"""
+    with zipfile.ZipFile(zip_path) as zf:
+        for member in zf.namelist():
+            if not member.endswith(".json"):
+                continue
+            with zf.open(member) as raw:
+                stream = io.TextIOWrapper(raw, encoding="utf-8")
+                yield from iter_json_array_items(stream, "results")
+
+
+def download_dump(url: str = OPENFDA_FOOD_ENFORCEMENT_URL) -> str:
+    """덤프 zip을 임시 파일로 스트리밍 다운로드 → 경로"""
+    fd, path = tempfile.mkstemp(suffix=".json.zip")
+    print(f"⬇️ 다운로드: {url}")
+    with requests.get(url, stream=True, timeout=60) as response, os.fdopen(fd, "wb") as f:
+        response.raise_for_status()
+        for chunk in response.iter_content(chunk_size=READ_CHUNK_SIZE):
+            f.write(chunk)
+    print(f"   → {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+    return path
+
+
+def import_enforcement_dump(zip_path: str, db_path: str = "./data/fda_recalls.db",
+                            batch_size: int = DEFAULT_BATCH_SIZE, since: Optional[str] = None,
+                            with_chroma: bool = False) -> Dict[str, int]:
+    """
+    덤프 zip을 배치 단위로 recalls 테이블에 적재
+    since(YYYY-MM-DD)가 있으면 report_date가 그 이후인 레코드만
+    """
+    stats = {"read": 0, "skipped": 0, "saved": 0, "inserted": 0, "updated": 0, "unchanged": 0}
+    batch: List[Dict[str, Any]] = []
+    # 배치마다 drain 하므로 근접 중복 인덱스(서명 전체)는 적재 전체에서 한 번만 읽음
+    near_dup_index = NearDuplicateIndex(NEAR_DUP_DB_PATH) if with_chroma and NEAR_DUP_ENABLED else None
+
+    def _flush():
+        if not batch:
+            return
+        upserted = bulk_upsert_recalls(batch, db_path=db_path, enqueue_chroma=with_chroma)
+        for key in ("inserted", "updated", "unchanged"):
+            stats[key] += upserted[key]
+        stats["saved"] += upserted["inserted"] + upserted["updated"] + upserted["unchanged"]
+        if with_chroma:
+            drain_outbox(db_path, near_dup_index=near_dup_index)
+        batch.clear()
+
+    try:
+        for record in iter_enforcement_records(zip_path):
+            stats["read"] += 1
+            mapped = map_enforcement_record(record)
+            if not record.get("recall_number") or (since and (mapped["fda_publish_date"] or "") < since):
+                stats["skipped"] += 1
+                continue
+
+            batch.append(mapped)
+            if len(batch) >= batch_size:
+                _flush()
+                print(f"📦 진행: {stats['read']}개 읽음 / {stats['saved']}개 저장")
+        _flush()
+    finally:
+        if near_dup_index is not None:
+            near_dup_index.close()
+
+    print(f"🎉 openFDA 적재 완료: 읽음 {stats['read']}개, 저장 {stats['saved']}개 "
+          f"(신규 {stats['inserted']}, 변경 {stats['updated']}, 변경 없음 {stats['unchanged']}), 제외 {stats['skipped']}개")
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="openFDA 식품 리콜 덤프 적재")
+    parser.add_argument("zip_path", nargs="?", help="food-enforcement-*.json.zip 경로")
+    parser.add_argument("--download", action="store_true", help="openFDA에서 최신 덤프를 받아서 적재")
+    parser.add_argument("--db-path", default="./data/fda_recalls.db")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--since", help="이 날짜(YYYY-MM-DD) 이후 report_date만 적재")
+    parser.add_argument("--with-chroma", action="store_true", help="ChromaDB에도 임베딩 저장 (OpenAI 비용 발생)")
+    args = parser.parse_args()
+
+    if not args.zip_path and not args.download:
+        parser.error("zip_path 또는 --download 가 필요합니다")
+
+    path = args.zip_path or download_dump()
+    import_enforcement_dump(path, db_path=args.db_path, batch_size=args.batch_size,
+                            since=args.since, with_chroma=args.with_chroma)
@@ -0,0 +1,37 @@
+# tests/conftest.py
+# 저장소 루트(utils/, db_utils.py 등)를 import 경로에 추가
+import asyncio
+import os
+import sys
+import types
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class LoopBoundAsyncOpenAI:
+    """httpx AsyncClient 처럼 만든 이벤트 루프에서만 쓸 수 있는 가짜 AsyncOpenAI (벡터 = [글자 수])"""
+
+    created = 0
+
+    def __init__(self, api_key=None, max_retries=None):
+        LoopBoundAsyncOpenAI.created += 1
+        self.loop = None
+        self.embeddings = types.SimpleNamespace(create=self._create)
+
+    async def _create(self, model, input):
+        # 연결 풀은 첫 요청 때 그 루프에 묶임
+        self.loop = self.loop or asyncio.get_running_loop()
+        if asyncio.get_running_loop() is not self.loop:
+            raise RuntimeError("Event loop is closed")
+        data = [types.SimpleNamespace(index=i, embedding=[float(len(text))]) for i, text in enumerate(input)]
+        return types.SimpleNamespace(data=list(reversed(data)))
+
+
+@pytest.fixture
+def loop_bound_openai(monkeypatch):
+    """openai 모듈을 LoopBoundAsyncOpenAI 로 교체 (OpenAIEmbedder 가 import 시점에 사용)"""
+    LoopBoundAsyncOpenAI.created = 0
+    monkeypatch.setitem(sys.modules, "openai", types.SimpleNamespace(AsyncOpenAI=LoopBoundAsyncOpenAI))
+    return LoopBoundAsyncOpenAI
@@ -0,0 +1,175 @@
+# tests/test_chroma_sync.py
+"""chroma_outbox 리스/완료/백오프, drain_outbox, reconcile (tmp_path 의 SQLite + Chroma)"""
+import random
+import sqlite3
+import string
+import time
+
+import chromadb
+import pytest
+
+from chroma_sync import OUTBOX_BATCH_SIZE, drain_outbox, get_collection, reconcile
+from db_utils import bulk_upsert_recalls
+from utils.chroma_outbox import OUTBOX_BACKOFF_SECONDS, ChromaOutbox
+from utils.embedding_pipeline import EmbeddingPipeline, OpenAIEmbedder
+
+DB_PATH = "./data/fda_recalls.db"
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    # 임베딩 캐시 / 상투 문단 / 근접 중복 기본 경로(./data/...)도 tmp_path 아래로
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def chroma_path(tmp_path):
+    # chromadb 는 경로 문자열별로 클라이언트를 캐시 → 테스트마다 다른 절대 경로
+    return str(tmp_path / "chroma_db_recall")
+
+
+def make_record(i, words=60):
+    rng = random.Random(i)
+    body = " ".join("".join(rng.choices(string.ascii_lowercase, k=7)) for _ in range(words))
+    return {"url": f"https://www.fda.gov/recalls/item-{i}", "company_name": f"Company {i}",
+            "fda_publish_date": "2025-01-10", "content": body}
+
+
+def outbox_rows(db_path=DB_PATH):
+    conn = sqlite3.connect(db_path)
+    try:
+        return dict(conn.execute("SELECT url, content_hash FROM chroma_outbox").fetchall())
+    finally:
+        conn.close()
+
+
+def content_hashes(db_path=DB_PATH):
+    conn = sqlite3.connect(db_path)
+    try:
+        return dict(conn.execute("SELECT url, content_hash FROM recalls").fetchall())
+    finally:
+        conn.close()
+
+
+def test_lease_is_exclusive_until_expiry():
+    first = ChromaOutbox(DB_PATH, worker_id="a", lease_seconds=60)
+    second = ChromaOutbox(DB_PATH, worker_id="b", lease_seconds=60)
+    try:
+        first.enqueue([("u1", "h1"), ("u2", "h2")])
+        leased = first.lease(10)
+
+        assert [(item["url"], item["attempts"]) for item in leased] == [("u1", 1), ("u2", 1)]
+        assert second.lease(10) == []
+        assert first.stats()["leased"] == 2
+
+        # 리스 만료 → 다른 워커가 가져가고, 원래 워커는 완료 처리 못 함
+        first.conn.execute("UPDATE chroma_outbox SET lease_expires_at = ?", (time.time() - 1,))
+        assert [item["attempts"] for item in second.lease(10)] == [2, 2]
+        assert first.complete(leased) == 0
+        assert second.stats()["leased"] == 2
+    finally:
+        first.close()
+        second.close()
+
+
+def test_complete_skips_rows_whose_hash_changed_during_lease():
+    outbox = ChromaOutbox(DB_PATH, worker_id="a")
+    try:
+        outbox.enqueue([("u1", "h1"), ("u2", "h2")])
+        leased = outbox.lease(10)
+        outbox.enqueue([("u1", "h1-new")])
+
+        assert outbox.complete(leased, {"u1": 3, "u2": 0}) == 1
+        # 바뀐 URL은 최신 해시로 다시 대기, 청크 0개 URL은 해시와 함께 기록
+        assert outbox_rows() == {"u1": "h1-new"}
+        assert outbox.stats() == {"pending": 1, "retry": 0, "leased": 0, "dead": 0}
+        assert outbox.no_chunk_hashes() == {"u2": "h2"}
+
+        assert outbox.complete(outbox.lease(10), {"u1": 2}) == 1
+        assert outbox.no_chunk_hashes() == {"u2": "h2"}
+    finally:
+        outbox.close()
+
+
+def test_fail_backs_off_then_dead_letters():
+    outbox = ChromaOutbox(DB_PATH, worker_id="a", max_attempts=2)
+    try:
+        outbox.enqueue([("u1", "h1")])
+        outbox.fail(outbox.lease(10), "boom")
+
+        assert outbox.lease(10) == []
+        assert outbox.stats() == {"pending": 0, "retry": 1, "leased": 0, "dead": 0}
+        error, next_attempt_at = outbox.conn.execute(
+            "SELECT last_error, next_attempt_at FROM chroma_outbox WHERE url = 'u1'").fetchone()
+        assert error == "boom"
+        assert next_attempt_at > time.time() + OUTBOX_BACKOFF_SECONDS * 0.75
+
+        # 백오프가 끝나면 다시 리스, 최대 시도 횟수를 넘기면 dead 로 남음
+        outbox.conn.execute("UPDATE chroma_outbox SET next_attempt_at = 0")
+        retried = outbox.lease(10)
+        assert [item["attempts"] for item in retried] == [2]
+        outbox.fail(retried, "boom again")
+        outbox.conn.execute("UPDATE chroma_outbox SET next_attempt_at = 0")
+        assert outbox.lease(10) == []
+        assert outbox.stats()["dead"] == 1
+
+        # 재등록(재수집/reconcile --repair)하면 시도 횟수 초기화
+        outbox.enqueue([("u1", "h1")])
+        assert [item["attempts"] for item in outbox.lease(10)] == [1]
+    finally:
+        outbox.close()
+
+
+def test_drain_more_than_one_lease_with_async_client(loop_bound_openai, chroma_path):
+    records = [make_record(i) for i in range(OUTBOX_BATCH_SIZE + 25)]
+    assert bulk_upsert_recalls(records, db_path=DB_PATH)["enqueued"] == len(records)
+
+    # 리스마다 embed_sync → 새 이벤트 루프 (같은 AsyncOpenAI 를 재사용하면 두 번째 리스부터 실패)
+    pipeline = EmbeddingPipeline(embedder=OpenAIEmbedder(model="loop-bound-test", api_key="test"), max_retries=0)
+    stats = drain_outbox(DB_PATH, chroma_path, pipeline=pipeline)
+
+    assert stats == {"synced": len(records), "removed": 0, "failed": 0, "requeued": 0}
+    assert loop_bound_openai.created == 2
+    assert outbox_rows() == {}
+
+    # 운영 모델이 아닌 벡터는 모델별 컬렉션에만
+    assert get_collection(chroma_path, "FDA_recalls__loop-bound-test").count() == len(records)
+    assert get_collection(chroma_path, "FDA_recalls") is None
+
+
+def test_reconcile_reports_and_repairs_drift(chroma_path):
+    ok, stale, missing, no_chunks, short = (make_record(i) for i in range(5))
+    short["content"] = "too short"
+    bulk_upsert_recalls([ok, stale, missing, no_chunks, short], db_path=DB_PATH)
+    hashes = content_hashes()
+    outbox = ChromaOutbox(DB_PATH)
+    try:
+        outbox.conn.execute("DELETE FROM chroma_outbox")
+        # 같은 내용으로 처리했는데 청크가 0개였던 URL → 누락 아님
+        outbox.conn.execute("INSERT INTO chroma_no_chunks (url, content_hash, checked_at) VALUES (?, ?, 0)",
+                            (no_chunks["url"], hashes[no_chunks["url"]]))
+    finally:
+        outbox.close()
+
+    collection = chromadb.PersistentClient(path=chroma_path).create_collection("FDA_recalls", embedding_function=None)
+    collection.add(
+        ids=[ok["url"], stale["url"], "https://www.fda.gov/recalls/deleted", short["url"]],
+        embeddings=[[1.0, 0.0]] * 4,
+        documents=["ok", "stale", "deleted", "short"],
+        metadatas=[
+            {"url": ok["url"], "content_hash": hashes[ok["url"]], "total_chunks": 1},
+            {"url": stale["url"], "content_hash": "old-hash", "total_chunks": 1},
+            {"url": "https://www.fda.gov/recalls/deleted", "total_chunks": 1},
+            {"url": short["url"], "content_hash": hashes[short["url"]], "total_chunks": 1},
+        ],
+    )
+
+    report = reconcile(DB_PATH, chroma_path)
+    assert (report["missing"], report["stale"], report["orphan_chunks"]) == (1, 1, 2)
+    assert outbox_rows() == {}
+
+    report = reconcile(DB_PATH, chroma_path, repair=True)
+    assert report["enqueued"] == 2
+    assert outbox_rows() == {missing["url"]: hashes[missing["url"]], stale["url"]: hashes[stale["url"]]}
+    assert sorted(collection.get(include=[])["ids"]) == sorted([ok["url"], stale["url"]])
@@ -0,0 +1,110 @@
+# tests/test_crawl_frontier.py
+"""crawl_frontier 작업 큐: 리스 독점/만료, 백오프 재시도, dead 처리 (tmp_path SQLite)"""
+import time
+
+import pytest
+
+from utils.crawl_frontier import BACKOFF_BASE_SECONDS, CrawlFrontier
+
+BRANDS = [
+    {"url": "https://www.fda.gov/recalls/older", "name": "Older", "date": "2025-01-08", "product_type": "food"},
+    {"url": "https://www.fda.gov/recalls/newer", "name": "Newer", "date": "2025-01-10", "product_type": "food"},
+]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "fda_recalls.db")
+
+
+@pytest.fixture
+def frontiers(db_path):
+    opened = []
+
+    def _open(worker_id, **kwargs):
+        frontier = CrawlFrontier(db_path, worker_id=worker_id, **kwargs)
+        opened.append(frontier)
+        return frontier
+
+    yield _open
+    for frontier in opened:
+        frontier.close()
+
+
+def expire(frontier, column):
+    frontier.conn.execute(f"UPDATE crawl_frontier SET {column} = ?", (time.time() - 1,))
+
+
+def test_enqueue_skips_known_urls_per_queue(frontiers, db_path):
+    frontier = frontiers("a")
+
+    assert frontier.enqueue(BRANDS) == 2
+    assert frontier.enqueue(BRANDS) == 0
+    # 다른 queue 는 별도 작업
+    other = CrawlFrontier(db_path, queue="json:brand_urls.json")
+    try:
+        assert other.enqueue(BRANDS[:1]) == 1
+        assert other.stats() == {"pending": 1}
+    finally:
+        other.close()
+    assert frontier.stats() == {"pending": 2}
+
+
+def test_lease_is_exclusive_until_expiry(frontiers):
+    first, second = frontiers("a", lease_seconds=60), frontiers("b", lease_seconds=60)
+    first.enqueue(BRANDS)
+
+    leased = first.lease(10)
+    # 최신 목록 날짜부터
+    assert [item["name"] for item in leased] == ["Newer", "Older"]
+    assert [item["attempts"] for item in leased] == [1, 1]
+    assert second.lease(10) == []
+    assert 0 < first.seconds_until_next_due() <= 60
+
+    # 워커가 죽어 리스가 만료되면 다른 워커가 이어받음
+    expire(first, "lease_expires_at")
+    taken = second.lease(10)
+    assert [item["attempts"] for item in taken] == [2, 2]
+
+    # 만료된 원래 워커의 완료/실패 기록은 무시
+    first.complete([item["url"] for item in leased])
+    first.fail(leased[0]["url"], "late failure")
+    assert second.stats() == {"leased": 2}
+
+    second.complete([item["url"] for item in taken])
+    assert second.stats() == {"done": 2}
+    assert second.lease(10) == []
+    assert second.seconds_until_next_due() is None
+
+
+def test_fail_backs_off_then_retries(frontiers):
+    frontier = frontiers("a")
+    frontier.enqueue(BRANDS[:1])
+    url = frontier.lease(1)[0]["url"]
+
+    assert frontier.fail(url, "timeout") == "retry"
+    assert frontier.lease(10) == []
+    assert BACKOFF_BASE_SECONDS * 0.75 < frontier.seconds_until_next_due() <= BACKOFF_BASE_SECONDS * 1.2
+
+    expire(frontier, "next_attempt_at")
+    assert [item["attempts"] for item in frontier.lease(10)] == [2]
+    assert frontier.states([url]) == {url: "leased"}
+
+
+def test_dead_letter_after_max_attempts(frontiers):
+    frontier = frontiers("a", max_attempts=2)
+    frontier.enqueue(BRANDS[:1])
+    url = BRANDS[0]["url"]
+
+    frontier.lease(1)
+    assert frontier.fail(url, "HTTP 500") == "retry"
+    expire(frontier, "next_attempt_at")
+    frontier.lease(1)
+    assert frontier.fail(url, "HTTP 404") == "dead"
+
+    expire(frontier, "next_attempt_at")
+    assert frontier.lease(10) == []
+    assert frontier.seconds_until_next_due() is None
+    assert frontier.stats() == {"dead": 1}
+    assert [(item["url"], item["attempts"], item["last_error"]) for item in frontier.dead_items()] == [
+        (url, 2, "HTTP 404")]
@@ -0,0 +1,106 @@
+# tests/test_db_utils.py
+"""bulk_upsert_recalls: 신규/변경/변경 없음 집계, content_hash 가 같은 행은 건드리지 않음 (tmp_path SQLite)"""
+import sqlite3
+
+import pytest
+
+from db_utils import bulk_upsert_recalls
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "fda_recalls.db")
+
+
+def make_record(slug, content="Undeclared milk in peanut butter cookies sold nationwide.", **extra):
+    return {"url": f"https://www.fda.gov/recalls/{slug}", "company_name": slug.title(),
+            "fda_publish_date": "2025-01-10", "content": content, **extra}
+
+
+def fetch_rows(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        return {row["url"]: dict(row) for row in conn.execute("SELECT * FROM recalls")}
+    finally:
+        conn.close()
+
+
+def outbox_urls(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return {row[0] for row in conn.execute("SELECT url FROM chroma_outbox")}
+    finally:
+        conn.close()
+
+
+def test_counts_inserted_updated_unchanged(db_path):
+    acme, beta = make_record("acme"), make_record("beta")
+    assert bulk_upsert_recalls([acme, beta], db_path=db_path) == {
+        "inserted": 2, "updated": 0, "unchanged": 0, "failed": 0, "enqueued": 2}
+    before = fetch_rows(db_path)
+
+    changed = make_record("beta", content="Updated: undeclared milk and egg in cookies sold nationwide.")
+    stats = bulk_upsert_recalls([acme, changed, make_record("gamma"), {"content": "url 없음"}], db_path=db_path)
+
+    assert stats == {"inserted": 1, "updated": 1, "unchanged": 1, "failed": 1, "enqueued": 2}
+    after = fetch_rows(db_path)
+    # 변경 없는 행은 그대로 (ON CONFLICT ... WHERE content_hash 다를 때만 UPDATE)
+    assert after[acme["url"]] == before[acme["url"]]
+    # 변경된 행은 같은 id 로 내용과 해시만 갱신
+    assert after[changed["url"]]["id"] == before[changed["url"]]["id"]
+    assert after[changed["url"]]["content"] == changed["content"]
+    assert after[changed["url"]]["content_hash"] != before[changed["url"]]["content_hash"]
+
+
+def test_unchanged_rows_are_not_written(db_path):
+    acme = make_record("acme")
+    bulk_upsert_recalls([acme], db_path=db_path)
+    conn = sqlite3.connect(db_path)
+    try:
+        # UPDATE 가 실행되면 덮어써질 표시값
+        conn.execute("UPDATE recalls SET created_at = '2000-01-01 00:00:00'")
+        conn.execute("DELETE FROM chroma_outbox")
+        conn.commit()
+    finally:
+        conn.close()
+
+    assert bulk_upsert_recalls([acme], db_path=db_path)["unchanged"] == 1
+    assert fetch_rows(db_path)[acme["url"]]["created_at"] == "2000-01-01 00:00:00"
+    assert outbox_urls(db_path) == set()
+
+
+def test_duplicate_urls_in_batch_use_last_value(db_path):
+    first = make_record("acme", content="First version of the recall announcement text.")
+    last = make_record("acme", content="Last version of the recall announcement text.")
+
+    stats = bulk_upsert_recalls([first, last], db_path=db_path)
+
+    assert (stats["inserted"], stats["updated"], stats["unchanged"]) == (1, 0, 0)
+    assert fetch_rows(db_path)[last["url"]]["content"] == last["content"]
+
+
+def test_enqueue_chroma_false_skips_outbox(db_path):
+    stats = bulk_upsert_recalls([make_record("acme")], db_path=db_path, enqueue_chroma=False)
+
+    assert (stats["inserted"], stats["enqueued"]) == (1, 0)
+    assert outbox_urls(db_path) == set()
+
+
+def test_legacy_table_without_content_hash_is_migrated(db_path):
+    acme = make_record("acme")
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("CREATE TABLE recalls (id INTEGER PRIMARY KEY AUTOINCREMENT, document_type TEXT, url TEXT UNIQUE, "
+                     "company_announcement_date DATE, fda_publish_date DATE, company_name TEXT, brand_name TEXT, "
+                     "recall_reason TEXT, recall_reason_detail TEXT, product_type TEXT, content TEXT, "
+                     "created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)")
+        conn.execute("INSERT INTO recalls (url, content) VALUES (?, ?)", (acme["url"], acme["content"]))
+        conn.commit()
+    finally:
+        conn.close()
+
+    # 해시가 없던 행은 한 번 "변경"으로 채워지고, 그 다음부터는 변경 없음
+    assert bulk_upsert_recalls([acme], db_path=db_path)["updated"] == 1
+    assert fetch_rows(db_path)[acme["url"]]["content_hash"]
+    assert bulk_upsert_recalls([acme], db_path=db_path)["unchanged"] == 1
@@ -0,0 +1,25 @@
+# tests/test_embedding_pipeline.py
+"""임베딩 파이프라인: embed_sync 를 여러 번 호출해도 (호출마다 새 이벤트 루프) 클라이언트가 동작하는지"""
+import asyncio
+
+from utils.embedding_pipeline import EmbeddingPipeline, OpenAIEmbedder
+
+
+def test_openai_embedder_survives_new_event_loops(loop_bound_openai):
+    pipeline = EmbeddingPipeline(embedder=OpenAIEmbedder(api_key="test"), max_retries=0)
+
+    assert pipeline.embed_sync(["a", "bb"]) == [[1.0], [2.0]]
+    assert pipeline.embed_sync(["ccc"]) == [[3.0]]
+    assert loop_bound_openai.created == 2
+    assert pipeline.requests == 2
+
+
+def test_openai_embedder_reuses_client_within_loop(loop_bound_openai):
+    pipeline = EmbeddingPipeline(embedder=OpenAIEmbedder(api_key="test"), batch_size=1, max_retries=0)
+
+    async def _twice():
+        return await pipeline.embed(["a", "bb"]), await pipeline.embed(["ccc"])
+
+    assert asyncio.run(_twice()) == ([[1.0], [2.0]], [[3.0]])
+    assert loop_bound_openai.created == 1
+    assert pipeline.requests == 3
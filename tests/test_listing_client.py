@@ -0,0 +1,125 @@
+# tests/test_listing_client.py
+"""DataTables 목록 JSON 해석 / 빈·손상 응답 처리 (네트워크 없음, 녹화한 응답 사용)"""
+import copy
+import json
+import os
+
+import pytest
+
+from utils.listing_client import ListingClient, ListingEndpointError
+from utils.recall_parser import is_food_beverage, listing_rows_from_datatables
+
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "datatables_listing.json")
+BASE = "https://www.fda.gov/safety/recalls-market-withdrawals-safety-alerts/"
+
+
+@pytest.fixture
+def payload():
+    with open(FIXTURE_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class FakeResponse:
+    def __init__(self, payload, status_code=200):
+        self.status_code = status_code
+        self.text = json.dumps(payload)
+        self.content = self.text.encode("utf-8")
+        self.headers = {}
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+
+class FakeLimiter:
+    """ListingClient 가 쓰는 limiter.get 만 흉내 (요청 params 기록)"""
+
+    def __init__(self, payload):
+        self.payload = payload
+        self.calls = []
+
+    def get(self, url, session=None, **kwargs):
+        self.calls.append(kwargs["params"])
+        return FakeResponse(self.payload)
+
+
+def make_client(payload):
+    return ListingClient(limiter=FakeLimiter(payload), params={"view_name": "recall_solr_index"})
+
+
+def test_rows_from_datatables(payload):
+    rows = listing_rows_from_datatables(payload["data"])
+
+    # 상세 링크가 없는 행은 제외
+    assert len(rows) == 4
+    assert rows[0] == {
+        "name": "Acme Foods",
+        "url": BASE + "acme-foods-recalls-peanut-butter-cookies-because-undeclared-milk",
+        "date": "2025-01-10",
+        "product_type": "food & beverages, allergens",
+    }
+    # 절대 URL은 그대로, 공백 정리
+    assert rows[2]["url"] == BASE + "happy-paws-recalls-dog-treats-due-salmonella"
+    assert rows[3]["name"] == "Green Valley Farms"
+    assert rows[3]["product_type"] == "food & beverages, produce"
+    assert [row["date"] for row in rows] == ["2025-01-10", "2025-01-09", "2025-01-08", "2025-01-07"]
+
+
+def test_food_beverage_filter(payload):
+    rows = listing_rows_from_datatables(payload["data"])
+    selected = [row["name"] for row in rows if is_food_beverage(row["product_type"])]
+
+    # 첫 번째 제품타입이 Food & Beverages 인 행만 (Drugs / Animal & Veterinary 우선 행 제외)
+    assert selected == ["Acme Foods", "Green Valley Farms"]
+
+
+def test_fetch_returns_page(payload):
+    client = make_client(payload)
+    page = client.fetch(0, 5)
+
+    assert page["total"] == 5
+    assert page["raw_count"] == 5
+    assert len(page["rows"]) == 4
+    assert client.limiter.calls[0]["start"] == 0
+    assert client.limiter.calls[0]["length"] == 5
+
+
+@pytest.mark.parametrize("total", [1200, None])
+def test_empty_first_page_is_endpoint_error(payload, total):
+    degraded = {**payload, "data": []}
+    degraded.pop("recordsTotal")
+    degraded["recordsFiltered"] = total
+    if total is None:
+        degraded.pop("recordsFiltered")
+
+    with pytest.raises(ListingEndpointError):
+        make_client(degraded).fetch(0, 20)
+
+
+def test_empty_listing_with_zero_total_is_not_error(payload):
+    empty = {**payload, "data": [], "recordsTotal": 0, "recordsFiltered": 0}
+    page = make_client(empty).fetch(0, 20)
+
+    assert page == {"total": 0, "raw_count": 0, "rows": []}
+
+
+def test_empty_page_past_first_is_end_of_listing(payload):
+    tail = {**payload, "data": []}
+    page = make_client(tail).fetch(200, 200)
+
+    assert page["raw_count"] == 0
+
+
+def test_unparseable_rows_are_endpoint_error(payload):
+    # 셀 마크업이 바뀌어 링크가 사라진 경우
+    broken = copy.deepcopy(payload)
+    for cells in broken["data"]:
+        cells[1] = "no link here"
+
+    with pytest.raises(ListingEndpointError):
+        make_client(broken).fetch(0, 20)
+
+
+def test_missing_data_array_is_endpoint_error(payload):
+    with pytest.raises(ListingEndpointError):
+        make_client({"draw": 1, "recordsTotal": 5}).fetch(0, 20)
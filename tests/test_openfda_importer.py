@@ -0,0 +1,51 @@
+# tests/test_openfda_importer.py
+"""openFDA 덤프 스트리밍 파서 (읽기 단위를 아주 작게 해서 값이 경계에서 잘리는 경우 확인)"""
+import io
+import json
+import os
+import zipfile
+
+import pytest
+
+import openfda_importer
+from openfda_importer import iter_enforcement_records, iter_json_array_items, map_enforcement_record
+
+FIXTURE_ZIP = os.path.join(os.path.dirname(__file__), "fixtures", "food-enforcement-sample.json.zip")
+
+
+def expected_records():
+    with zipfile.ZipFile(FIXTURE_ZIP) as zf:
+        return json.loads(zf.read("food-enforcement-0001-of-0001.json").decode("utf-8"))["results"]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 7, 64, 1 << 20])
+def test_zip_records_across_chunk_sizes(monkeypatch, chunk_size):
+    monkeypatch.setattr(openfda_importer, "READ_CHUNK_SIZE", chunk_size)
+
+    assert list(iter_enforcement_records(FIXTURE_ZIP)) == expected_records()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 4])
+@pytest.mark.parametrize("number", ["3.5", "1234", "-7.25e2", "0.001"])
+def test_numbers_split_at_read_boundary(monkeypatch, chunk_size, number):
+    monkeypatch.setattr(openfda_importer, "READ_CHUNK_SIZE", chunk_size)
+    text = '{"meta": {"total": %s}, "results": [%s, {"n": %s}, [%s]]}' % (number, number, number, number)
+
+    value = json.loads(number)
+    assert list(iter_json_array_items(io.StringIO(text))) == [value, {"n": value}, [value]]
+
+
+def test_missing_results_key_yields_nothing(monkeypatch):
+    monkeypatch.setattr(openfda_importer, "READ_CHUNK_SIZE", 3)
+
+    assert list(iter_json_array_items(io.StringIO('{"meta": {"total": 0}}'))) == []
+
+
+def test_map_enforcement_record():
+    record = map_enforcement_record(expected_records()[0])
+
+    assert record["url"].endswith('recall_number:"F-0412-2024"')
+    assert record["company_announcement_date"] == "2023-12-15"
+    assert record["fda_publish_date"] == "2024-01-17"
+    assert record["recall_reason"] == "Allergens"
+    assert "Reason for Recall: Undeclared milk" in record["content"]
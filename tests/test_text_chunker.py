@@ -0,0 +1,44 @@
+# tests/test_text_chunker.py
+"""토큰 기준 청커: 청크 토큰 상한 / 원문 위치 (근사치와 인코더 두 경로)"""
+import pytest
+
+from utils import text_chunker
+from utils.text_chunker import chunk_text
+
+
+class CharPairEncoder:
+    """2자마다 1토큰으로 세는 가짜 인코더 (tiktoken 대신)"""
+
+    def encode(self, text, disallowed_special=()):
+        return [text[i:i + 2] for i in range(0, len(text), 2)]
+
+
+@pytest.fixture(params=["approx", "encoder"])
+def token_counter(request, monkeypatch):
+    monkeypatch.setattr(text_chunker, "_encoder_loaded", True)
+    monkeypatch.setattr(text_chunker, "_encoder", CharPairEncoder() if request.param == "encoder" else None)
+    return request.param
+
+
+@pytest.mark.parametrize("text", [
+    "x" * 5000,
+    "Lot codes: " + "A1B2C3" * 400 + " and https://www.fda.gov/" + "q" * 900 + " end.",
+], ids=["unbroken", "lot-code-and-url"])
+def test_oversized_words_are_split(token_counter, text):
+    chunks = chunk_text(text, max_tokens=50, overlap_tokens=10)
+
+    assert len(chunks) > 1
+    assert all(chunk.tokens <= 50 for chunk in chunks)
+    assert all(text_chunker.count_tokens(chunk.text) <= 50 for chunk in chunks)
+    # 청크는 원문 구간 그대로이고 원문 전체를 덮음
+    assert all(chunk.text == text[chunk.start:chunk.end] for chunk in chunks)
+    assert chunks[0].start == 0 and chunks[-1].end == len(text)
+    assert all(not text[prev.end:nxt.start].strip() for prev, nxt in zip(chunks, chunks[1:]))
+
+
+def test_short_words_keep_word_boundaries(token_counter):
+    text = " ".join(f"word{i}" for i in range(300))
+    chunks = chunk_text(text, max_tokens=40, overlap_tokens=0)
+
+    assert all(chunk.tokens <= 40 for chunk in chunks)
+    assert all(chunk.text.startswith("word") and chunk.text[-1].isdigit() for chunk in chunks)
@@ -0,0 +1,125 @@
+# utils/batch_parser.py
+"""
+저장된 HTML 일괄 재파싱 (프로세스 풀)
+- 파서가 바뀌었을 때 HTML 캐시나 HTML 폴더 전체를 네트워크 없이 다시 추출
+- 각 워커가 파일을 직접 읽고 파싱 (큰 HTML을 프로세스 사이로 넘기지 않음)
+- CPU 코어 수만큼 병렬로 확장
+
+사용 예:
+    python -m utils.batch_parser --cache ./data/html_cache --out reparsed.json
+    python -m utils.batch_parser --dir ./saved_pages --kind listing --workers 8
+"""
+import os
+import json
+import gzip
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from utils.html_cache import DEFAULT_CACHE_DIR, HtmlCache, object_path
+from utils.recall_parser import LISTING_BASE_URL, parse_listing, parse_recall_detail
+
+HTML_SUFFIXES = (".html", ".htm", ".html.gz")
+
+# (url, 파일 경로, 종류 'detail'/'listing', 본문 sha256 또는 None)
+ParseTask = Tuple[str, str, str, Optional[str]]
+
+
+def _read_html(path: str) -> str:
+    if path.endswith(".gz"):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return f.read()
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def parse_task(task: ParseTask) -> Dict[str, Any]:
+    """워커에서 실행: 파일 1개 읽기 + 파싱 → {url, kind, sha256, result, error}"""
+    url, path, kind, sha = task
+    outcome = {"url": url, "kind": kind, "sha256": sha, "result": None, "error": None}
+    try:
+        html = _read_html(path)
+        if kind == "listing":
+            outcome["result"] = parse_listing(html)
+        else:
+            outcome["result"] = parse_recall_detail(html, url)
+    except (OSError, ValueError) as e:
+        outcome["error"] = str(e)
+    return outcome
+
+
+def is_listing_key(url: str) -> bool:
+    """캐시 키가 목록 페이지인지 (#page-N 또는 목록 기본 URL)"""
+    return "#page-" in url or url == LISTING_BASE_URL
+
+
+def cache_tasks(cache: HtmlCache, kind: str = "detail", url_prefix: str = LISTING_BASE_URL) -> List[ParseTask]:
+    """HTML 캐시(index.db)의 페이지 목록 → 파싱 작업"""
+    tasks = []
+    for entry in cache.iter_pages(url_prefix):
+        if is_listing_key(entry["url"]) != (kind == "listing"):
+            continue
+        tasks.append((entry["url"], object_path(cache.cache_dir, entry["sha256"]), kind, entry["sha256"]))
+    return tasks
+
+
+def directory_tasks(directory: str, kind: str = "detail") -> List[ParseTask]:
+    """폴더 안의 HTML 파일 → 파싱 작업 (url 자리에는 파일 경로)"""
+    tasks = []
+    for root, _, files in os.walk(directory):
+        for name in sorted(files):
+            if name.endswith(HTML_SUFFIXES):
+                path = os.path.join(root, name)
+                tasks.append((path, path, kind, None))
+    return tasks
+
+
+def parse_batch(tasks: Iterable[ParseTask], workers: Optional[int] = None,
+                chunksize: int = 16) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    작업 목록을 프로세스 풀로 파싱
+    반환: {"parsed": [성공 outcome...], "failed": [실패 outcome...]}
+    """
+    tasks = list(tasks)
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+
+    if workers == 1 or len(tasks) < 2:
+        outcomes = [parse_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            outcomes = list(pool.map(parse_task, tasks, chunksize=chunksize))
+
+    parsed = [o for o in outcomes if o["error"] is None]
+    failed = [o for o in outcomes if o["error"] is not None]
+    seconds = time.perf_counter() - started
+    rate = len(tasks) / seconds if seconds else 0.0
+    print(f"🧩 일괄 파싱: {len(parsed)}개 성공, {len(failed)}개 실패 "
+          f"({workers}개 프로세스, {seconds:.2f}초, {rate:.1f} 페이지/초)")
+    for outcome in failed[:10]:
+        print(f"  ⚠️ {outcome['url']} - {outcome['error']}")
+    return {"parsed": parsed, "failed": failed}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="저장된 HTML 일괄 재파싱")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--cache", metavar="DIR", nargs="?", const=DEFAULT_CACHE_DIR, help="HTML 캐시 폴더")
+    source.add_argument("--dir", metavar="DIR", help="HTML 파일 폴더 (.html / .htm / .html.gz)")
+    parser.add_argument("--kind", choices=["detail", "listing"], default="detail")
+    parser.add_argument("--workers", type=int, default=None, help="프로세스 수 (기본: CPU 코어 수)")
+    parser.add_argument("--out", help="결과 JSON 파일 경로")
+    args = parser.parse_args()
+
+    if args.cache:
+        cache = HtmlCache(args.cache)
+        tasks = cache_tasks(cache, args.kind)
+        cache.close()
+    else:
+        tasks = directory_tasks(args.dir, args.kind)
+    batch = parse_batch(tasks, workers=args.workers)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump([o["result"] for o in batch["parsed"]], f, ensure_ascii=False, indent=2)
+        print(f"💾 저장: {args.out}")
@@ -0,0 +1,178 @@
+# utils/boilerplate.py
+"""
+리콜 공지 상투 문단 제거 (청킹/임베딩 전 단계)
+- 문단 지문: 소문자 + 숫자 마스킹(전화번호/날짜) + 공백·기호 정리 후 sha1
+- 코퍼스 전체에서 지문별 등장 문서 수(document frequency)를 fda_recalls.db 에 누적
+- 일정 비율 이상 문서에 나오는 긴 문단("This recall is being made with the knowledge of the FDA" 등)은
+  색인 대상에서 제외 → 청크 수 / 임베딩 비용 / 답변 LLM 프롬프트 토큰 감소
+- 원문은 SQLite recalls.content 에 그대로 두고, 청커에 제외 위치만 넘김 (청크 offset 은 원문 기준 유지)
+
+사용 예 (기존 코퍼스로 학습 + 상위 상투 문단 확인):
+    python -m utils.boilerplate --learn-from-db --top 20
+"""
+import os
+import re
+import hashlib
+import sqlite3
+import argparse
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+from utils.text_chunker import count_tokens, paragraph_spans
+
+BOILERPLATE_DB_PATH = "./data/fda_recalls.db"
+BOILERPLATE_ENABLED = os.getenv("BOILERPLATE_ENABLED", "1") != "0"
+
+# 이 문서 수 이상, 그리고 전체 문서의 이 비율 이상에 나오면 상투 문단
+BOILERPLATE_MIN_DOCS = int(os.getenv("BOILERPLATE_MIN_DOCS", "5"))
+BOILERPLATE_MIN_RATIO = float(os.getenv("BOILERPLATE_MIN_RATIO", "0.01"))
+# 짧은 문단(소제목 "Product Description" 등)은 문맥에 필요하므로 제외 대상 아님
+BOILERPLATE_MIN_WORDS = 8
+
+_DIGITS_RE = re.compile(r"\d+")
+_NON_WORD_RE = re.compile(r"[^\w]+", re.UNICODE)
+
+CREATE_BOILERPLATE_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS paragraph_df (
+        fingerprint TEXT PRIMARY KEY,
+        doc_count INTEGER NOT NULL,
+        sample TEXT,
+        updated_at TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS paragraph_df_docs (
+        url TEXT PRIMARY KEY,
+        learned_at TIMESTAMP
+    )
+    """,
+]
+
+
+def normalize_paragraph(paragraph: str) -> str:
+    text = _DIGITS_RE.sub("0", paragraph.lower())
+    return _NON_WORD_RE.sub(" ", text).strip()
+
+
+def paragraph_fingerprint(paragraph: str) -> str:
+    """숫자/공백/기호 차이를 무시한 문단 지문"""
+    return hashlib.sha1(normalize_paragraph(paragraph).encode("utf-8")).hexdigest()
+
+
+def _fingerprinted_paragraphs(text: str) -> List[Tuple[int, int, str]]:
+    """(start, end, 지문) - 짧은 문단은 제외"""
+    spans = []
+    for start, end in paragraph_spans(text or ""):
+        paragraph = text[start:end]
+        if len(paragraph.split()) >= BOILERPLATE_MIN_WORDS:
+            spans.append((start, end, paragraph_fingerprint(paragraph)))
+    return spans
+
+
+class BoilerplateFilter:
+    """문단 지문 document frequency 저장소 + 상투 문단 위치 계산"""
+
+    def __init__(self, db_path: str = BOILERPLATE_DB_PATH, min_docs: int = BOILERPLATE_MIN_DOCS,
+                 min_ratio: float = BOILERPLATE_MIN_RATIO):
+        self.db_path = db_path
+        self.min_docs = min_docs
+        self.min_ratio = min_ratio
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        for sql in CREATE_BOILERPLATE_SQL:
+            self.conn.execute(sql)
+        self.conn.commit()
+        self._boilerplate = None
+
+        # 통계
+        self.paragraphs_removed = 0
+        self.tokens_removed = 0
+
+    def close(self):
+        self.conn.close()
+
+    def learn(self, items: List[Dict[str, Any]], text_key: str = "content") -> int:
+        """아직 학습하지 않은 URL의 문단 지문을 누적 → 새로 학습한 문서 수"""
+        now = datetime.now().isoformat(timespec="seconds")
+        learned = 0
+        with self.conn:
+            for item in items:
+                url = item.get("url")
+                if not url:
+                    continue
+                cursor = self.conn.execute("INSERT OR IGNORE INTO paragraph_df_docs (url, learned_at) VALUES (?, ?)",
+                                           (url, now))
+                if not cursor.rowcount:
+                    continue  # 재수집된 문서는 다시 세지 않음
+                text = item.get(text_key) or ""
+                seen = {}
+                for start, end, fingerprint in _fingerprinted_paragraphs(text):
+                    seen.setdefault(fingerprint, text[start:end][:300])
+                self.conn.executemany("""
+                    INSERT INTO paragraph_df (fingerprint, doc_count, sample, updated_at) VALUES (?, 1, ?, ?)
+                    ON CONFLICT(fingerprint) DO UPDATE SET doc_count = doc_count + 1, updated_at = excluded.updated_at
+                """, [(fingerprint, sample, now) for fingerprint, sample in seen.items()])
+                learned += 1
+        self._boilerplate = None
+        return learned
+
+    def threshold(self) -> int:
+        total_docs = self.conn.execute("SELECT COUNT(*) FROM paragraph_df_docs").fetchone()[0]
+        return max(self.min_docs, int(total_docs * self.min_ratio))
+
+    def boilerplate_fingerprints(self) -> set:
+        if self._boilerplate is None:
+            rows = self.conn.execute("SELECT fingerprint FROM paragraph_df WHERE doc_count >= ?",
+                                     (self.threshold(),)).fetchall()
+            self._boilerplate = {row[0] for row in rows}
+        return self._boilerplate
+
+    def boilerplate_spans(self, text: str) -> List[Tuple[int, int]]:
+        """text 안의 상투 문단 위치 (긴 문단이 전부 상투 문단이면 빈 목록 → 원문 그대로 색인)"""
+        boilerplate = self.boilerplate_fingerprints()
+        if not text or not boilerplate:
+            return []
+        paragraphs = _fingerprinted_paragraphs(text)
+        spans = [(start, end) for start, end, fingerprint in paragraphs if fingerprint in boilerplate]
+        if len(spans) == len(paragraphs):
+            return []  # 본문 문단이 하나도 안 남으면 문서가 색인에서 빠지므로 제외하지 않음
+        self.paragraphs_removed += len(spans)
+        self.tokens_removed += sum(count_tokens(text[start:end]) for start, end in spans)
+        return spans
+
+    def top(self, limit: int = 20) -> List[Dict[str, Any]]:
+        rows = self.conn.execute("""
+            SELECT doc_count, sample FROM paragraph_df WHERE doc_count >= ? ORDER BY doc_count DESC LIMIT ?
+        """, (self.threshold(), limit)).fetchall()
+        return [{"doc_count": doc_count, "sample": sample} for doc_count, sample in rows]
+
+    def print_stats(self):
+        if self.paragraphs_removed:
+            print(f"✂️ 상투 문단 제외: {self.paragraphs_removed}개 문단 (약 {self.tokens_removed} 토큰)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="리콜 공지 상투 문단 학습/확인")
+    parser.add_argument("--db", default=BOILERPLATE_DB_PATH)
+    parser.add_argument("--learn-from-db", action="store_true", help="recalls 테이블 전체로 문단 빈도 학습")
+    parser.add_argument("--top", type=int, default=20, help="상투 문단 상위 N개 출력")
+    args = parser.parse_args()
+
+    boilerplate_filter = BoilerplateFilter(args.db)
+    if args.learn_from_db:
+        conn = sqlite3.connect(args.db)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.execute("SELECT url, content FROM recalls")
+        learned = 0
+        while True:
+            rows = cursor.fetchmany(2000)
+            if not rows:
+                break
+            learned += boilerplate_filter.learn([dict(row) for row in rows])
+        conn.close()
+        print(f"📚 문단 빈도 학습: 새 문서 {learned}개 (상투 문단 기준 {boilerplate_filter.threshold()}개 문서 이상)")
+
+    for entry in boilerplate_filter.top(args.top):
+        print(f"  {entry['doc_count']:>6}  {entry['sample'][:120]}")
+    boilerplate_filter.close()
@@ -12,6 +12,7 @@ import openai
 from datetime import timedelta
 import os
 from dotenv import load_dotenv
+from utils.rate_limiter import get_rate_limiter
 
 load_dotenv()
 openai.api_key = os.getenv("OPENAI_API_KEY")
@@ -29,6 +30,18 @@ logging.basicConfig(
 )
 logger = logging.getLogger()
 
+# eCFR / OpenAI 호출 속도는 호스트별 제한기가 조절 (고정 sleep 대신)
+rate_limiter = get_rate_limiter()
+OPENAI_HOST = "api.openai.com"
+
+
+def record_openai_failure(error):
+    """API 상태 오류 / 연결·타임아웃만 제한기에 보고 (응답 파싱 오류 등은 속도를 줄일 이유가 아님)"""
+    if isinstance(error, openai.APIStatusError):
+        rate_limiter.record(OPENAI_HOST, error.status_code)
+    elif isinstance(error, openai.APIConnectionError):  # APITimeoutError 포함
+        rate_limiter.record(OPENAI_HOST, None)
+
 # 현재 날짜와 시간을 파일명에 사용할 형식으로 가져오기
 current_datetime = datetime.now().strftime("%Y%m%d_%H%M%S")
 output_filename = f"./risk_federal_changes_{current_datetime}.json"
@@ -82,10 +95,6 @@ def translate_to_korean(text, max_retries=3):
         logger.info(f"번역 중... 청크 {i+1}/{total_chunks} (길이: {len(chunk)}자)")
         translated_chunk = _translate_chunk(chunk, max_retries)
         translated_chunks.append(translated_chunk)
-        
-        # API 호출 간 잠시 대기 (레이트 리밋 방지)
-        if i < len(chunks) - 1:
-            time.sleep(2)  # 2초 대기
     
     return ''.join(translated_chunks)
 
@@ -93,30 +102,32 @@ def _translate_chunk(text, max_retries=3):
     """단일 텍스트 청크를 번역"""
     for attempt in range(max_retries):
         try:
-            response = openai.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "당신은 전문 번역가입니다. 미국 연방 규정(CFR)의 영어 텍스트를 정확하고 자연스러운 한국어로 번역해주세요. 법률 및 규제 용어는 정확하게 번역하되, 한국어로 읽기 쉽게 번역해주세요. 원본의 구조와 형식을 최대한 유지해주세요."
-                    },
-                    {
-                        "role": "user",
-                        "content": f"다음 텍스트를 한국어로 번역해주세요:\n\n{text}"
-                    }
-                ],
-                max_tokens=4000,
-                temperature=0.3
-            )
+            with rate_limiter.slot(OPENAI_HOST):
+                response = openai.chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": "당신은 전문 번역가입니다. 미국 연방 규정(CFR)의 영어 텍스트를 정확하고 자연스러운 한국어로 번역해주세요. 법률 및 규제 용어는 정확하게 번역하되, 한국어로 읽기 쉽게 번역해주세요. 원본의 구조와 형식을 최대한 유지해주세요."
+                        },
+                        {
+                            "role": "user",
+                            "content": f"다음 텍스트를 한국어로 번역해주세요:\n\n{text}"
+                        }
+                    ],
+                    max_tokens=4000,
+                    temperature=0.3
+                )
+            rate_limiter.record(OPENAI_HOST, 200)
             
             translated_text = response.choices[0].message.content.strip()
             return translated_text
             
         except Exception as e:
             logger.warning(f"번역 시도 {attempt + 1}/{max_retries} 실패: {str(e)}")
-            if attempt < max_retries - 1:
-                time.sleep(5 * (attempt + 1))  # 점진적으로 대기 시간 증가
-            else:
+            # API 오류면 제한기가 속도를 줄이고 다음 호출을 잠시 늦춤
+            record_openai_failure(e)
+            if attempt == max_retries - 1:
                 logger.error(f"번역 실패, 원본 텍스트 반환: {str(e)}")
                 return text  # 번역 실패 시 원본 반환
 
@@ -225,7 +236,7 @@ def get_recent_changes():
     }
     
     try:
-        response = requests.get(url, headers=headers, timeout=30)
+        response = rate_limiter.get(url, headers=headers, timeout=30)
         response.raise_for_status()
         
         # 디버깅을 위해 HTML 저장
@@ -407,7 +418,7 @@ def get_part_data(subchapter_letter, part_num, url=None):
     
     while retry_count < max_retries:
         try:
-            response = requests.get(url, headers=headers, timeout=30)
+            response = rate_limiter.get(url, headers=headers, timeout=30)
             response.raise_for_status()
             
             # with open(f'debug_page_{part_num}.html', 'w', encoding='utf-8') as f:
@@ -603,9 +614,8 @@ def get_part_data(subchapter_letter, part_num, url=None):
                 logger.error(f"최대 재시도 횟수 초과: {url}, 오류: {str(e)}")
                 return None
             
-            wait_time = 5 * retry_count
-            logger.warning(f"요청 오류, {wait_time}초 대기 후 재시도 ({retry_count}/{max_retries}): {str(e)}")
-            time.sleep(wait_time)
+            # 대기 시간은 rate_limiter가 응답 코드(403/429/5xx)와 Retry-After로 결정
+            logger.warning(f"요청 오류, 재시도 ({retry_count}/{max_retries}): {str(e)}")
         
         except Exception as e:
             logger.error(f"데이터 처리 중 오류 발생: {url}, 오류: {str(e)}")
@@ -663,20 +673,21 @@ def summarize_korean_text(text, max_retries=3):
     """
     for attempt in range(max_retries):
         try:
-            response = openai.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": "당신은 한국어 요약 전문가입니다."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                max_tokens=700  # 1,000자 내외로 제한
-            )
+            with rate_limiter.slot(OPENAI_HOST):
+                response = openai.chat.completions.create(
+                    model="gpt-4o",
+                    messages=[
+                        {"role": "system", "content": "당신은 한국어 요약 전문가입니다."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.3,
+                    max_tokens=700  # 1,000자 내외로 제한
+                )
+            rate_limiter.record(OPENAI_HOST, 200)
             return response.choices[0].message.content.strip()
         except Exception as e:
-            if attempt < max_retries - 1:
-                time.sleep(2 * (attempt + 1))
-            else:
+            record_openai_failure(e)
+            if attempt == max_retries - 1:
                 return "요약 실패"
 
 
@@ -733,11 +744,6 @@ def main():
                 
             except Exception as e:
                 logger.error(f"Subchapter {part_info['subchapter']}, Part {part_info['part_number']} 결과 처리 중 오류: {str(e)}")
-        
-        # 배치 간 대기 (API 제한 고려하여 더 긴 대기)
-        if batch_index < len(batches) - 1:
-            logger.info(f"다음 배치 전 30초 대기... (API 레이트 리밋 고려)")
-            time.sleep(30)
     
     # 결과가 없으면 종료
     if not all_data:
@@ -758,6 +764,8 @@ def main():
     logger.info(f"처리 완료! 총 {len(all_data)} 파트의 변경된 규정이 추출되고 번역되었습니다.")
     logger.info(f"파일 저장 완료: {output_filename}")
     logger.info(f"총 소요 시간: {elapsed_time:.2f}초")
+    for host, stats in rate_limiter.stats().items():
+        logger.info(f"속도 제한 {host}: {stats}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,198 @@
+# utils/chroma_outbox.py
+"""
+SQLite → ChromaDB 동기화용 outbox (fda_recalls.db 안의 chroma_outbox 테이블)
+- recalls upsert 와 같은 트랜잭션에서 신규/변경 URL을 기록 → SQLite 저장 후 Chroma 단계가 죽어도 작업이 남음
+- 워커는 리스(lease)로 작업을 가져가 Chroma upsert 후 삭제, 실패하면 지수 백오프로 재시도
+- 처리 중 같은 URL이 다시 바뀌면(content_hash 변경) 완료 처리하지 않고 다음 차례에 다시 처리
+- 최대 시도 횟수를 넘긴 작업은 남겨두고(stats 의 dead) reconcile --repair 또는 재수집 때 초기화
+- 처리 결과 청크가 하나도 없던 URL(짧은 본문/근접 중복 등)은 chroma_no_chunks 에 해시와 함께 기록
+  → reconcile 이 같은 내용을 "누락"으로 보고 계속 다시 등록하지 않음
+"""
+import os
+import time
+import random
+import socket
+import sqlite3
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+OUTBOX_DB_PATH = "./data/fda_recalls.db"
+
+OUTBOX_LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", "900"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_BACKOFF_SECONDS = int(os.getenv("OUTBOX_BACKOFF_SECONDS", "60"))
+OUTBOX_BACKOFF_MAX_SECONDS = 6 * 3600
+
+CREATE_OUTBOX_SQL = """
+CREATE TABLE IF NOT EXISTS chroma_outbox (
+    url TEXT PRIMARY KEY,
+    content_hash TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    lease_owner TEXT,
+    lease_expires_at REAL,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    enqueued_at REAL
+)
+"""
+
+# 이미 대기 중인 URL이 다시 들어오면 최신 해시로 바꾸고 재시도 상태 초기화 (리스 중이던 워커는 완료 처리 못 함)
+_ENQUEUE_CONFLICT_SQL = """
+ON CONFLICT(url) DO UPDATE SET
+    content_hash = excluded.content_hash, attempts = 0, last_error = NULL,
+    lease_owner = NULL, lease_expires_at = NULL, next_attempt_at = 0, enqueued_at = excluded.enqueued_at
+"""
+
+
+CREATE_NO_CHUNKS_SQL = """
+CREATE TABLE IF NOT EXISTS chroma_no_chunks (
+    url TEXT PRIMARY KEY,
+    content_hash TEXT,
+    checked_at REAL
+)
+"""
+
+
+def create_outbox_table(cursor):
+    cursor.execute(CREATE_OUTBOX_SQL)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_outbox_due ON chroma_outbox(next_attempt_at)")
+    cursor.execute(CREATE_NO_CHUNKS_SQL)
+
+
+def enqueue_select(conn: sqlite3.Connection, select_sql: str, params: Sequence[Any] = ()) -> int:
+    """
+    호출한 쪽 트랜잭션 안에서 SELECT 결과 (url, content_hash) 를 outbox 에 기록 → 기록 수
+    (recalls upsert 와 함께 커밋/롤백되므로 SQLite 와 outbox 가 어긋나지 않음)
+    """
+    before = conn.total_changes
+    conn.execute(f"""
+        INSERT INTO chroma_outbox (url, content_hash, enqueued_at)
+        SELECT url, content_hash, ? FROM ({select_sql}) WHERE true
+        {_ENQUEUE_CONFLICT_SQL}
+    """, (time.time(), *params))
+    return conn.total_changes - before
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class ChromaOutbox:
+    """chroma_outbox 작업 큐 (CrawlFrontier 와 같은 리스 방식)"""
+
+    def __init__(self, db_path: str = OUTBOX_DB_PATH, worker_id: Optional[str] = None,
+                 lease_seconds: int = OUTBOX_LEASE_SECONDS, max_attempts: int = OUTBOX_MAX_ATTEMPTS):
+        self.db_path = db_path
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        # isolation_level=None: 트랜잭션을 직접 BEGIN/COMMIT 으로 관리
+        self.conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        create_outbox_table(self.conn.cursor())
+
+    def close(self):
+        self.conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        """쓰기 잠금을 먼저 잡는 트랜잭션 (워커 간 동시 리스 방지)"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.conn
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def enqueue(self, items: Sequence[Tuple[str, Optional[str]]]) -> int:
+        """(url, content_hash) 목록 등록 (이미 있으면 해시 갱신 + 재시도 초기화) → 기록 수"""
+        if not items:
+            return 0
+        now = time.time()
+        before = self.conn.total_changes
+        with self._transaction() as conn:
+            conn.executemany(f"""
+                INSERT INTO chroma_outbox (url, content_hash, enqueued_at) VALUES (?, ?, ?)
+                {_ENQUEUE_CONFLICT_SQL}
+            """, [(url, content_hash, now) for url, content_hash in items])
+        return self.conn.total_changes - before
+
+    def lease(self, limit: int) -> List[Dict[str, Any]]:
+        """처리 가능한 작업을 최대 limit개 가져와 이 워커 소유로 리스"""
+        now = time.time()
+        with self._transaction() as conn:
+            rows = conn.execute("""
+                SELECT url, content_hash, attempts FROM chroma_outbox
+                WHERE attempts < ? AND next_attempt_at <= ?
+                  AND (lease_owner IS NULL OR lease_expires_at < ?)
+                ORDER BY enqueued_at, url
+                LIMIT ?
+            """, (self.max_attempts, now, now, limit)).fetchall()
+
+            conn.executemany("""
+                UPDATE chroma_outbox
+                SET lease_owner = ?, lease_expires_at = ?, attempts = attempts + 1
+                WHERE url = ?
+            """, [(self.worker_id, now + self.lease_seconds, row["url"]) for row in rows])
+
+        return [{"url": row["url"], "content_hash": row["content_hash"], "attempts": row["attempts"] + 1}
+                for row in rows]
+
+    def complete(self, items: List[Dict[str, Any]], chunk_counts: Optional[Dict[str, int]] = None) -> int:
+        """
+        처리 완료 → 삭제 (이 워커가 리스 중이고 그 사이 해시가 바뀌지 않은 작업만)
+        chunk_counts(URL별 저장 청크 수)가 있으면 청크 0개인 URL을 chroma_no_chunks 에 기록
+        """
+        chunk_counts = chunk_counts or {}
+        now = time.time()
+        completed = 0
+        with self._transaction() as conn:
+            for item in items:
+                deleted = conn.execute("""
+                    DELETE FROM chroma_outbox
+                    WHERE url = ? AND lease_owner = ? AND content_hash IS ?
+                """, (item["url"], self.worker_id, item["content_hash"])).rowcount
+                if not deleted:
+                    continue
+                completed += 1
+                if chunk_counts.get(item["url"]) == 0:
+                    conn.execute("INSERT OR REPLACE INTO chroma_no_chunks (url, content_hash, checked_at) VALUES (?, ?, ?)",
+                                 (item["url"], item["content_hash"], now))
+                else:
+                    conn.execute("DELETE FROM chroma_no_chunks WHERE url = ?", (item["url"],))
+        return completed
+
+    def no_chunk_hashes(self) -> Dict[str, Optional[str]]:
+        """청크가 없는 것으로 확인된 URL → 확인 당시 content_hash"""
+        return {row["url"]: row["content_hash"]
+                for row in self.conn.execute("SELECT url, content_hash FROM chroma_no_chunks")}
+
+    def fail(self, items: List[Dict[str, Any]], error: str):
+        """실패 기록: 리스 반납 + 지수 백오프로 재시도 예약"""
+        now = time.time()
+        rows = []
+        for item in items:
+            delay = min(OUTBOX_BACKOFF_MAX_SECONDS, OUTBOX_BACKOFF_SECONDS * (2 ** (item["attempts"] - 1)))
+            rows.append(((error or "")[:500], now + delay * random.uniform(0.8, 1.2), item["url"], self.worker_id))
+        with self._transaction() as conn:
+            conn.executemany("""
+                UPDATE chroma_outbox
+                SET last_error = ?, next_attempt_at = ?, lease_owner = NULL, lease_expires_at = NULL
+                WHERE url = ? AND lease_owner = ?
+            """, rows)
+
+    def stats(self) -> Dict[str, int]:
+        """pending(대기) / retry(백오프 중) / leased(처리 중) / dead(최대 시도 초과) 개수"""
+        now = time.time()
+        row = self.conn.execute("""
+            SELECT COUNT(*),
+                   SUM(attempts >= ?),
+                   SUM(attempts < ? AND lease_owner IS NOT NULL AND lease_expires_at >= ?),
+                   SUM(attempts < ? AND lease_owner IS NULL AND next_attempt_at > ?)
+            FROM chroma_outbox
+        """, (self.max_attempts, self.max_attempts, now, self.max_attempts, now)).fetchone()
+        total, dead, leased, retry = (value or 0 for value in row)
+        return {"pending": total - dead - leased - retry, "retry": retry, "leased": leased, "dead": dead}
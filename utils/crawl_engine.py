@@ -0,0 +1,288 @@
+# utils/crawl_engine.py
+"""
+Playwright 브라우저 1개를 띄워두고 N개의 페이지(컨텍스트) 풀로
+상세 페이지를 동시에 크롤링하는 엔진
+"""
+import os
+import glob
+import time
+import uuid
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from playwright.async_api import async_playwright
+
+from utils.resource_policy import RESOURCE_POLICY_ENABLED, ResourcePolicy
+
+# 크롬 실행 옵션 (자동화 감지 회피 포함)
+BROWSER_ARGS = [
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-blink-features=AutomationControlled',
+    '--disable-web-security',
+    '--disable-features=VizDisplayCompositor',
+    '--disable-automation',
+    '--disable-browser-side-navigation',
+    '--no-first-run'
+]
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+EXTRA_HEADERS = {
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+
+# navigator.webdriver 속성 제거
+STEALTH_SCRIPT = """
+    Object.defineProperty(navigator, 'webdriver', {
+        get: () => undefined,
+    });
+"""
+
+DEFAULT_POOL_SIZE = int(os.getenv("CRAWL_POOL_SIZE", "4"))
+
+# 쿠키/로컬스토리지를 저장해 다음 실행에서 재사용 (warm-up 생략용)
+BROWSER_STATE_PATH = os.getenv("BROWSER_STATE_PATH", "./data/browser_state.json")
+
+# HAR 녹화/재생 (오프라인 벤치마크·회귀 확인용)
+# record: 컨텍스트마다 {HAR_DIR}/context-*.har 로 트래픽 저장
+# replay: 저장된 HAR로만 응답하고, HAR에 없는 요청은 차단 (네트워크 사용 안 함)
+HAR_MODE = os.getenv("CRAWL_HAR_MODE", "")
+HAR_DIR = os.getenv("CRAWL_HAR_DIR", "./data/har")
+
+
+def set_har_mode(mode: str, har_dir: str = HAR_DIR):
+    """이후 생성되는 CrawlEngine의 기본 HAR 모드 변경 ('' / 'record' / 'replay')"""
+    global HAR_MODE, HAR_DIR
+    if mode not in ("", "record", "replay"):
+        raise ValueError(f"알 수 없는 HAR 모드: {mode}")
+    HAR_MODE, HAR_DIR = mode, har_dir
+
+
+class CrawlEngine:
+    """
+    브라우저 1개 + 페이지 풀 + asyncio.Semaphore 로 동시 크롤링
+
+    사용 예:
+        async with CrawlEngine(pool_size=4) as engine:
+            result = await engine.run(url, handler)   # handler(page, url)
+        engine.print_report()
+    """
+
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE, headless: bool = True,
+                 storage_state: Optional[str] = None,
+                 har_mode: Optional[str] = None, har_dir: Optional[str] = None,
+                 block_resources: Optional[bool] = None):
+        self.pool_size = max(1, int(pool_size))
+        self.headless = headless
+        self.storage_state = storage_state  # 저장된 세션 파일 경로 (있으면 새 컨텍스트에 적용)
+        self.har_mode = HAR_MODE if har_mode is None else har_mode
+        self.har_dir = har_dir or HAR_DIR
+        # 이미지/폰트/분석 스크립트 등 파싱에 안 쓰는 요청 차단 (CRAWL_BLOCK_RESOURCES=0 이면 끔)
+        block = RESOURCE_POLICY_ENABLED if block_resources is None else block_resources
+        self.resource_policy = ResourcePolicy() if block else None
+
+        self._playwright = None
+        self.browser = None
+        self._pages: "asyncio.Queue" = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        # 통계
+        self.url_timings: List[Dict[str, Any]] = []
+        self.bytes_received = 0  # Content-Length 헤더 기준 (근사치)
+        self._busy_seconds = 0.0
+        self._in_use = 0
+        self._peak_in_use = 0
+        self._started_at = None
+        self._finished_at = None
+        self._start_lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def start(self):
+        """브라우저 실행 후 페이지 풀 생성"""
+        self._playwright = await async_playwright().start()
+        self.browser = await self._playwright.chromium.launch(
+            headless=self.headless,
+            args=BROWSER_ARGS
+        )
+
+        self._pages = asyncio.Queue()
+        self._semaphore = asyncio.Semaphore(self.pool_size)
+        for _ in range(self.pool_size):
+            self._pages.put_nowait(await self.new_page())
+
+        self._started_at = time.perf_counter()
+        print(f"🧭 크롤링 엔진 시작: 브라우저 1개, 페이지 풀 {self.pool_size}개")
+
+    async def ensure_started(self):
+        """필요할 때만 브라우저를 띄우는 지연 시작 (동시 호출 안전)"""
+        async with self._start_lock:
+            if self.browser is None:
+                await self.start()
+
+    async def close(self):
+        """페이지 풀과 브라우저 종료"""
+        if self._started_at is not None:
+            self._finished_at = time.perf_counter()
+        try:
+            if self.browser:
+                if self.har_mode == "record":
+                    # HAR 파일은 컨텍스트를 닫을 때 기록됨
+                    for context in list(self.browser.contexts):
+                        await context.close()
+                await self.browser.close()
+        finally:
+            if self._playwright:
+                await self._playwright.stop()
+            self.browser = None
+            self._playwright = None
+
+    async def new_page(self):
+        """독립된 컨텍스트 1개에 페이지 1개 생성"""
+        options = {"user_agent": USER_AGENT, "extra_http_headers": EXTRA_HEADERS}
+        if self.storage_state and os.path.exists(self.storage_state):
+            options["storage_state"] = self.storage_state
+        context = await self.browser.new_context(**options)
+        await self._apply_har(context)
+        if self.resource_policy is not None:
+            # HAR 라우트보다 나중에 등록 → 먼저 적용되어 차단 대상은 HAR까지 가지 않음
+            await context.route("**/*", self.resource_policy.handle)
+        await context.add_init_script(STEALTH_SCRIPT)
+        context.on("response", self._count_response_bytes)
+        return await context.new_page()
+
+    async def _apply_har(self, context):
+        """HAR 녹화/재생 라우팅 설정"""
+        if self.har_mode == "record":
+            os.makedirs(self.har_dir, exist_ok=True)
+            path = os.path.join(self.har_dir, f"context-{uuid.uuid4().hex[:8]}.har")
+            await context.route_from_har(path, update=True, update_content="embed", update_mode="full")
+        elif self.har_mode == "replay":
+            har_files = sorted(glob.glob(os.path.join(self.har_dir, "*.har")))
+            if not har_files:
+                raise FileNotFoundError(f"재생할 HAR 파일 없음: {self.har_dir}")
+            # 나중에 등록한 라우트가 먼저 적용됨 → HAR 어디에도 없으면 마지막에 차단
+            await context.route("**/*", lambda route: route.abort())
+            for path in har_files:
+                await context.route_from_har(path, not_found="fallback")
+
+    def _count_response_bytes(self, response):
+        try:
+            self.bytes_received += int(response.headers.get("content-length") or 0)
+        except ValueError:
+            pass
+
+    async def save_storage_state(self, page, path: Optional[str] = None):
+        """현재 페이지 컨텍스트의 쿠키/로컬스토리지를 파일로 저장"""
+        path = path or self.storage_state or BROWSER_STATE_PATH
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        await page.context.storage_state(path=path)
+
+    async def reload_storage_state(self):
+        """쉬고 있는 풀 페이지를 새 컨텍스트로 교체해 방금 저장한 세션을 적용"""
+        idle = []
+        while not self._pages.empty():
+            idle.append(self._pages.get_nowait())
+        for page in idle:
+            self._pages.put_nowait(await self._recycle(page))
+
+    async def _recycle(self, page):
+        """닫히거나 깨진 페이지는 새 컨텍스트로 교체"""
+        try:
+            await page.context.close()
+        except Exception:
+            pass
+        return await self.new_page()
+
+    @asynccontextmanager
+    async def page(self):
+        """풀에서 페이지 하나를 빌려오고 반납"""
+        async with self._semaphore:
+            page = await self._pages.get()
+            self._in_use += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+            started = time.perf_counter()
+            try:
+                yield page
+            finally:
+                self._busy_seconds += time.perf_counter() - started
+                self._in_use -= 1
+                if page.is_closed():
+                    page = await self._recycle(page)
+                self._pages.put_nowait(page)
+
+    async def run(self, url: str, handler: Callable[[Any, str], Awaitable[Any]]):
+        """페이지를 빌려 handler(page, url) 실행 + URL별 소요시간 기록"""
+        async with self.page() as page:
+            started = time.perf_counter()
+            result = None
+            error = None
+            try:
+                result = await handler(page, url)
+                return result
+            except Exception as e:
+                error = str(e)
+                raise
+            finally:
+                self.url_timings.append({
+                    "url": url,
+                    "seconds": round(time.perf_counter() - started, 3),
+                    "ok": error is None and result is not None,
+                    "error": error,
+                })
+
+    def resource_stats(self) -> Dict[str, int]:
+        """요청 필터 카운터 (필터를 끈 경우 빈 dict)"""
+        return self.resource_policy.stats() if self.resource_policy is not None else {}
+
+    def report(self) -> Dict[str, Any]:
+        """URL별 타이밍과 풀 사용률 요약"""
+        end = self._finished_at or time.perf_counter()
+        wall = (end - self._started_at) if self._started_at else 0.0
+        seconds = sorted(t["seconds"] for t in self.url_timings)
+
+        def _pct(p):
+            if not seconds:
+                return 0.0
+            return seconds[min(len(seconds) - 1, int(round(p * (len(seconds) - 1))))]
+
+        capacity = wall * self.pool_size
+        return {
+            "pool_size": self.pool_size,
+            "urls": len(self.url_timings),
+            "succeeded": sum(1 for t in self.url_timings if t["ok"]),
+            "wall_seconds": round(wall, 2),
+            "url_seconds_mean": round(sum(seconds) / len(seconds), 3) if seconds else 0.0,
+            "url_seconds_p50": _pct(0.5),
+            "url_seconds_p95": _pct(0.95),
+            "url_seconds_max": seconds[-1] if seconds else 0.0,
+            "pool_utilization": round(self._busy_seconds / capacity, 3) if capacity else 0.0,
+            "peak_pages_in_use": self._peak_in_use,
+        }
+
+    def print_report(self, slowest: int = 5):
+        """실행 종료 후 타이밍/사용률 출력"""
+        r = self.report()
+        print("\n⏱️ 크롤링 엔진 리포트:")
+        print(f"   URL: {r['succeeded']}/{r['urls']}개 성공, 전체 {r['wall_seconds']}초")
+        print(f"   URL당: 평균 {r['url_seconds_mean']}초 / p50 {r['url_seconds_p50']}초 / "
+              f"p95 {r['url_seconds_p95']}초 / 최대 {r['url_seconds_max']}초")
+        print(f"   페이지 풀: {r['pool_size']}개, 사용률 {r['pool_utilization'] * 100:.1f}%, "
+              f"최대 동시 사용 {r['peak_pages_in_use']}개")
+        if self.resource_policy is not None:
+            p = self.resource_policy
+            print(f"   요청 필터: {p.blocked}/{p.requests}개 차단 {p.blocked_by_reason}, "
+                  f"절약 약 {p.estimated_bytes_saved / 1e6:.1f}MB")
+
+        for t in sorted(self.url_timings, key=lambda t: t["seconds"], reverse=True)[:slowest]:
+            status = "✅" if t["ok"] else "❌"
+            print(f"   {status} {t['seconds']:>7.2f}초  {t['url']}")
+        return r
@@ -0,0 +1,186 @@
+# utils/crawl_frontier.py
+"""
+fda_recalls.db 안의 crawl_frontier 테이블로 관리하는 상세 크롤링 작업 큐
+- URL별 상태(pending/leased/retry/done/dead), 시도 횟수, 마지막 오류, 리스 만료 시각 저장
+- 여러 워커(프로세스)가 BEGIN IMMEDIATE 트랜잭션으로 안전하게 작업을 나눠 가짐
+- 실패 시 지수 백오프로 재시도, 최대 시도 횟수를 넘기면 dead
+- 크래시로 반납되지 않은 작업은 리스가 만료되면 다른 워커가 다시 가져감
+- queue 값으로 용도별 작업(증분 크롤링, 저장된 JSON 재처리 등)을 분리
+"""
+import os
+import time
+import random
+import socket
+import sqlite3
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+FRONTIER_DB_PATH = "./data/fda_recalls.db"
+
+LEASE_SECONDS = int(os.getenv("FRONTIER_LEASE_SECONDS", "600"))
+MAX_ATTEMPTS = int(os.getenv("FRONTIER_MAX_ATTEMPTS", "5"))
+BACKOFF_BASE_SECONDS = int(os.getenv("FRONTIER_BACKOFF_SECONDS", "30"))
+BACKOFF_MAX_SECONDS = 6 * 3600
+
+CREATE_FRONTIER_SQL = """
+CREATE TABLE IF NOT EXISTS crawl_frontier (
+    queue TEXT NOT NULL DEFAULT 'incremental',
+    url TEXT NOT NULL,
+    name TEXT,
+    listing_date TEXT,
+    product_type TEXT,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    lease_owner TEXT,
+    lease_expires_at REAL,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at REAL,
+    PRIMARY KEY (queue, url)
+)
+"""
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class CrawlFrontier:
+    """영속 크롤링 큐 (SQLite)"""
+
+    def __init__(self, db_path: str = FRONTIER_DB_PATH, queue: str = "incremental",
+                 worker_id: Optional[str] = None,
+                 lease_seconds: int = LEASE_SECONDS, max_attempts: int = MAX_ATTEMPTS):
+        self.db_path = db_path
+        self.queue = queue
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        # isolation_level=None: 트랜잭션을 직접 BEGIN/COMMIT 으로 관리
+        self.conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute(CREATE_FRONTIER_SQL)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_frontier_state ON crawl_frontier(queue, state, next_attempt_at)")
+
+    def close(self):
+        self.conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        """쓰기 잠금을 먼저 잡는 트랜잭션 (워커 간 동시 리스 방지)"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.conn
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def enqueue(self, brand_urls: List[Dict[str, Any]]) -> int:
+        """새 URL 등록 (이미 있는 URL은 그대로 둠) → 새로 추가된 개수"""
+        if not brand_urls:
+            return 0
+        now = time.time()
+        before = self.conn.total_changes
+        with self._transaction() as conn:
+            conn.executemany("""
+                INSERT INTO crawl_frontier (queue, url, name, listing_date, product_type, state, updated_at)
+                VALUES (?, ?, ?, ?, ?, 'pending', ?)
+                ON CONFLICT(queue, url) DO NOTHING
+            """, [(self.queue, b["url"], b.get("name"), b.get("date"), b.get("product_type"), now)
+                  for b in brand_urls])
+        return self.conn.total_changes - before
+
+    def lease(self, limit: int) -> List[Dict[str, Any]]:
+        """처리 가능한 작업을 최대 limit개 가져와 이 워커 소유로 리스"""
+        now = time.time()
+        with self._transaction() as conn:
+            rows = conn.execute("""
+                SELECT url, name, listing_date, product_type, attempts
+                FROM crawl_frontier
+                WHERE queue = ?
+                  AND ((state IN ('pending', 'retry') AND next_attempt_at <= ?)
+                       OR (state = 'leased' AND lease_expires_at < ?))
+                ORDER BY listing_date DESC, url
+                LIMIT ?
+            """, (self.queue, now, now, limit)).fetchall()
+
+            conn.executemany("""
+                UPDATE crawl_frontier
+                SET state = 'leased', lease_owner = ?, lease_expires_at = ?,
+                    attempts = attempts + 1, updated_at = ?
+                WHERE queue = ? AND url = ?
+            """, [(self.worker_id, now + self.lease_seconds, now, self.queue, row["url"]) for row in rows])
+
+        return [{"url": row["url"], "name": row["name"], "date": row["listing_date"],
+                 "product_type": row["product_type"], "attempts": row["attempts"] + 1}
+                for row in rows]
+
+    def complete(self, urls: List[str]):
+        """처리 완료 (이 워커가 리스 중인 작업만)"""
+        now = time.time()
+        with self._transaction() as conn:
+            conn.executemany("""
+                UPDATE crawl_frontier
+                SET state = 'done', lease_owner = NULL, lease_expires_at = NULL,
+                    last_error = NULL, updated_at = ?
+                WHERE queue = ? AND url = ? AND lease_owner = ?
+            """, [(now, self.queue, url, self.worker_id) for url in urls])
+
+    def fail(self, url: str, error: str) -> str:
+        """실패 기록: 지수 백오프로 재시도 예약, 최대 시도 초과 시 dead → 바뀐 상태"""
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT attempts FROM crawl_frontier WHERE queue = ? AND url = ?",
+                               (self.queue, url)).fetchone()
+            attempts = row["attempts"] if row else self.max_attempts
+
+            if attempts >= self.max_attempts:
+                state, next_attempt_at = "dead", now
+            else:
+                delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** (attempts - 1)))
+                state, next_attempt_at = "retry", now + delay * random.uniform(0.8, 1.2)
+
+            conn.execute("""
+                UPDATE crawl_frontier
+                SET state = ?, last_error = ?, next_attempt_at = ?,
+                    lease_owner = NULL, lease_expires_at = NULL, updated_at = ?
+                WHERE queue = ? AND url = ? AND lease_owner = ?
+            """, (state, (error or "")[:500], next_attempt_at, now, self.queue, url, self.worker_id))
+        return state
+
+    def seconds_until_next_due(self) -> Optional[float]:
+        """다음 재시도 가능 시각까지 남은 초 (대기 작업이 없으면 None)"""
+        row = self.conn.execute("""
+            SELECT MIN(CASE WHEN state = 'leased' THEN lease_expires_at ELSE next_attempt_at END)
+            FROM crawl_frontier
+            WHERE queue = ? AND state IN ('pending', 'retry', 'leased')
+        """, (self.queue,)).fetchone()
+        if row[0] is None:
+            return None
+        return max(0.0, row[0] - time.time())
+
+    def stats(self) -> Dict[str, int]:
+        """상태별 작업 개수"""
+        rows = self.conn.execute("SELECT state, COUNT(*) FROM crawl_frontier WHERE queue = ? GROUP BY state",
+                                 (self.queue,)).fetchall()
+        return {state: count for state, count in rows}
+
+    def states(self, urls: List[str]) -> Dict[str, str]:
+        """URL별 현재 상태"""
+        wanted = set(urls)
+        rows = self.conn.execute("SELECT url, state FROM crawl_frontier WHERE queue = ?", (self.queue,)).fetchall()
+        return {row["url"]: row["state"] for row in rows if row["url"] in wanted}
+
+    def dead_items(self) -> List[Dict[str, Any]]:
+        """최대 재시도를 넘긴 작업 목록"""
+        rows = self.conn.execute("""
+            SELECT url, name, listing_date, product_type, attempts, last_error
+            FROM crawl_frontier WHERE queue = ? AND state = 'dead' ORDER BY listing_date DESC
+        """, (self.queue,)).fetchall()
+        return [{"url": r["url"], "name": r["name"], "date": r["listing_date"],
+                 "product_type": r["product_type"], "attempts": r["attempts"],
+                 "last_error": r["last_error"]} for r in rows]
@@ -0,0 +1,126 @@
+# utils/crawl_state.py
+"""
+fda_recalls.db 안의 crawl_state 테이블: 수집 소스별 최신 기준점(high-water mark)
+- 증분 크롤링은 이 값 1개(PK 조회)만 읽고 시작 → recalls 테이블을 정렬해서 찾지 않음
+- 테이블에 값이 없을 때만 recalls 의 ISO 날짜로 한 번 초기화
+- 후보 URL 존재 여부는 임시 테이블 + JOIN 1회로 확인
+"""
+import os
+import json
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional, Set
+
+CRAWL_STATE_DB_PATH = "./data/fda_recalls.db"
+
+# FDA 리콜 목록(웹) 소스 이름
+LISTING_SOURCE = "fda_recall_listing"
+
+# 기준점보다 이만큼 이전 날짜까지 다시 확인 (늦게 올라온 항목 대비, 이미 있는 URL은 존재 확인에서 제외됨)
+WATERMARK_OVERLAP_DAYS = int(os.getenv("WATERMARK_OVERLAP_DAYS", "3"))
+
+CREATE_CRAWL_STATE_SQL = """
+CREATE TABLE IF NOT EXISTS crawl_state (
+    source TEXT PRIMARY KEY,
+    high_water_mark TEXT,
+    extra TEXT,
+    updated_at TIMESTAMP
+)
+"""
+
+ISO_DATE_GLOB = "[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]"
+
+
+def incremental_cutoff(high_water_mark: Optional[str], overlap_days: int = WATERMARK_OVERLAP_DAYS) -> Optional[str]:
+    """기준점 - 겹침 기간 → 이 날짜 이하가 나오면 목록 수집 중단 (기준점이 없으면 None)"""
+    if not high_water_mark:
+        return None
+    try:
+        watermark = datetime.strptime(high_water_mark, "%Y-%m-%d")
+    except ValueError:
+        return None
+    return (watermark - timedelta(days=overlap_days)).strftime("%Y-%m-%d")
+
+
+class CrawlState:
+    """소스별 기준점 + 부가 상태(JSON) 저장소"""
+
+    def __init__(self, db_path: str = CRAWL_STATE_DB_PATH):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute(CREATE_CRAWL_STATE_SQL)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def _has_recalls_table(self) -> bool:
+        row = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'recalls'"
+        ).fetchone()
+        return row is not None
+
+    def _bootstrap_from_recalls(self, source: str) -> Optional[str]:
+        """crawl_state 가 비어 있을 때 1회: recalls 의 웹 수집분 중 가장 최근 ISO 날짜"""
+        if not self._has_recalls_table():
+            return None
+        row = self.conn.execute(f"""
+            SELECT MAX(fda_publish_date) FROM recalls
+            WHERE url LIKE 'https://www.fda.gov/%' AND fda_publish_date GLOB '{ISO_DATE_GLOB}'
+        """).fetchone()
+        value = row[0] if row else None
+        if value:
+            self.advance(source, value)
+            print(f"🧭 crawl_state 초기화: {source} = {value} (recalls 기준)")
+        return value
+
+    def get_watermark(self, source: str = LISTING_SOURCE) -> Optional[str]:
+        """소스의 기준점 (없으면 recalls 에서 한 번 초기화)"""
+        row = self.conn.execute("SELECT high_water_mark FROM crawl_state WHERE source = ?", (source,)).fetchone()
+        if row and row["high_water_mark"]:
+            return row["high_water_mark"]
+        return self._bootstrap_from_recalls(source)
+
+    def advance(self, source: str, value: Optional[str]):
+        """기준점을 value 로 올림 (기존 값보다 작으면 그대로)"""
+        if not value:
+            return
+        self.conn.execute("""
+            INSERT INTO crawl_state (source, high_water_mark, updated_at)
+            VALUES (?, ?, ?)
+            ON CONFLICT(source) DO UPDATE SET
+                high_water_mark = CASE
+                    WHEN crawl_state.high_water_mark IS NULL OR excluded.high_water_mark > crawl_state.high_water_mark
+                    THEN excluded.high_water_mark ELSE crawl_state.high_water_mark END,
+                updated_at = excluded.updated_at
+        """, (source, value, datetime.now().isoformat(timespec="seconds")))
+        self.conn.commit()
+
+    def get_extra(self, source: str) -> Dict[str, Any]:
+        """기준점 외 부가 상태 (JSON)"""
+        row = self.conn.execute("SELECT extra FROM crawl_state WHERE source = ?", (source,)).fetchone()
+        return json.loads(row["extra"]) if row and row["extra"] else {}
+
+    def set_extra(self, source: str, extra: Dict[str, Any]):
+        self.conn.execute("""
+            INSERT INTO crawl_state (source, extra, updated_at) VALUES (?, ?, ?)
+            ON CONFLICT(source) DO UPDATE SET extra = excluded.extra, updated_at = excluded.updated_at
+        """, (source, json.dumps(extra, ensure_ascii=False), datetime.now().isoformat(timespec="seconds")))
+        self.conn.commit()
+
+    def existing_urls(self, urls: Iterable[str]) -> Set[str]:
+        """recalls 에 이미 있는 URL 집합 (임시 테이블 + JOIN 1회)"""
+        urls = list(urls)
+        if not urls or not self._has_recalls_table():
+            return set()
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS candidate_urls (url TEXT PRIMARY KEY)")
+        self.conn.execute("DELETE FROM candidate_urls")
+        self.conn.executemany("INSERT OR IGNORE INTO candidate_urls (url) VALUES (?)", [(u,) for u in urls])
+        rows = self.conn.execute(
+            "SELECT c.url FROM candidate_urls c JOIN recalls r ON r.url = c.url"
+        ).fetchall()
+        self.conn.execute("DELETE FROM candidate_urls")
+        self.conn.commit()
+        return {row["url"] for row in rows}
@@ -0,0 +1,138 @@
+# utils/crawl_telemetry.py
+"""
+크롤링 실행(run) 단위 계측
+- 단계별 소요시간(warmup / listing / detail / sqlite / chroma)
+- 전송 바이트, 목록 페이지·행 수, 상세 페이지 수, 재시도·실패 수
+- fda_recalls.db 의 crawl_runs 테이블에 기록하고, 한 줄 JSON 요약 출력
+"""
+import json
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict
+
+TELEMETRY_DB_PATH = "./data/fda_recalls.db"
+
+STAGES = ["warmup", "listing", "detail", "sqlite", "chroma"]
+COUNTERS = [
+    "bytes_transferred", "listing_pages", "listing_rows", "detail_pages",
+    "records_saved", "retries", "failures",
+]
+
+CREATE_CRAWL_RUNS_SQL = """
+CREATE TABLE IF NOT EXISTS crawl_runs (
+    run_id TEXT PRIMARY KEY,
+    run_type TEXT,
+    status TEXT,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP,
+    duration_seconds REAL,
+    warmup_seconds REAL,
+    listing_seconds REAL,
+    detail_seconds REAL,
+    sqlite_seconds REAL,
+    chroma_seconds REAL,
+    bytes_transferred INTEGER,
+    listing_pages INTEGER,
+    listing_rows INTEGER,
+    detail_pages INTEGER,
+    records_saved INTEGER,
+    retries INTEGER,
+    failures INTEGER,
+    extra TEXT
+)
+"""
+
+SUMMARY_PREFIX = "CRAWL_RUN_SUMMARY"
+
+
+class CrawlTelemetry:
+    """실행 1회의 단계별 타이밍과 카운터 모음"""
+
+    def __init__(self, run_type: str = "incremental"):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.run_type = run_type
+        self.status = "running"
+        self.started_at = datetime.now()
+        self._t0 = time.perf_counter()
+        self.duration_seconds = None
+
+        self.stages: Dict[str, float] = {stage: 0.0 for stage in STAGES}
+        self.counters: Dict[str, int] = {name: 0 for name in COUNTERS}
+        self.extra: Dict[str, Any] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        """with telemetry.stage("listing"): ... 구간 시간을 누적"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + (time.perf_counter() - started)
+
+    def add(self, name: str, amount: int = 1):
+        """카운터 증가"""
+        self.counters[name] = self.counters.get(name, 0) + int(amount)
+
+    def note(self, key: str, value: Any):
+        """고정 컬럼에 없는 부가 정보 (JSON으로 저장)"""
+        self.extra[key] = value
+
+    def note_counts(self, key: str, counts: Dict[str, int]):
+        """extra[key] 아래 카운터 dict 누적 (여러 엔진/단계 합산)"""
+        bucket = self.extra.setdefault(key, {})
+        for name, value in counts.items():
+            bucket[name] = bucket.get(name, 0) + int(value)
+
+    def finish(self, status: str = "success"):
+        self.status = status
+        self.duration_seconds = time.perf_counter() - self._t0
+
+    def summary(self) -> Dict[str, Any]:
+        duration = self.duration_seconds if self.duration_seconds is not None else time.perf_counter() - self._t0
+        summary = {
+            "run_id": self.run_id,
+            "run_type": self.run_type,
+            "status": self.status,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "duration_seconds": round(duration, 3),
+        }
+        summary.update({f"{stage}_seconds": round(seconds, 3) for stage, seconds in self.stages.items()})
+        summary.update(self.counters)
+        if self.extra:
+            summary["extra"] = self.extra
+        return summary
+
+    def save(self, db_path: str = TELEMETRY_DB_PATH):
+        """crawl_runs 테이블에 기록"""
+        s = self.summary()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        conn = sqlite3.connect(db_path, timeout=30)
+        try:
+            conn.execute(CREATE_CRAWL_RUNS_SQL)
+            conn.execute("""
+                INSERT OR REPLACE INTO crawl_runs (
+                    run_id, run_type, status, started_at, finished_at, duration_seconds,
+                    warmup_seconds, listing_seconds, detail_seconds, sqlite_seconds, chroma_seconds,
+                    bytes_transferred, listing_pages, listing_rows, detail_pages,
+                    records_saved, retries, failures, extra
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                s["run_id"], s["run_type"], s["status"], s["started_at"],
+                datetime.now().isoformat(timespec="seconds"), s["duration_seconds"],
+                s["warmup_seconds"], s["listing_seconds"], s["detail_seconds"],
+                s["sqlite_seconds"], s["chroma_seconds"],
+                s["bytes_transferred"], s["listing_pages"], s["listing_rows"], s["detail_pages"],
+                s["records_saved"], s["retries"], s["failures"],
+                json.dumps(self.extra, ensure_ascii=False) if self.extra else None,
+            ))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def print_summary(self):
+        """기계가 읽을 수 있는 한 줄 요약 (grep CRAWL_RUN_SUMMARY)"""
+        print(f"{SUMMARY_PREFIX} {json.dumps(self.summary(), ensure_ascii=False, sort_keys=True)}")
@@ -0,0 +1,145 @@
+# utils/embedding_cache.py
+"""
+임베딩 벡터 디스크 캐시 (SQLite)
+- 키: (모델 이름, 청크 텍스트 sha256) → 같은 텍스트는 재수집/재구축 때도 API를 다시 호출하지 않음
+- 값: float32 또는 float16 바이트 (EMBEDDING_CACHE_DTYPE, float16이면 용량 절반)
+- 캐시에 없는 텍스트만 묶어서 임베딩 함수 호출 후 저장, 적중/미스 통계 제공
+"""
+import os
+import hashlib
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "./data/embedding_cache.db")
+EMBEDDING_CACHE_DTYPE = os.getenv("EMBEDDING_CACHE_DTYPE", "float32")
+
+# SQLite 바인딩 변수 수 제한 안에서 한 번에 조회할 키 수
+LOOKUP_BATCH_SIZE = 500
+
+CREATE_EMBEDDINGS_SQL = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    model TEXT NOT NULL,
+    text_sha256 TEXT NOT NULL,
+    dim INTEGER NOT NULL,
+    dtype TEXT NOT NULL,
+    vector BLOB NOT NULL,
+    created_at TIMESTAMP,
+    PRIMARY KEY (model, text_sha256)
+)
+"""
+
+
+def text_hash(text: str) -> str:
+    """청크 텍스트의 sha256"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """(모델, 텍스트 해시) → 벡터 저장소 (여러 스레드에서 공유 가능)"""
+
+    def __init__(self, db_path: str = EMBEDDING_CACHE_PATH, dtype: str = EMBEDDING_CACHE_DTYPE):
+        if dtype not in ("float32", "float16"):
+            raise ValueError(f"지원하지 않는 dtype: {dtype}")
+        self.db_path = db_path
+        self.dtype = dtype
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(CREATE_EMBEDDINGS_SQL)
+        self.conn.commit()
+
+        # 통계
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        self.conn.close()
+
+    def get_many(self, model: str, hashes: Sequence[str]) -> Dict[str, np.ndarray]:
+        """텍스트 해시 목록 → 캐시에 있는 것만 {해시: float32 벡터}"""
+        found = {}
+        unique = list(dict.fromkeys(hashes))
+        with self._lock:
+            for start in range(0, len(unique), LOOKUP_BATCH_SIZE):
+                batch = unique[start:start + LOOKUP_BATCH_SIZE]
+                rows = self.conn.execute(
+                    f"SELECT text_sha256, dtype, vector FROM embeddings "
+                    f"WHERE model = ? AND text_sha256 IN ({', '.join('?' * len(batch))})",
+                    [model, *batch],
+                ).fetchall()
+                for sha, dtype, blob in rows:
+                    found[sha] = np.frombuffer(blob, dtype=dtype).astype(np.float32)
+        return found
+
+    def put_many(self, model: str, hashes: Sequence[str], vectors: Sequence[Sequence[float]]):
+        """벡터 저장 (같은 키가 있으면 덮어씀)"""
+        now = datetime.now().isoformat(timespec="seconds")
+        rows = []
+        for sha, vector in zip(hashes, vectors):
+            array = np.asarray(vector, dtype=self.dtype)
+            rows.append((model, sha, int(array.shape[0]), self.dtype, array.tobytes(), now))
+        with self._lock:
+            self.conn.executemany("""
+                INSERT OR REPLACE INTO embeddings (model, text_sha256, dim, dtype, vector, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, rows)
+            self.conn.commit()
+
+    def embed(self, model: str, texts: Sequence[str],
+              embed_fn: Callable[[List[str]], Sequence[Sequence[float]]]) -> List[List[float]]:
+        """
+        캐시 우선 임베딩: 캐시에 없는 (중복 제거된) 텍스트만 embed_fn 으로 계산 후 저장
+        반환: texts 와 같은 순서의 벡터 리스트
+        """
+        hashes = [text_hash(text) for text in texts]
+        found = self.get_many(model, hashes)
+
+        missing = {}
+        for sha, text in zip(hashes, texts):
+            if sha not in found:
+                missing.setdefault(sha, text)
+        if missing:
+            vectors = embed_fn(list(missing.values()))
+            self.put_many(model, list(missing), vectors)
+            for sha, vector in zip(missing, vectors):
+                found[sha] = np.asarray(vector, dtype=np.float32)
+
+        misses = sum(1 for sha in hashes if sha in missing)
+        self.misses += misses
+        self.hits += len(hashes) - misses
+        return [found[sha].tolist() for sha in hashes]
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": round(self.hit_rate(), 3)}
+
+    def print_stats(self, label: str = "임베딩 캐시"):
+        total = self.hits + self.misses
+        print(f"🧠 {label}: 적중 {self.hits}/{total} ({self.hit_rate():.1%}), API 계산 {self.misses}개")
+
+
+class CachedEmbeddings:
+    """
+    LangChain Embeddings 호환 래퍼 (embed_documents / embed_query)
+    규정 문서 등 LangChain 벡터스토어로 색인할 때 OpenAIEmbeddings 대신 사용
+    """
+
+    def __init__(self, embeddings, model: str, cache: Optional[EmbeddingCache] = None):
+        self.embeddings = embeddings
+        self.model = model
+        self.cache = cache or EmbeddingCache()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.cache.embed(self.model, texts, self.embeddings.embed_documents)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
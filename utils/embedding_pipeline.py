@@ -0,0 +1,284 @@
+# utils/embedding_pipeline.py
+"""
+명시적 임베딩 단계 (asyncio 동시 요청 + 분당 토큰/요청 예산)
+- 텍스트를 큰 배치(개수 + 토큰 상한)로 묶어 여러 요청을 동시에 보냄
+- 분당 토큰(TPM) / 요청(RPM) 예산 안에서만 출발 → 수집 시간은 API 한도로만 결정
+- 429 / 5xx 는 Retry-After 또는 지수 백오프 후 재시도
+- 계산된 벡터는 ChromaDB upsert(embeddings=...)에 바로 전달
+- LocalHashEmbedder: 네트워크 없는 결정적 임베더 (오프라인 테스트/벤치마크용)
+"""
+import os
+import re
+import time
+import asyncio
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from utils.text_chunker import count_tokens as count_embedding_tokens
+
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "openai")  # openai | local
+OPENAI_EMBEDDING_MODEL = "text-embedding-3-small"
+
+# OpenAI 계정 한도에 맞춰 설정 (기본값은 text-embedding-3-small tier 1 수준)
+EMBEDDING_TPM = int(os.getenv("OPENAI_EMBEDDING_TPM", "1000000"))
+EMBEDDING_RPM = int(os.getenv("OPENAI_EMBEDDING_RPM", "3000"))
+
+# 요청 1회당 입력 수 / 토큰 수 상한 (API 한도: 2048개, 300k 토큰)
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "256"))
+EMBEDDING_BATCH_TOKENS = int(os.getenv("EMBEDDING_BATCH_TOKENS", "200000"))
+EMBEDDING_CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", "8"))
+EMBEDDING_MAX_RETRIES = 5
+
+LOCAL_EMBEDDING_DIM = 256
+LOCAL_EMBEDDING_MODEL = f"local-hash-{LOCAL_EMBEDDING_DIM}"
+
+RETRY_STATUSES = {408, 409, 429}
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def run_coroutine(coro):
+    """동기 코드에서 코루틴 실행 (이미 이벤트 루프 안이면 별도 스레드의 루프에서 실행)"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coro).result()
+
+
+class MinuteBudget:
+    """분당 한도를 토큰 버킷으로 (용량 = 분당 한도, 초당 한도/60 씩 충전)"""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.waited = 0.0
+        self._lock = None
+        self._lock_loop = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float):
+        """amount 만큼 예산이 찰 때까지 대기 후 차감 (요청 순서대로)"""
+        amount = min(float(amount), self.capacity)
+        # run_coroutine 은 호출마다 새 이벤트 루프를 쓰므로 루프별로 잠금 생성 (예산 잔량은 유지)
+        loop = asyncio.get_running_loop()
+        if self._lock_loop is not loop:
+            self._lock, self._lock_loop = asyncio.Lock(), loop
+        async with self._lock:
+            while True:
+                self._refill()
+                wait = max(self.blocked_until - time.monotonic(), 0.0)
+                if not wait and self.level >= amount:
+                    self.level -= amount
+                    return
+                wait = wait or (amount - self.level) / self.rate
+                self.waited += wait
+                await asyncio.sleep(wait)
+
+    def pause(self, seconds: float):
+        """서버가 429로 알려준 시간 동안 새 요청 중단"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class LocalHashEmbedder:
+    """
+    결정적 로컬 임베더 (feature hashing): 같은 텍스트 → 항상 같은 L2 정규화 벡터
+    latency 를 주면 API 왕복 시간을 흉내냄 (동시성 벤치마크용)
+    """
+
+    def __init__(self, dim: int = LOCAL_EMBEDDING_DIM, latency: float = 0.0):
+        self.dim = dim
+        self.latency = latency
+        self.model = f"local-hash-{dim}"
+
+    def embed_one(self, text: str) -> List[float]:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in _WORD_RE.findall(text.lower()):
+            h = int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little")
+            vector[h % self.dim] += 1.0 if (h >> 63) & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    async def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return [self.embed_one(text) for text in texts]
+
+
+class OpenAIEmbedder:
+    """OpenAI embeddings API (AsyncOpenAI)"""
+
+    def __init__(self, model: str = OPENAI_EMBEDDING_MODEL, api_key: Optional[str] = None):
+        from openai import AsyncOpenAI
+
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        if not self.api_key:
+            raise ValueError("OPENAI_API_KEY 환경변수가 설정되지 않았습니다")
+        self.model = model
+        self._client_class = AsyncOpenAI
+        self._client = None
+        self._client_loop = None
+
+    @property
+    def client(self):
+        """
+        실행 중인 이벤트 루프 전용 AsyncOpenAI
+        run_coroutine 은 호출마다 새 루프를 쓰는데, httpx 연결 풀은 만든 루프가 닫히면 재사용 불가
+        → MinuteBudget 잠금처럼 루프가 바뀌면 새로 생성
+        """
+        loop = asyncio.get_running_loop()
+        if self._client_loop is not loop:
+            # 재시도는 EmbeddingPipeline 이 예산과 함께 처리
+            self._client = self._client_class(api_key=self.api_key, max_retries=0)
+            self._client_loop = loop
+        return self._client
+
+    async def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        response = await self.client.embeddings.create(model=self.model, input=list(texts))
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+
+def get_embedder(backend: str = EMBEDDING_BACKEND):
+    """EMBEDDING_BACKEND 에 맞는 임베더 (openai / local)"""
+    if backend == "local":
+        return LocalHashEmbedder()
+    if backend == "openai":
+        return OpenAIEmbedder()
+    raise ValueError(f"알 수 없는 EMBEDDING_BACKEND: {backend}")
+
+
+def backend_model(backend: str = EMBEDDING_BACKEND) -> str:
+    """EMBEDDING_BACKEND 가 쓰는 모델 이름 (임베더를 만들지 않고 컬렉션 이름만 필요할 때)"""
+    if backend == "local":
+        return LOCAL_EMBEDDING_MODEL
+    if backend == "openai":
+        return OPENAI_EMBEDDING_MODEL
+    raise ValueError(f"알 수 없는 EMBEDDING_BACKEND: {backend}")
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class EmbeddingPipeline:
+    """배치 분할 → TPM/RPM 예산 대기 → 동시 요청 → 입력 순서대로 벡터 반환"""
+
+    def __init__(self, embedder=None, tpm: int = EMBEDDING_TPM, rpm: int = EMBEDDING_RPM,
+                 batch_size: int = EMBEDDING_BATCH_SIZE, batch_tokens: int = EMBEDDING_BATCH_TOKENS,
+                 concurrency: int = EMBEDDING_CONCURRENCY, max_retries: int = EMBEDDING_MAX_RETRIES,
+                 count_tokens: Callable[[str], int] = count_embedding_tokens):
+        self.embedder = embedder or get_embedder()
+        self.model = self.embedder.model
+        self.batch_size = batch_size
+        self.batch_tokens = batch_tokens
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.count_tokens = count_tokens
+
+        # 예산은 인스턴스에 유지 → 여러 번 호출해도 분당 한도를 함께 적용
+        self.request_budget = MinuteBudget(rpm)
+        self.token_budget = MinuteBudget(tpm)
+
+        # 통계
+        self.requests = 0
+        self.tokens = 0
+        self.retries = 0
+        self.budget_wait = 0.0
+        self.seconds = 0.0
+
+    def make_batches(self, texts: Sequence[str]) -> List[List[int]]:
+        """입력 인덱스를 개수/토큰 상한 안에서 순서대로 묶음"""
+        batches, current, current_tokens = [], [], 0
+        for i, text in enumerate(texts):
+            tokens = self.count_tokens(text)
+            if current and (len(current) >= self.batch_size or current_tokens + tokens > self.batch_tokens):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(i)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    async def _embed_batch(self, texts: List[str], tokens: int, semaphore: asyncio.Semaphore) -> List[List[float]]:
+        for attempt in range(self.max_retries + 1):
+            await self.request_budget.acquire(1)
+            await self.token_budget.acquire(tokens)
+            try:
+                async with semaphore:
+                    vectors = await self.embedder.embed(texts)
+            except Exception as e:
+                status = getattr(e, "status_code", None)
+                retryable = status is None or status in RETRY_STATUSES or status >= 500
+                if not retryable or attempt == self.max_retries:
+                    raise
+                self.retries += 1
+                wait = _retry_after(e) or min(2 ** attempt, 30)
+                if status == 429:
+                    self.request_budget.pause(wait)
+                    self.token_budget.pause(wait)
+                print(f"⚠️ 임베딩 요청 재시도 {attempt + 1}/{self.max_retries} (status={status}, {wait:.1f}초 후)")
+                await asyncio.sleep(wait)
+                continue
+            self.requests += 1
+            self.tokens += tokens
+            return vectors
+
+    async def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        """전체 텍스트 임베딩 (입력 순서 유지)"""
+        texts = list(texts)
+        if not texts:
+            return []
+        started = time.perf_counter()
+        waited_before = self.request_budget.waited + self.token_budget.waited
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        batches = self.make_batches(texts)
+        results = await asyncio.gather(*(
+            self._embed_batch([texts[i] for i in batch], sum(self.count_tokens(texts[i]) for i in batch), semaphore)
+            for batch in batches
+        ))
+
+        vectors: List[Any] = [None] * len(texts)
+        for batch, batch_vectors in zip(batches, results):
+            for i, vector in zip(batch, batch_vectors):
+                vectors[i] = vector
+
+        self.budget_wait += self.request_budget.waited + self.token_budget.waited - waited_before
+        self.seconds += time.perf_counter() - started
+        return vectors
+
+    def embed_sync(self, texts: Sequence[str]) -> List[List[float]]:
+        """동기 코드용 (EmbeddingCache.embed 의 embed_fn 으로 사용)"""
+        return run_coroutine(self.embed(texts))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "requests": self.requests,
+            "tokens": self.tokens,
+            "retries": self.retries,
+            "seconds": round(self.seconds, 2),
+            "budget_wait_seconds": round(self.budget_wait, 2),
+        }
+
+    def print_stats(self):
+        s = self.stats()
+        print(f"🧮 임베딩 단계 [{s['model']}]: 요청 {s['requests']}회, 약 {s['tokens']} 토큰, "
+              f"재시도 {s['retries']}회, {s['seconds']}초 (예산 대기 {s['budget_wait_seconds']}초)")
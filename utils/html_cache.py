@@ -0,0 +1,156 @@
+# utils/html_cache.py
+"""
+크롤링한 원본 HTML의 디스크 캐시 (내용 주소 기반)
+- 본문은 sha256 해시 이름으로 gzip 압축 저장: objects/ab/abcdef....html.gz
+- URL → 해시, 수집 시각, ETag, Last-Modified 는 index.db(SQLite)에 기록
+- 조건부 요청(If-None-Match / If-Modified-Since) 헤더 생성
+- 본문 해시가 마지막 파싱 때와 같으면 다시 파싱할 필요 없음
+"""
+import os
+import gzip
+import hashlib
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional
+
+DEFAULT_CACHE_DIR = os.getenv("HTML_CACHE_DIR", "./data/html_cache")
+
+
+def object_path(cache_dir: str, sha: str) -> str:
+    """해시 → 본문 파일 경로 (다른 프로세스에서도 같은 규칙으로 읽기 위해 모듈 함수로 둠)"""
+    return os.path.join(cache_dir, "objects", sha[:2], f"{sha}.html.gz")
+
+
+def body_hash(body: str) -> str:
+    """HTML 본문의 sha256"""
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+class HtmlCache:
+    """URL 키 + 내용 주소 저장소 (여러 스레드에서 공유 가능)"""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.objects_dir = os.path.join(cache_dir, "objects")
+        os.makedirs(self.objects_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(cache_dir, "index.db"), check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL,
+                status INTEGER,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at TIMESTAMP,
+                parsed_sha256 TEXT
+            )
+        """)
+        self.conn.commit()
+
+        # 통계
+        self.hits = 0
+        self.writes = 0
+
+    def _object_path(self, sha: str) -> str:
+        return object_path(self.cache_dir, sha)
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """URL의 캐시 메타데이터 (없으면 None)"""
+        with self._lock:
+            row = self.conn.execute("SELECT * FROM pages WHERE url = ?", (url,)).fetchone()
+        return dict(row) if row else None
+
+    def read_body(self, sha: str) -> Optional[str]:
+        """해시로 본문 읽기"""
+        path = self._object_path(sha)
+        if not os.path.exists(path):
+            return None
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return f.read()
+
+    def get_body(self, url: str) -> Optional[str]:
+        """URL로 마지막 본문 읽기"""
+        entry = self.get(url)
+        return self.read_body(entry["sha256"]) if entry else None
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """저장된 ETag / Last-Modified 로 조건부 요청 헤더 구성"""
+        entry = self.get(url)
+        headers = {}
+        if entry and os.path.exists(self._object_path(entry["sha256"])):
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def put(self, url: str, body: str, status: int = 200,
+            etag: Optional[str] = None, last_modified: Optional[str] = None) -> Dict[str, Any]:
+        """
+        본문 저장 후 인덱스 갱신
+        반환: {sha256, changed, needs_parse}
+        """
+        sha = body_hash(body)
+        path = self._object_path(sha)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+            self.writes += 1
+
+        previous = self.get(url)
+        with self._lock:
+            self.conn.execute("""
+                INSERT INTO pages (url, sha256, status, etag, last_modified, fetched_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    sha256 = excluded.sha256,
+                    status = excluded.status,
+                    etag = excluded.etag,
+                    last_modified = excluded.last_modified,
+                    fetched_at = excluded.fetched_at
+            """, (url, sha, status, etag, last_modified, datetime.now().isoformat(timespec="seconds")))
+            self.conn.commit()
+
+        changed = previous is None or previous["sha256"] != sha
+        needs_parse = previous is None or previous.get("parsed_sha256") != sha
+        return {"sha256": sha, "changed": changed, "needs_parse": needs_parse}
+
+    def touch(self, url: str) -> Dict[str, Any]:
+        """304 Not Modified 응답: 수집 시각만 갱신"""
+        self.hits += 1
+        with self._lock:
+            self.conn.execute("UPDATE pages SET fetched_at = ? WHERE url = ?",
+                              (datetime.now().isoformat(timespec="seconds"), url))
+            self.conn.commit()
+        entry = self.get(url)
+        return {"sha256": entry["sha256"], "changed": False,
+                "needs_parse": entry.get("parsed_sha256") != entry["sha256"]}
+
+    def mark_parsed(self, url: str, sha: Optional[str] = None):
+        """해당 본문 해시로 파싱 완료 기록"""
+        with self._lock:
+            if sha is None:
+                self.conn.execute("UPDATE pages SET parsed_sha256 = sha256 WHERE url = ?", (url,))
+            else:
+                self.conn.execute("UPDATE pages SET parsed_sha256 = ? WHERE url = ?", (sha, url))
+            self.conn.commit()
+
+    def iter_pages(self, url_prefix: str = "") -> Iterator[Dict[str, Any]]:
+        """캐시된 페이지 메타데이터 순회 (재파싱용)"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT * FROM pages WHERE url LIKE ? ORDER BY url", (f"{url_prefix}%",)
+            ).fetchall()
+        for row in rows:
+            yield dict(row)
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,121 @@
+# utils/http_fetcher.py
+"""
+keep-alive HTTP 세션 기반 페이지 수집기
+- 대부분의 FDA 상세 페이지는 정적 HTML이라 브라우저 없이 받아올 수 있음
+- 차단/챌린지 응답이면 blocked=True 로 표시 → 호출 측에서 Playwright로 전환
+"""
+import os
+import time
+import asyncio
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.crawl_engine import USER_AGENT, EXTRA_HEADERS
+from utils.rate_limiter import get_rate_limiter
+
+# 차단으로 간주할 상태 코드
+BLOCK_STATUS_CODES = {401, 403, 429, 503}
+
+# 봇 차단/챌린지 페이지에 자주 나오는 문구
+CHALLENGE_MARKERS = [
+    "access denied",
+    "request unsuccessful",
+    "_incapsula_resource",
+    "pardon our interruption",
+    "<title>just a moment",
+    "cf-chl-",
+    "are you a robot",
+]
+
+HTTP_FIRST = os.getenv("CRAWL_HTTP_FIRST", "1") != "0"
+
+
+def is_blocked_response(status_code: int, text: str) -> bool:
+    """상태 코드 또는 본문 문구로 차단/챌린지 응답 여부 판단"""
+    if status_code in BLOCK_STATUS_CODES:
+        return True
+    # 챌린지 페이지는 짧으므로 앞부분만 확인
+    head = (text or "")[:5000].lower()
+    return any(marker in head for marker in CHALLENGE_MARKERS)
+
+
+class HttpFetcher:
+    """커넥션 풀을 공유하는 requests.Session 래퍼 (동기/비동기 모두 지원)"""
+
+    def __init__(self, pool_size: int = 8, timeout: float = 20.0, cache=None, limiter=None):
+        self.timeout = timeout
+        self.cache = cache  # utils.html_cache.HtmlCache (선택)
+        self.limiter = limiter or get_rate_limiter()  # 호스트별 속도 제한 (브라우저와 공유)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({'User-Agent': USER_AGENT, **EXTRA_HEADERS})
+
+        self._semaphore = asyncio.Semaphore(pool_size)
+
+        # 통계
+        self.requests = 0
+        self.bytes_received = 0
+        self.blocked = 0
+
+    def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """
+        URL 1개 요청
+        반환: {url, status, text, headers, blocked, error, seconds, from_cache, sha256, needs_parse}
+        캐시가 있으면 조건부 요청을 보내고, 304 응답이면 캐시 본문을 돌려줌
+        """
+        started = time.perf_counter()
+        result = {"url": url, "status": None, "text": "", "headers": {},
+                  "blocked": False, "error": None, "seconds": 0.0,
+                  "from_cache": False, "sha256": None, "needs_parse": True}
+
+        request_headers = dict(headers or {})
+        if self.cache is not None:
+            request_headers.update(self.cache.conditional_headers(url))
+
+        try:
+            response = self.limiter.get(url, session=self.session,
+                                        headers=request_headers or None, timeout=self.timeout)
+            self.requests += 1
+            self.bytes_received += len(response.content)
+
+            result["status"] = response.status_code
+            result["headers"] = dict(response.headers)
+
+            if response.status_code == 304 and self.cache is not None:
+                # 변경 없음 → 캐시 본문 사용
+                meta = self.cache.touch(url)
+                result["text"] = self.cache.read_body(meta["sha256"]) or ""
+                result["from_cache"] = True
+                result["sha256"] = meta["sha256"]
+                result["needs_parse"] = meta["needs_parse"]
+            else:
+                result["text"] = response.text
+                result["blocked"] = is_blocked_response(response.status_code, response.text)
+                if result["blocked"]:
+                    self.blocked += 1
+                elif response.status_code == 200 and self.cache is not None:
+                    meta = self.cache.put(url, response.text, status=200,
+                                          etag=response.headers.get("ETag"),
+                                          last_modified=response.headers.get("Last-Modified"))
+                    result["sha256"] = meta["sha256"]
+                    result["needs_parse"] = meta["needs_parse"]
+        except requests.exceptions.RequestException as e:
+            # 연결 차단/타임아웃도 브라우저로 재시도할 수 있도록 차단으로 취급
+            result["error"] = str(e)
+            result["blocked"] = True
+            self.blocked += 1
+
+        result["seconds"] = round(time.perf_counter() - started, 3)
+        return result
+
+    async def afetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """이벤트 루프를 막지 않도록 스레드에서 fetch 실행"""
+        async with self._semaphore:
+            return await asyncio.to_thread(self.fetch, url, headers)
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,114 @@
+# utils/listing_client.py
+"""
+FDA 리콜 목록 표(DataTables)의 JSON 데이터 엔드포인트 클라이언트
+- 화면의 "Next" 버튼 대신 start/length(offset, 페이지 크기)로 원하는 구간을 바로 요청
+- 1,000행도 요청 몇 번이면 끝남 (페이지 렌더링 없음)
+- 차단/형식 변경/빈 첫 페이지/해석 불가 행 등으로 쓸 수 없으면 ListingEndpointError → 호출 측에서 DOM 페이지 이동으로 전환
+"""
+import os
+import json
+from typing import Any, Dict, Iterator, List, Optional
+
+import requests
+
+from utils.crawl_engine import USER_AGENT
+from utils.http_fetcher import is_blocked_response
+from utils.rate_limiter import get_rate_limiter
+from utils.recall_parser import LISTING_BASE_URL, listing_rows_from_datatables
+
+LISTING_AJAX_URL = os.getenv("FDA_LISTING_AJAX_URL", "https://www.fda.gov/datatables/views/ajax")
+
+# 목록 페이지의 Drupal 뷰 설정 (날짜 내림차순). 바뀌면 FDA_LISTING_AJAX_PARAMS(JSON)로 덮어씀
+LISTING_AJAX_PARAMS = {
+    "view_name": "recall_solr_index",
+    "view_display_id": "recall_datatable_block_1",
+    "search_api_fulltext": "",
+    "order[0][column]": "0",
+    "order[0][dir]": "desc",
+}
+LISTING_AJAX_PARAMS.update(json.loads(os.getenv("FDA_LISTING_AJAX_PARAMS", "{}")))
+
+LISTING_PAGE_LENGTH = int(os.getenv("LISTING_PAGE_LENGTH", "200"))
+
+LISTING_JSON_FIRST = os.getenv("LISTING_JSON_FIRST", "1") != "0"
+
+
+class ListingEndpointError(Exception):
+    """JSON 엔드포인트를 쓸 수 없음 (차단, 비JSON 응답, 응답 형식 변경)"""
+
+
+class ListingClient:
+    """DataTables 서버 사이드 엔드포인트를 offset 단위로 조회"""
+
+    def __init__(self, timeout: float = 20.0, session=None, limiter=None,
+                 url: str = LISTING_AJAX_URL, params: Optional[Dict[str, str]] = None):
+        self.url = url
+        self.params = dict(LISTING_AJAX_PARAMS if params is None else params)
+        self.timeout = timeout
+        self.limiter = limiter or get_rate_limiter()
+        self.session = session or requests.Session()
+        self.session.headers.update({
+            "User-Agent": USER_AGENT,
+            "Accept": "application/json, text/javascript, */*; q=0.01",
+            "X-Requested-With": "XMLHttpRequest",
+            "Referer": LISTING_BASE_URL,
+        })
+        self._draw = 0
+
+        # 통계
+        self.requests = 0
+        self.bytes_received = 0
+
+    def fetch(self, start: int = 0, length: int = LISTING_PAGE_LENGTH) -> Dict[str, Any]:
+        """
+        start 번째 행부터 length개 요청
+        반환: {total, raw_count, rows} - rows는 normalize_listing_rows 와 같은 구조
+        첫 페이지가 비었는데 total 이 0이 아니거나(또는 모름), data 는 있는데 해석된 행이 없으면 ListingEndpointError
+        """
+        self._draw += 1
+        params = {**self.params, "draw": self._draw, "start": start, "length": length}
+        try:
+            response = self.limiter.get(self.url, session=self.session, params=params, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            raise ListingEndpointError(f"요청 실패: {e}") from e
+
+        self.requests += 1
+        self.bytes_received += len(response.content)
+        if response.status_code != 200 or is_blocked_response(response.status_code, response.text):
+            raise ListingEndpointError(f"차단 또는 오류 응답 (status={response.status_code})")
+
+        try:
+            payload = response.json()
+        except ValueError as e:
+            raise ListingEndpointError("JSON이 아닌 응답") from e
+
+        data = payload.get("data") if isinstance(payload, dict) else None
+        if not isinstance(data, list):
+            raise ListingEndpointError("응답에 data 배열 없음")
+
+        total = payload.get("recordsFiltered", payload.get("recordsTotal"))
+        total = int(total) if total is not None else None
+        rows = listing_rows_from_datatables(data)
+
+        # 200 응답이어도 쓸 수 없는 목록이면 DOM 으로 전환 ("새 데이터 없음"으로 오인 방지)
+        if start == 0 and not data and total != 0:
+            raise ListingEndpointError(f"첫 페이지가 비어 있음 (total={total})")
+        if data and not rows:
+            raise ListingEndpointError(f"행 {len(data)}개를 해석하지 못함 (뷰 설정 또는 셀 마크업 변경)")
+
+        return {"total": total, "raw_count": len(data), "rows": rows}
+
+    def iter_pages(self, start: int = 0, length: int = LISTING_PAGE_LENGTH,
+                   max_rows: Optional[int] = None) -> Iterator[List[Dict[str, Any]]]:
+        """start부터 length씩 차례로 요청해 페이지(행 목록) 단위로 반환"""
+        offset = start
+        while max_rows is None or offset - start < max_rows:
+            page = self.fetch(offset, length)
+            yield page["rows"]
+
+            offset += page["raw_count"]
+            if page["raw_count"] < length or (page["total"] is not None and offset >= page["total"]):
+                return
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,246 @@
+# utils/near_duplicates.py
+"""
+리콜 공지 근접 중복 탐지 (MinHash + LSH, NumPy 벡터화)
+- 본문 단어 5-gram 집합의 MinHash 서명(128개)을 계산해 fda_recalls.db 에 저장
+- LSH 밴드(32 x 4)로 후보를 좁힌 뒤 서명 일치 비율(Jaccard 추정)이 기준 이상이면 같은 클러스터
+- 클러스터마다 대표 1건만 ChromaDB에 색인, 나머지는 recall_clusters 에 대표 URL로 연결
+- 대표는 이미 색인된 기존 대표를 유지, 새 클러스터는 배치 안에서 가장 최근 공지
+
+사용 예 (기존 코퍼스 일괄 클러스터링 + 중복 청크 정리):
+    python -m utils.near_duplicates --db ./data/fda_recalls.db --prune-chroma
+"""
+import os
+import re
+import zlib
+import sqlite3
+import argparse
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+NEAR_DUP_DB_PATH = "./data/fda_recalls.db"
+NEAR_DUP_ENABLED = os.getenv("NEAR_DUP_ENABLED", "1") != "0"
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.85"))
+
+SHINGLE_SIZE = 5
+NUM_PERM = 128
+LSH_BANDS = 32
+LSH_ROWS = NUM_PERM // LSH_BANDS
+# 이보다 짧은 본문은 비교하지 않음 (짧은 공지끼리 우연히 겹치는 것 방지)
+MIN_WORDS = 30
+
+# 서명은 DB에 저장되므로 해시 파라미터는 고정 시드로 생성 (바꾸면 기존 서명과 비교 불가)
+_PRIME = np.uint64((1 << 31) - 1)
+_rng = np.random.default_rng(20240801)
+_PERM_A = _rng.integers(1, int(_PRIME), size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, int(_PRIME), size=NUM_PERM, dtype=np.uint64)
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+CREATE_NEAR_DUP_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS recall_minhash (
+        url TEXT PRIMARY KEY,
+        signature BLOB NOT NULL,
+        updated_at TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS recall_clusters (
+        url TEXT PRIMARY KEY,
+        canonical_url TEXT NOT NULL,
+        similarity REAL,
+        updated_at TIMESTAMP
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_recall_clusters_canonical ON recall_clusters(canonical_url)",
+]
+
+
+def minhash_signature(text: str) -> Optional[np.ndarray]:
+    """본문 → MinHash 서명 (uint32 x NUM_PERM), 너무 짧으면 None"""
+    words = _WORD_RE.findall((text or "").lower())
+    if len(words) < MIN_WORDS:
+        return None
+    shingles = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+    hashes %= _PRIME
+    # (a * x + b) mod p 를 순열 x 싱글 행렬로 한 번에 계산 → 순열별 최솟값
+    permuted = (_PERM_A[:, None] * hashes[None, :] + _PERM_B[:, None]) % _PRIME
+    return permuted.min(axis=1).astype(np.uint32)
+
+
+def band_keys(signature: np.ndarray) -> List[Tuple[int, bytes]]:
+    """LSH 밴드별 버킷 키"""
+    return [(band, rows.tobytes()) for band, rows in enumerate(signature.reshape(LSH_BANDS, LSH_ROWS))]
+
+
+class NearDuplicateIndex:
+    """저장된 서명 + LSH 버킷 (메모리) / 클러스터 연결 (SQLite)"""
+
+    def __init__(self, db_path: str = NEAR_DUP_DB_PATH, threshold: float = NEAR_DUP_THRESHOLD):
+        self.db_path = db_path
+        self.threshold = threshold
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        for sql in CREATE_NEAR_DUP_SQL:
+            self.conn.execute(sql)
+        self.conn.commit()
+
+        self.urls: List[str] = []
+        self.positions: Dict[str, int] = {}
+        self.signatures: List[np.ndarray] = []
+        self.canonical: Dict[str, str] = {}
+        self.buckets: Dict[Tuple[int, bytes], List[int]] = defaultdict(list)
+        self._load()
+
+    def close(self):
+        self.conn.close()
+
+    def _load(self):
+        rows = self.conn.execute("""
+            SELECT m.url, m.signature, COALESCE(c.canonical_url, m.url)
+            FROM recall_minhash m LEFT JOIN recall_clusters c ON c.url = m.url
+        """).fetchall()
+        for url, blob, canonical_url in rows:
+            self._add(url, np.frombuffer(blob, dtype=np.uint32), canonical_url)
+
+    def _add(self, url: str, signature: np.ndarray, canonical_url: str):
+        position = len(self.urls)
+        self.positions[url] = position
+        self.urls.append(url)
+        self.signatures.append(signature)
+        self.canonical[url] = canonical_url
+        for key in band_keys(signature):
+            self.buckets[key].append(position)
+
+    def best_match(self, url: str, signature: np.ndarray) -> Tuple[Optional[str], float]:
+        """LSH 후보 중 가장 비슷한 기존 공지의 대표 URL과 유사도 (기준 미만이면 None)"""
+        candidates = {pos for key in band_keys(signature) for pos in self.buckets.get(key, ())
+                      if self.urls[pos] != url}
+        if not candidates:
+            return None, 0.0
+        positions = np.fromiter(candidates, dtype=np.int64)
+        matrix = np.stack([self.signatures[pos] for pos in positions])
+        similarity = (matrix == signature).mean(axis=1)
+        best = int(similarity.argmax())
+        if similarity[best] < self.threshold:
+            return None, float(similarity[best])
+        return self.canonical[self.urls[positions[best]]], float(similarity[best])
+
+    def assign(self, items: List[Dict[str, Any]], text_key: str = "content") -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        배치를 클러스터에 배정하고 SQLite에 기록
+        반환: (색인할 대표 항목, 중복 항목 [{url, canonical_url, similarity}])
+        """
+        canonical_items, duplicates = [], []
+        now = datetime.now().isoformat(timespec="seconds")
+        signature_rows, cluster_rows = [], []
+
+        # 새 클러스터의 대표가 최신 공지가 되도록 날짜 내림차순 처리
+        ordered = sorted(items, key=lambda item: item.get("fda_publish_date") or "", reverse=True)
+        for item in ordered:
+            url = item.get("url")
+            signature = minhash_signature(item.get(text_key, "")) if url else None
+            if signature is None:
+                canonical_items.append(item)
+                continue
+
+            canonical_url, similarity = self.best_match(url, signature)
+            # 이미 다른 공지의 대표인 URL은 그대로 대표 유지 (색인된 청크를 옮기지 않음)
+            if canonical_url is None or self.canonical.get(url) == url:
+                canonical_url, similarity = url, 1.0
+            if url in self.positions:
+                self._replace(url, signature, canonical_url)
+            else:
+                self._add(url, signature, canonical_url)
+
+            signature_rows.append((url, signature.tobytes(), now))
+            cluster_rows.append((url, canonical_url, similarity, now))
+            if canonical_url == url:
+                canonical_items.append(item)
+            else:
+                duplicates.append({"url": url, "canonical_url": canonical_url, "similarity": similarity})
+
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO recall_minhash (url, signature, updated_at) VALUES (?, ?, ?)",
+                                  signature_rows)
+            self.conn.executemany("""
+                INSERT OR REPLACE INTO recall_clusters (url, canonical_url, similarity, updated_at)
+                VALUES (?, ?, ?, ?)
+            """, cluster_rows)
+
+        # 입력 순서 유지
+        order = {id(item): i for i, item in enumerate(items)}
+        canonical_items.sort(key=lambda item: order[id(item)])
+        if duplicates:
+            print(f"🪞 근접 중복 {len(duplicates)}개 → 대표 공지에 연결 (색인 제외)")
+        return canonical_items, duplicates
+
+    def _replace(self, url: str, signature: np.ndarray, canonical_url: str):
+        """재수집된 URL의 서명 교체 (기존 버킷 위치는 새 서명으로 다시 등록)"""
+        position = self.positions[url]
+        for key in band_keys(self.signatures[position]):
+            self.buckets[key].remove(position)
+        self.signatures[position] = signature
+        self.canonical[url] = canonical_url
+        for key in band_keys(signature):
+            self.buckets[key].append(position)
+
+    def members(self, canonical_url: str) -> List[Dict[str, Any]]:
+        """대표 URL에 연결된 중복 공지 목록"""
+        rows = self.conn.execute("""
+            SELECT url, similarity FROM recall_clusters
+            WHERE canonical_url = ? AND url != canonical_url ORDER BY similarity DESC
+        """, (canonical_url,)).fetchall()
+        return [{"url": url, "similarity": similarity} for url, similarity in rows]
+
+    def stats(self) -> Dict[str, int]:
+        total, clusters = self.conn.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT canonical_url) FROM recall_clusters"
+        ).fetchone()
+        return {"recalls": total, "clusters": clusters, "duplicates": total - clusters}
+
+
+def cluster_corpus(db_path: str = NEAR_DUP_DB_PATH, batch_size: int = 2000) -> List[Dict[str, Any]]:
+    """recalls 테이블 전체를 클러스터링 → 중복 항목 목록"""
+    index = NearDuplicateIndex(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    duplicates = []
+    try:
+        cursor = conn.execute("SELECT url, fda_publish_date, content FROM recalls ORDER BY fda_publish_date DESC")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            _, batch_duplicates = index.assign([dict(row) for row in rows])
+            duplicates.extend(batch_duplicates)
+        stats = index.stats()
+        print(f"🧬 클러스터링 완료: 공지 {stats['recalls']}개 → 클러스터 {stats['clusters']}개 (중복 {stats['duplicates']}개)")
+    finally:
+        conn.close()
+        index.close()
+    return duplicates
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="리콜 공지 근접 중복 클러스터링")
+    parser.add_argument("--db", default=NEAR_DUP_DB_PATH)
+    parser.add_argument("--prune-chroma", action="store_true", help="중복 공지의 청크를 ChromaDB에서 삭제")
+    parser.add_argument("--chroma-path", default="./data/chroma_db_recall")
+    parser.add_argument("--collection", default="FDA_recalls")
+    args = parser.parse_args()
+
+    found = cluster_corpus(args.db)
+    if args.prune_chroma and found:
+        import chromadb
+
+        collection = chromadb.PersistentClient(path=args.chroma_path).get_collection(args.collection)
+        before = collection.count()
+        urls = [duplicate["url"] for duplicate in found]
+        for start in range(0, len(urls), 500):
+            collection.delete(where={"url": {"$in": urls[start:start + 500]}})
+        print(f"🧹 ChromaDB 정리: {before}개 → {collection.count()}개 청크")
@@ -0,0 +1,226 @@
+# utils/rate_limiter.py
+"""
+호스트별 요청 속도 제한기 (크롤러 / eCFR 수집기 / 뉴스 탭 공용)
+- 토큰 버킷: 호스트마다 초당 요청 수(rate)와 순간 허용량(burst)
+- 동시 요청 수 상한 (호스트별)
+- AIMD 적응형 조절: 성공하면 rate를 조금씩 올리고,
+  403/429/5xx·연결 오류면 rate를 절반으로 줄이고 잠시 쉼 (Retry-After 우선)
+- 스레드(requests)와 asyncio(Playwright) 양쪽에서 같은 제한기를 공유
+
+사용 예:
+    limiter = get_rate_limiter()
+    response = limiter.get(url, headers=headers, timeout=30)      # requests 간편 호출
+
+    with limiter.slot(url):                                       # 직접 요청하는 경우
+        response = session.get(url)
+    limiter.record(url, response.status_code, response.headers.get("Retry-After"))
+
+    async with limiter.aslot(url):
+        response = await page.goto(url)
+    limiter.record(url, response.status if response else None)
+"""
+import os
+import time
+import asyncio
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+
+# 이 상태 코드가 오면 속도를 줄임
+THROTTLE_STATUS_CODES = {403, 429}
+
+DEFAULT_RATE = float(os.getenv("RATE_LIMIT_DEFAULT_RPS", "2"))
+
+
+@dataclass
+class HostPolicy:
+    """호스트별 제한 설정"""
+    rate: float = DEFAULT_RATE        # 시작 속도 (초당 요청 수)
+    min_rate: float = 0.1             # 최저 속도
+    max_rate: float = 10.0            # 최고 속도
+    burst: int = 4                    # 토큰 버킷 크기
+    concurrency: int = 4              # 동시 요청 상한
+    increase: float = 0.2             # 성공 1회당 rate 증가량 (additive increase)
+    decrease: float = 0.5             # 차단 시 rate 배율 (multiplicative decrease)
+    cooldown: float = 5.0             # 차단 직후 쉬는 기본 시간(초)
+
+
+# 호스트별 기본 정책 (모르는 호스트는 HostPolicy() 기본값)
+HOST_POLICIES: Dict[str, HostPolicy] = {
+    "www.fda.gov": HostPolicy(rate=2.0, max_rate=8.0, concurrency=4),
+    "www.ecfr.gov": HostPolicy(rate=1.0, max_rate=4.0, concurrency=2),
+    "www.thinkfood.co.kr": HostPolicy(rate=4.0, max_rate=10.0, concurrency=4),
+    "api.openai.com": HostPolicy(rate=2.0, max_rate=8.0, concurrency=4, cooldown=10.0),
+}
+
+
+def host_of(url: str) -> str:
+    """URL → 호스트 이름 (호스트 이름만 넘겨도 그대로 사용)"""
+    return urlparse(url).netloc or url
+
+
+def is_throttle_status(status: Optional[int]) -> bool:
+    """속도를 줄여야 하는 응답인지 (None = 연결 오류/타임아웃)"""
+    return status is None or status in THROTTLE_STATUS_CODES or status >= 500
+
+
+def _parse_retry_after(value: Any) -> Optional[float]:
+    """Retry-After 헤더(초) → float (날짜 형식 등은 무시)"""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class HostLimiter:
+    """호스트 1개의 토큰 버킷 + 동시성 상한 + AIMD 상태"""
+
+    def __init__(self, host: str, policy: HostPolicy):
+        self.host = host
+        self.policy = policy
+        self.rate = policy.rate
+        self.tokens = float(policy.burst)
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(policy.concurrency)
+
+        # 통계
+        self.requests = 0
+        self.throttled = 0
+        self.waited_seconds = 0.0
+
+    def _reserve(self) -> float:
+        """토큰 1개 예약 → 기다려야 할 시간(초). 토큰이 모자라면 미리 빚을 짐"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.policy.burst, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+            wait = 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+            wait = max(wait, self.blocked_until - now)
+            self.requests += 1
+            self.waited_seconds += wait
+            return wait
+
+    def record(self, status: Optional[int], retry_after: Any = None):
+        """응답 결과로 속도 조절 (AIMD)"""
+        with self._lock:
+            if is_throttle_status(status):
+                self.throttled += 1
+                self.rate = max(self.policy.min_rate, self.rate * self.policy.decrease)
+                pause = _parse_retry_after(retry_after)
+                pause = self.policy.cooldown if pause is None else pause
+                self.blocked_until = max(self.blocked_until, time.monotonic() + pause)
+                self.tokens = min(self.tokens, 0.0)
+            else:
+                self.rate = min(self.policy.max_rate, self.rate + self.policy.increase)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rate": round(self.rate, 2),
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "waited_seconds": round(self.waited_seconds, 2),
+        }
+
+
+class RateLimiter:
+    """호스트 이름 → HostLimiter 레지스트리"""
+
+    def __init__(self, policies: Optional[Dict[str, HostPolicy]] = None):
+        self.policies = dict(HOST_POLICIES if policies is None else policies)
+        self._hosts: Dict[str, HostLimiter] = {}
+        self._lock = threading.Lock()
+
+    def host(self, url: str) -> HostLimiter:
+        name = host_of(url)
+        with self._lock:
+            if name not in self._hosts:
+                self._hosts[name] = HostLimiter(name, self.policies.get(name, HostPolicy()))
+            return self._hosts[name]
+
+    def set_policy(self, host: str, policy: HostPolicy):
+        """호스트 정책 교체 (이미 만든 HostLimiter도 새 정책으로 초기화)"""
+        with self._lock:
+            self.policies[host] = policy
+            self._hosts.pop(host, None)
+
+    @contextmanager
+    def slot(self, url: str):
+        """(스레드용) 동시성 슬롯 확보 + 토큰 대기"""
+        limiter = self.host(url)
+        limiter._slots.acquire()
+        try:
+            wait = limiter._reserve()
+            if wait > 0:
+                time.sleep(wait)
+            yield limiter
+        finally:
+            limiter._slots.release()
+
+    @asynccontextmanager
+    async def aslot(self, url: str):
+        """(asyncio용) 이벤트 루프를 막지 않고 슬롯 확보 + 토큰 대기"""
+        limiter = self.host(url)
+        if not limiter._slots.acquire(blocking=False):
+            # 스레드 세마포어 대기는 작업 스레드에서 (폴링 없이 FIFO 순서로 깨어남)
+            acquiring = asyncio.ensure_future(asyncio.to_thread(limiter._slots.acquire))
+            try:
+                await asyncio.shield(acquiring)
+            except asyncio.CancelledError:
+                # 취소돼도 스레드는 결국 슬롯을 잡으므로 잡는 즉시 반납
+                acquiring.add_done_callback(lambda f: f.cancelled() or f.exception() or limiter._slots.release())
+                raise
+        try:
+            wait = limiter._reserve()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            yield limiter
+        finally:
+            limiter._slots.release()
+
+    def record(self, url: str, status: Optional[int], retry_after: Any = None):
+        """요청 결과 보고 (status=None 은 연결 오류/타임아웃)"""
+        self.host(url).record(status, retry_after)
+
+    def get(self, url: str, session=None, **kwargs) -> requests.Response:
+        """제한기를 거치는 requests GET (예외는 그대로 전달)"""
+        client = session or requests
+        with self.slot(url):
+            try:
+                response = client.get(url, **kwargs)
+            except requests.exceptions.RequestException:
+                self.record(url, None)
+                raise
+        self.record(url, response.status_code, response.headers.get("Retry-After"))
+        return response
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """호스트별 현재 속도/요청/차단 횟수"""
+        with self._lock:
+            hosts = dict(self._hosts)
+        return {name: limiter.stats() for name, limiter in hosts.items()}
+
+    def print_stats(self):
+        for name, s in self.stats().items():
+            print(f"🚦 {name}: {s['rate']} req/s, 요청 {s['requests']}회, "
+                  f"차단 {s['throttled']}회, 대기 {s['waited_seconds']}초")
+
+
+_default_limiter: Optional[RateLimiter] = None
+_default_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """프로세스 전체에서 공유하는 제한기"""
+    global _default_limiter
+    with _default_lock:
+        if _default_limiter is None:
+            _default_limiter = RateLimiter()
+        return _default_limiter
@@ -0,0 +1,267 @@
+# utils/recall_parser.py
+"""
+FDA 리콜 목록/상세 페이지 필드 추출
+- 브라우저 안에서 page.evaluate 한 번으로 필요한 값을 모두 JSON으로 가져옴
+- HTML 문자열만 받는 순수 함수 parse_recall_detail / parse_listing (lxml, 네트워크·브라우저 불필요)
+- 날짜 변환, 리콜 원인 분리 등 후처리는 파이썬 쪽에서 공통 처리
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from urllib.parse import urljoin
+
+import lxml.etree
+import lxml.html
+
+LISTING_BASE_URL = "https://www.fda.gov/safety/recalls-market-withdrawals-safety-alerts/"
+
+# 목록 테이블의 모든 행을 한 번에 추출 (날짜 / 브랜드 링크 / 제품타입)
+LISTING_EXTRACT_JS = """
+() => Array.from(document.querySelectorAll('table tr')).map(tr => {
+    const cell = n => tr.querySelector(`td:nth-child(${n})`);
+    const dateCell = cell(1);
+    const link = tr.querySelector('td:nth-child(2) a');
+    const typeCell = cell(4);
+    if (!dateCell || !link || !typeCell) return null;
+    return {
+        date: dateCell.textContent || '',
+        href: link.getAttribute('href') || '',
+        brand: link.textContent || '',
+        product_type: typeCell.textContent || ''
+    };
+}).filter(Boolean)
+"""
+
+# 상세 페이지의 dt/dd 필드와 회사 발표문 문단을 한 번에 추출
+DETAIL_EXTRACT_JS = """
+() => {
+    const fields = Array.from(document.querySelectorAll('dt')).map(dt => {
+        const dd = dt.nextElementSibling;
+        if (!dd || dd.tagName !== 'DD') return null;
+        return {
+            label: (dt.textContent || '').trim(),
+            text: dd.textContent || '',
+            items: Array.from(dd.querySelectorAll('.field--item')).map(el => el.textContent || '')
+        };
+    }).filter(Boolean);
+
+    const paragraphs = [];
+    const heading = Array.from(document.querySelectorAll('h2'))
+        .find(h2 => (h2.textContent || '').includes('Company Announcement'));
+    if (heading) {
+        for (let el = heading.nextElementSibling; el; el = el.nextElementSibling) {
+            if (el.tagName === 'P' && !el.closest('.inset_column')) {
+                paragraphs.push(el.textContent || '');
+            }
+        }
+    }
+    return {fields, paragraphs};
+}
+"""
+
+
+def _has_class(class_name: str) -> str:
+    """XPath 클래스 매칭 조건"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"
+
+
+def _parse_tree(html: str):
+    """HTML 문자열 → lxml 트리 (빈 문서 등 파싱 불가면 ValueError)"""
+    try:
+        return lxml.html.fromstring(html)
+    except lxml.etree.ParserError as e:
+        raise ValueError(f"HTML 파싱 실패: {e}") from e
+
+
+def extract_detail_fields_from_html(html: str) -> Dict[str, Any]:
+    """정적 HTML에서 DETAIL_EXTRACT_JS 와 같은 {fields, paragraphs} 구조 추출 (lxml)"""
+    tree = _parse_tree(html)
+
+    fields = []
+    for dt in tree.iter("dt"):
+        dd = dt.getnext()
+        if dd is None or dd.tag != "dd":
+            continue
+        fields.append({
+            "label": dt.text_content().strip(),
+            "text": dd.text_content(),
+            "items": [el.text_content() for el in dd.xpath(f".//*[{_has_class('field--item')}]")],
+        })
+
+    paragraphs = []
+    for h2 in tree.iter("h2"):
+        if "Company Announcement" not in h2.text_content():
+            continue
+        for el in h2.itersiblings():
+            if el.tag == "p" and not el.xpath(f"ancestor-or-self::*[{_has_class('inset_column')}]"):
+                paragraphs.append(el.text_content())
+        break
+
+    return {"fields": fields, "paragraphs": paragraphs}
+
+
+def extract_listing_cells_from_html(html: str) -> List[Dict[str, str]]:
+    """정적 HTML에서 LISTING_EXTRACT_JS 와 같은 행 구조 추출 (lxml)"""
+    tree = _parse_tree(html)
+    raw_rows = []
+    for tr in tree.iter("tr"):
+        cells = tr.xpath("./td")
+        links = cells[1].xpath(".//a") if len(cells) >= 2 else []
+        if len(cells) < 4 or not links:
+            continue
+        raw_rows.append({
+            "date": cells[0].text_content(),
+            "href": links[0].get("href") or "",
+            "brand": links[0].text_content(),
+            "product_type": cells[3].text_content(),
+        })
+    return raw_rows
+
+
+def normalize_listing_date(date_text: str) -> Optional[str]:
+    """목록 날짜 문자열을 YYYY-MM-DD로 변환 (파싱 불가 시 None)"""
+    date_text = (date_text or "").strip()
+
+    if 'T' in date_text:
+        return date_text.split('T')[0]
+    if '/' in date_text:
+        try:
+            return datetime.strptime(date_text, "%m/%d/%Y").strftime("%Y-%m-%d")
+        except ValueError:
+            return date_text
+    if '-' in date_text and len(date_text) == 10:
+        return date_text
+    return None
+
+
+def is_food_beverage(product_type_text: str) -> bool:
+    """콤마로 분리한 첫 번째 제품타입이 'Food & Beverages'인지 확인"""
+    first_part = (product_type_text or "").split(',')[0].strip()
+    return first_part.lower() == "food & beverages"
+
+
+def normalize_listing_rows(raw_rows: List[Dict[str, str]], base_url: str = LISTING_BASE_URL) -> List[Dict[str, Any]]:
+    """추출된 목록 행을 날짜/URL/제품타입이 정리된 dict로 변환"""
+    rows = []
+    for raw in raw_rows:
+        rows.append({
+            "name": (raw.get("brand") or "").strip(),
+            "url": urljoin(base_url, raw.get("href") or ""),
+            "date": normalize_listing_date(raw.get("date")),
+            "product_type": (raw.get("product_type") or "").strip().lower(),
+        })
+    return rows
+
+
+def _fragment(cell_html: Any):
+    """DataTables 셀(HTML 문자열) → lxml 요소"""
+    return lxml.html.fragment_fromstring(str(cell_html or ""), create_parent="div")
+
+
+def listing_rows_from_datatables(data_rows: List[Any], base_url: str = LISTING_BASE_URL) -> List[Dict[str, Any]]:
+    """
+    DataTables JSON 응답의 data 배열 → normalize_listing_rows 결과와 같은 구조
+    셀 순서는 화면 표와 동일 (날짜 / 브랜드 링크 / 제품 설명 / 제품타입 / ...)
+    """
+    raw_rows = []
+    for cells in data_rows:
+        if isinstance(cells, dict):
+            cells = list(cells.values())
+        if not isinstance(cells, list) or len(cells) < 4:
+            continue
+        links = _fragment(cells[1]).xpath(".//a[@href]")
+        if not links:
+            continue
+        raw_rows.append({
+            "date": _fragment(cells[0]).text_content(),
+            "href": links[0].get("href"),
+            "brand": links[0].text_content(),
+            "product_type": _fragment(cells[3]).text_content(),
+        })
+    return normalize_listing_rows(raw_rows, base_url)
+
+
+def parse_listing(html: str, base_url: str = LISTING_BASE_URL) -> List[Dict[str, Any]]:
+    """목록 페이지 HTML → 행 목록 {name, url, date, product_type} (순수 함수)"""
+    return normalize_listing_rows(extract_listing_cells_from_html(html), base_url)
+
+
+async def extract_listing_rows(page, base_url: str = LISTING_BASE_URL) -> List[Dict[str, Any]]:
+    """목록 페이지의 모든 행을 page.evaluate 1회로 추출"""
+    raw_rows = await page.evaluate(LISTING_EXTRACT_JS)
+    return normalize_listing_rows(raw_rows, base_url)
+
+
+def _format_long_date(raw: str) -> str:
+    """'January 5, 2025' → '2025-01-05' (실패 시 원문 유지)"""
+    raw = (raw or "").strip()
+    try:
+        return datetime.strptime(raw, "%B %d, %Y").strftime("%Y-%m-%d")
+    except ValueError:
+        return raw
+
+
+def _find_field(fields: List[Dict[str, Any]], label: str) -> Optional[Dict[str, Any]]:
+    """라벨 문자열을 포함하는 첫 번째 dt/dd 필드"""
+    label = label.lower()
+    for field in fields:
+        if label in (field.get("label") or "").lower():
+            return field
+    return None
+
+
+def _field_text(fields, label: str) -> str:
+    field = _find_field(fields, label)
+    return (field.get("text") or "").strip() if field else ""
+
+
+def _field_first_item(fields, label: str) -> str:
+    field = _find_field(fields, label)
+    if not field or not field.get("items"):
+        return ""
+    return (field["items"][0] or "").strip()
+
+
+def _split_recall_reason(total_recall_reason: str) -> str:
+    """'Product Type' 값에서 리콜 원인 분리 (두 번째 줄, 없으면 마지막 단어)"""
+    if not total_recall_reason or not total_recall_reason.strip():
+        return ""
+    lines = total_recall_reason.strip().split('\n')
+    if len(lines) >= 2:
+        return lines[1].strip()
+    return total_recall_reason.split()[-1]
+
+
+def build_recall_record(url: str, extracted: Dict[str, Any]) -> Dict[str, Any]:
+    """추출된 상세 필드를 recalls 스키마 dict로 변환"""
+    fields = extracted.get("fields") or []
+    if not fields:
+        raise ValueError("상세 필드(dt/dd)를 찾을 수 없습니다")
+
+    brand_field = _find_field(fields, "Brand Name")
+    brand_names = [b.strip() for b in (brand_field or {}).get("items", []) if b and b.strip()]
+
+    paragraphs = [p.strip() for p in extracted.get("paragraphs") or [] if p and p.strip()]
+
+    return {
+        "document_type": "recall",
+        "url": url,
+        "company_announcement_date": _format_long_date(_field_text(fields, "Company Announcement Date")),
+        "fda_publish_date": _format_long_date(_field_text(fields, "FDA Publish Date")),
+        "company_name": _field_text(fields, "Company Name"),
+        "brand_name": "/".join(brand_names),
+        "recall_reason": _split_recall_reason(_field_text(fields, "Product Type")),
+        "recall_reason_detail": _field_first_item(fields, "Reason for Announcement"),
+        "product_type": _field_first_item(fields, "Product Description"),
+        "content": "\n\n".join(paragraphs),
+    }
+
+
+def parse_recall_detail(html: str, url: str = "") -> Dict[str, Any]:
+    """상세 페이지 HTML → recalls 스키마 dict (순수 함수, 필드가 없으면 ValueError)"""
+    return build_recall_record(url, extract_detail_fields_from_html(html))
+
+
+async def extract_recall_detail(page, url: str) -> Dict[str, Any]:
+    """상세 페이지의 모든 필드를 page.evaluate 1회로 추출"""
+    extracted = await page.evaluate(DETAIL_EXTRACT_JS)
+    return build_recall_record(url, extracted)
@@ -0,0 +1,108 @@
+# utils/resource_policy.py
+"""
+헤드리스 크롤링용 네트워크 요청 필터 (Playwright route)
+- 파싱에 쓰지 않는 리소스 타입(이미지/폰트/미디어 등)과 분석·광고 도메인 요청을 차단
+- strict 모드에서는 허용 도메인(fda.gov) 밖의 서드파티 요청을 문서 외 전부 차단
+- 실행별 카운터: 전체/차단 요청 수, 차단 사유별 개수, 절약한 바이트 추정치
+"""
+import os
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlparse
+
+RESOURCE_POLICY_ENABLED = os.getenv("CRAWL_BLOCK_RESOURCES", "1") != "0"
+RESOURCE_POLICY_STRICT = os.getenv("CRAWL_RESOURCE_STRICT", "0") == "1"
+
+DEFAULT_BLOCKED_TYPES = [t.strip() for t in os.getenv("CRAWL_BLOCK_TYPES", "image,media,font").split(",") if t.strip()]
+
+DEFAULT_ALLOWED_DOMAINS = ["fda.gov"]
+
+# 분석/광고/소셜 위젯 (본문 파싱과 무관)
+DEFAULT_BLOCKED_DOMAINS = [
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "googlesyndication.com",
+    "facebook.net",
+    "facebook.com",
+    "twitter.com",
+    "addthis.com",
+    "siteimprove.com",
+    "siteimproveanalytics.com",
+    "digitalgov.gov",
+    "newrelic.com",
+    "nr-data.net",
+    "hotjar.com",
+    "youtube.com",
+    "ytimg.com",
+]
+
+# 차단한 요청의 절약 바이트 추정용 평균 크기 (응답을 받지 않으므로 실제 크기는 알 수 없음)
+ESTIMATED_BYTES = {
+    "image": 30_000,
+    "media": 300_000,
+    "font": 40_000,
+    "stylesheet": 25_000,
+    "script": 50_000,
+}
+DEFAULT_ESTIMATED_BYTES = 10_000
+
+
+def _domain_matches(host: str, domains: Iterable[str]) -> bool:
+    """host가 domains 중 하나이거나 그 하위 도메인인지"""
+    host = (host or "").lower()
+    return any(host == d or host.endswith("." + d) for d in domains)
+
+
+class ResourcePolicy:
+    """리소스 타입 + 도메인 기준 차단/허용 규칙과 카운터"""
+
+    def __init__(self, blocked_types: Optional[Iterable[str]] = None,
+                 blocked_domains: Optional[Iterable[str]] = None,
+                 allowed_domains: Optional[Iterable[str]] = None,
+                 strict: bool = RESOURCE_POLICY_STRICT):
+        self.blocked_types = set(DEFAULT_BLOCKED_TYPES if blocked_types is None else blocked_types)
+        self.blocked_domains = list(DEFAULT_BLOCKED_DOMAINS if blocked_domains is None else blocked_domains)
+        self.allowed_domains = list(DEFAULT_ALLOWED_DOMAINS if allowed_domains is None else allowed_domains)
+        self.strict = strict
+
+        # 통계
+        self.requests = 0
+        self.blocked = 0
+        self.blocked_by_reason: Dict[str, int] = {}
+        self.estimated_bytes_saved = 0
+
+    def block_reason(self, url: str, resource_type: str) -> Optional[str]:
+        """차단 사유 (허용이면 None)"""
+        host = urlparse(url).hostname or ""
+        if not url.startswith(("http://", "https://")):
+            return None  # data:, blob: 등은 네트워크 요청이 아님
+        if resource_type in self.blocked_types:
+            return f"type:{resource_type}"
+        if _domain_matches(host, self.blocked_domains):
+            return "domain"
+        if self.strict and resource_type != "document" and not _domain_matches(host, self.allowed_domains):
+            return "third_party"
+        return None
+
+    async def handle(self, route):
+        """context.route("**/*", policy.handle) 에 등록하는 핸들러"""
+        request = route.request
+        self.requests += 1
+        reason = self.block_reason(request.url, request.resource_type)
+        if reason is None:
+            # 다른 라우트(HAR 재생 등)가 있으면 그쪽으로 넘김
+            await route.fallback()
+            return
+
+        self.blocked += 1
+        self.blocked_by_reason[reason] = self.blocked_by_reason.get(reason, 0) + 1
+        self.estimated_bytes_saved += ESTIMATED_BYTES.get(request.resource_type, DEFAULT_ESTIMATED_BYTES)
+        await route.abort("blockedbyclient")
+
+    def stats(self) -> Dict[str, int]:
+        """텔레메트리에 합산할 카운터"""
+        return {
+            "resource_requests": self.requests,
+            "resource_blocked": self.blocked,
+            "resource_bytes_saved_est": self.estimated_bytes_saved,
+        }
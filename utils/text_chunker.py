@@ -0,0 +1,194 @@
+# utils/text_chunker.py
+"""
+토큰 기준 스트리밍 청커 (원문 위치 포함)
+- 문단 → (너무 길면) 문장 → (그래도 길면) 단어 → (한 단어가 넘치면) 문자 구간 단위로 원문을 한 번만 훑어서 조각(offset) 생성
+- 조각을 임베딩 토큰 수 기준으로 max_tokens 까지 채워 청크로 묶음 (문자열 재조립 없음)
+- 겹침도 토큰 수 기준: 이전 청크 끝쪽 조각을 overlap_tokens 이내로 다음 청크 앞에 포함
+- 각 청크는 원문 text[start:end] 그대로 → 하이라이트용 위치만 저장하면 됨
+
+토큰 수는 tiktoken(cl100k_base, text-embedding-3 계열)을 쓰고, 설치/로딩이 안 되면 근사치 사용
+"""
+import os
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "512"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "64"))
+TOKEN_ENCODING = "cl100k_base"
+
+_PARAGRAPH_RE = re.compile(r"\S(?:.*?\S)?(?=\n\s*\n|\s*\Z)", re.DOTALL)
+_SENTENCE_RE = re.compile(r"\S.*?(?:[.!?](?=\s)|\Z)", re.DOTALL)
+_WORD_RE = re.compile(r"\S+")
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+
+_encoder = None
+_encoder_loaded = False
+
+
+def _get_encoder():
+    """tiktoken 인코더 (한 번만 시도, 실패하면 None → 근사치)"""
+    global _encoder, _encoder_loaded
+    if not _encoder_loaded:
+        _encoder_loaded = True
+        try:
+            import tiktoken
+            _encoder = tiktoken.get_encoding(TOKEN_ENCODING)
+        except Exception as e:  # 미설치 또는 BPE 파일 다운로드 불가 (오프라인)
+            print(f"⚠️ tiktoken 사용 불가 ({type(e).__name__}) → 토큰 수 근사치 사용")
+            _encoder = None
+    return _encoder
+
+
+def approx_tokens(text: str) -> int:
+    """토큰 수 근사치: 단어/기호 조각 + 긴 단어는 6자마다 1토큰 추가"""
+    return sum(1 + (len(piece) - 1) // 6 for piece in _PIECE_RE.findall(text))
+
+
+def count_tokens(text: str) -> int:
+    """임베딩 모델 기준 토큰 수"""
+    encoder = _get_encoder()
+    if encoder is None:
+        return approx_tokens(text)
+    return len(encoder.encode(text, disallowed_special=()))
+
+
+@dataclass
+class TextChunk:
+    text: str
+    start: int
+    end: int
+    tokens: int
+
+
+def _spans(pattern: re.Pattern, text: str, start: int, end: int) -> List[Tuple[int, int]]:
+    return [(m.start(), m.end()) for m in pattern.finditer(text, start, end)]
+
+
+def _split_long_word(text: str, start: int, end: int, max_tokens: int) -> List[Tuple[int, int, int]]:
+    """max_tokens 를 넘는 한 단어(긴 URL, 로트 코드, 공백 없는 문자열)를 max_tokens 이내 문자 구간으로 분할"""
+    pieces = []
+    width = max(1, (end - start) * max_tokens // count_tokens(text[start:end]))
+    while start < end:
+        piece_end = min(end, start + width)
+        tokens = count_tokens(text[start:piece_end])
+        # 넘치면 토큰 비율만큼 줄여서 다시 셈 (매번 길이가 줄어듦)
+        while tokens > max_tokens and piece_end - start > 1:
+            piece_end = start + max(1, (piece_end - start) * max_tokens // tokens)
+            tokens = count_tokens(text[start:piece_end])
+        pieces.append((start, piece_end, tokens))
+        start = piece_end
+    return pieces
+
+
+def _split_words(text: str, start: int, end: int, max_tokens: int) -> List[Tuple[int, int, int]]:
+    """단어를 max_tokens 이내로 이어붙인 조각 (한 단어가 넘치면 그 단어를 문자 구간으로 나눈 조각)"""
+    pieces = []
+    piece_start, piece_end, piece_tokens = None, None, 0
+    for word_start, word_end in _spans(_WORD_RE, text, start, end):
+        tokens = count_tokens(text[word_start:word_end])
+        if tokens > max_tokens:
+            if piece_start is not None:
+                pieces.append((piece_start, piece_end, piece_tokens))
+                piece_start, piece_tokens = None, 0
+            pieces.extend(_split_long_word(text, word_start, word_end, max_tokens))
+            continue
+        if piece_start is not None and piece_tokens + tokens > max_tokens:
+            pieces.append((piece_start, piece_end, piece_tokens))
+            piece_start, piece_tokens = None, 0
+        if piece_start is None:
+            piece_start = word_start
+        piece_end = word_end
+        piece_tokens += tokens
+    if piece_start is not None:
+        pieces.append((piece_start, piece_end, piece_tokens))
+    return pieces
+
+
+def paragraph_spans(text: str) -> List[Tuple[int, int]]:
+    """문단(빈 줄 구분) 위치 목록 (앞뒤 공백 제외)"""
+    return _spans(_PARAGRAPH_RE, text, 0, len(text))
+
+
+def _units(text: str, max_tokens: int,
+           exclude: Sequence[Tuple[int, int]] = ()) -> List[Optional[Tuple[int, int, int]]]:
+    """
+    원문 → (start, end, tokens) 조각: 문단, 긴 문단은 문장, 긴 문장은 단어 묶음
+    exclude 에 있는 문단은 None (청크 경계) 으로 표시
+    """
+    excluded = set(exclude)
+    units = []
+    for para_start, para_end in paragraph_spans(text):
+        if (para_start, para_end) in excluded:
+            units.append(None)
+            continue
+        tokens = count_tokens(text[para_start:para_end])
+        if tokens <= max_tokens:
+            units.append((para_start, para_end, tokens))
+            continue
+        for sent_start, sent_end in _spans(_SENTENCE_RE, text, para_start, para_end):
+            tokens = count_tokens(text[sent_start:sent_end])
+            if tokens <= max_tokens:
+                units.append((sent_start, sent_end, tokens))
+            else:
+                units.extend(_split_words(text, sent_start, sent_end, max_tokens))
+    return units
+
+
+def _tail_sentences(text: str, unit: Tuple[int, int, int], budget: int) -> List[Tuple[int, int, int]]:
+    """조각 끝쪽 문장들 중 budget 토큰 이내 (조각 하나가 겹침보다 클 때 겹침용)"""
+    tail, tail_tokens = [], 0
+    for sent_start, sent_end in reversed(_spans(_SENTENCE_RE, text, unit[0], unit[1])):
+        tokens = count_tokens(text[sent_start:sent_end])
+        if tail_tokens + tokens > budget:
+            break
+        tail.insert(0, (sent_start, sent_end, tokens))
+        tail_tokens += tokens
+    return tail
+
+
+def chunk_text(text: Optional[str], max_tokens: int = CHUNK_MAX_TOKENS,
+               overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+               exclude: Sequence[Tuple[int, int]] = ()) -> List[TextChunk]:
+    """
+    원문을 토큰 수 기준 청크로 분할
+    exclude: 색인하지 않을 문단 위치 (paragraph_spans 기준) → 청크에 포함하지 않고 그 자리에서 청크를 끊음
+    반환: TextChunk(text=원문[start:end], start, end, tokens) 목록 (토큰 수는 조각 합계)
+    """
+    if not text or not text.strip():
+        return []
+
+    chunks = []
+    current: List[Tuple[int, int, int]] = []
+    current_tokens = 0
+
+    def _emit():
+        start, end = current[0][0], current[-1][1]
+        chunks.append(TextChunk(text=text[start:end], start=start, end=end, tokens=current_tokens))
+
+    for unit in _units(text, max_tokens, exclude):
+        if unit is None:
+            # 제외 문단을 건너뛰는 청크는 만들지 않음 (원문 위치 그대로 유지)
+            if current and (not chunks or current[-1][1] > chunks[-1].end):
+                _emit()
+            current, current_tokens = [], 0
+            continue
+        if current and current_tokens + unit[2] > max_tokens:
+            _emit()
+            # 겹침: 끝에서부터 overlap_tokens 이내의 조각만 남김 (새 조각과 합쳐 넘치면 더 줄임)
+            kept, kept_tokens = [], 0
+            for prev in reversed(current):
+                if kept_tokens + prev[2] > overlap_tokens or kept_tokens + prev[2] + unit[2] > max_tokens:
+                    break
+                kept.insert(0, prev)
+                kept_tokens += prev[2]
+            if not kept and overlap_tokens > 0:
+                kept = _tail_sentences(text, current[-1], min(overlap_tokens, max_tokens - unit[2]))
+                kept_tokens = sum(k[2] for k in kept)
+            current, current_tokens = kept, kept_tokens
+        current.append(unit)
+        current_tokens += unit[2]
+
+    if current and (not chunks or current[-1][1] > chunks[-1].end):
+        _emit()
+    return chunks